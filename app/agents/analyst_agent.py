@@ -43,18 +43,19 @@ class AnalystAgent(BaseAgent):
 
     async def run_loop(self):
         # Triggered by analysis updates (overall regime or major strategy update)
-        event_bus.subscribe(EventType.ANALYSIS_UPDATE, self.handle_analysis_update)
+        event_bus.subscribe(EventType.ANALYSIS_UPDATE, self.handle_analysis_update, predicate=self.is_major_update)
         while self.is_running:
             await asyncio.sleep(1)
 
+    @staticmethod
+    def is_major_update(data: Dict[str, Any]) -> bool:
+        # We only run overall analysis periodically or on major triggers
+        return data.get("timeframe") == "overall" or data.get("section") in ["market_regime", "ema_strategy", "cycles_strategy"]
+
     async def handle_analysis_update(self, data: Dict[str, Any]):
         if not self.is_running or not self.is_active:
             return
             
-        # We only run overall analysis periodically or on major triggers
-        if data.get("timeframe") != "overall" and data.get("section") not in ["market_regime", "ema_strategy", "cycles_strategy"]:
-            return
-            
         symbol = data.get("symbol")
         if not symbol: return
 
@@ -5,7 +5,6 @@ import time
 import logging
 from typing import Dict, Any, List, Optional
 from app.agents.base_agent import BaseAgent
-from app.core.event_bus import event_bus, EventType
 from app.core.analysis import AnalysisManager
 from sklearn.gaussian_process import GaussianProcessRegressor
 from sklearn.gaussian_process.kernels import RBF, ConstantKernel as C
@@ -18,7 +17,7 @@ class AnchoredVWAPAgent(BaseAgent):
         self.last_processed = {} # {symbol_tf: timestamp}
 
     async def run_loop(self):
-        event_bus.subscribe(EventType.ANALYSIS_UPDATE, self.handle_analysis_update)
+        AnalysisManager.watch("market_structure", self.handle_analysis_update)
         while self.is_running:
             await asyncio.sleep(1)
 
@@ -26,9 +25,6 @@ class AnchoredVWAPAgent(BaseAgent):
         if not self.is_running or not self.is_active:
             return
             
-        if data.get("section") != "market_structure":
-            return
-            
         symbol = data.get("symbol")
         timeframe = data.get("timeframe")
         
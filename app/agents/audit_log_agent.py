@@ -1,5 +1,6 @@
 import asyncio
 import numpy as np
+from collections.abc import Mapping
 from typing import Any
 from app.agents.base_agent import BaseAgent
 from app.core.event_bus import event_bus, EventType
@@ -24,7 +25,7 @@ class AuditLogAgent(BaseAgent):
 
     def sanitize_data(self, data: Any) -> Any:
         """Recursively convert NumPy types to Python primitives for JSON serialization."""
-        if isinstance(data, dict):
+        if isinstance(data, Mapping):
             return {k: self.sanitize_data(v) for k, v in data.items()}
         elif isinstance(data, list):
             return [self.sanitize_data(v) for v in data]
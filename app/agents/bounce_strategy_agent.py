@@ -41,7 +41,7 @@ class BounceStrategyAgent(BaseAgent):
 
     async def run_loop(self):
         # Triggered by analysis updates
-        event_bus.subscribe(EventType.ANALYSIS_UPDATE, self.handle_analysis_update)
+        event_bus.subscribe(EventType.ANALYSIS_UPDATE, self.handle_analysis_update, section="market_regime")
         while self.is_running:
             await asyncio.sleep(1)
 
@@ -49,9 +49,6 @@ class BounceStrategyAgent(BaseAgent):
         if not self.is_running or not self.is_active:
             return
             
-        if data.get("section") != "market_regime":
-            return
-            
         symbol = data.get("symbol")
         timeframe = data.get("timeframe")
         
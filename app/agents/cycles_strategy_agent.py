@@ -40,7 +40,7 @@ class CyclesStrategyAgent(BaseAgent):
 
     async def run_loop(self):
         # Triggered by analysis updates to ensure regime/structure context is available
-        event_bus.subscribe(EventType.ANALYSIS_UPDATE, self.handle_analysis_update)
+        event_bus.subscribe(EventType.ANALYSIS_UPDATE, self.handle_analysis_update, section="market_regime")
         while self.is_running:
             await asyncio.sleep(1)
 
@@ -48,9 +48,6 @@ class CyclesStrategyAgent(BaseAgent):
         if not self.is_running or not self.is_active:
             return
             
-        if data.get("section") != "market_regime":
-            return
-            
         symbol = data.get("symbol")
         timeframe = data.get("timeframe")
         
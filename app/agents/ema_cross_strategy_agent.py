@@ -3,6 +3,7 @@ import pandas_ta as ta
 import asyncio
 from app.agents.base_agent import BaseAgent
 from app.core.event_bus import event_bus, EventType
+from app.core.event_payloads import StrategySignalPayload
 from app.core.analysis import AnalysisManager
 import logging
 
@@ -104,17 +105,17 @@ class EMACrossStrategyAgent(BaseAgent):
                 sl = price * 0.98 if signal == "BUY" else price * 1.02
                 tp = price * 1.05 if signal == "BUY" else price * 0.95
                 
-                await event_bus.publish(EventType.STRATEGY_SIGNAL, {
-                    "strategy_id": self.strategy_id,
-                    "symbol": symbol,
-                    "signal": signal,
-                    "confidence": confidence,
-                    "rationale": rationale,
-                    "price": price,
-                    "sl_price": sl,
-                    "tp_price": tp,
-                    "timestamp": timestamp
-                })
+                await event_bus.publish(EventType.STRATEGY_SIGNAL, StrategySignalPayload(
+                    strategy_id=self.strategy_id,
+                    symbol=symbol,
+                    signal=signal,
+                    confidence=confidence,
+                    rationale=rationale,
+                    price=price,
+                    sl_price=sl,
+                    tp_price=tp,
+                    timestamp=timestamp
+                ))
         except Exception as e:
             logger.error(f"Error in {self.name}: {e}")
 
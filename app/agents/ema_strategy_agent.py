@@ -42,7 +42,7 @@ class EMAStrategyAgent(BaseAgent):
 
     async def run_loop(self):
         # Triggered by market structure updates to ensure context is available
-        event_bus.subscribe(EventType.ANALYSIS_UPDATE, self.handle_analysis_update)
+        AnalysisManager.watch("market_structure", self.handle_analysis_update)
         while self.is_running:
             await asyncio.sleep(1)
 
@@ -50,9 +50,6 @@ class EMAStrategyAgent(BaseAgent):
         if not self.is_running or not self.is_active:
             return
             
-        if data.get("section") != "market_structure":
-            return
-            
         symbol = data.get("symbol")
         timeframe = data.get("timeframe")
         
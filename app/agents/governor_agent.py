@@ -1,4 +1,5 @@
 import asyncio
+import uuid
 from typing import List
 from app.agents.base_agent import BaseAgent
 from app.agents.market_data_agent import MarketDataAgent
@@ -23,6 +24,9 @@ from app.agents.anomaly_detection_agent import AnomalyDetectionAgent
 from app.agents.dummy_strategy_agent import DummyStrategyAgent
 from app.agents.sanity_agent import SanityAgent
 from app.core.event_bus import event_bus, EventType
+from app.core.event_transport import EventBroker
+from app.worker import PROCESS_LOCAL_AGENTS
+from app.core.analysis import AnalysisManager
 from app.core.database import SessionLocal
 from app.models.models import EquityModel
 from app.core.config import settings
@@ -74,6 +78,15 @@ class GovernorAgent:
             AnomalyDetectionAgent(),
             # DummyStrategyAgent(signal_interval=5, name="DummyStrategy1")
         ]
+        # Agents run by `python -m app.worker` processes (EVENT_BUS_TRANSPORT=socket) aren't started here.
+        # Agents that use AnalysisManager sections can't run elsewhere and stay in this process.
+        process_local = PROCESS_LOCAL_AGENTS.intersection(settings.WORKER_AGENTS)
+        if process_local:
+            logger.warning(f"GovernorAgent: {', '.join(sorted(process_local))} use analysis sections, running them here despite WORKER_AGENTS")
+        offloaded = set(settings.WORKER_AGENTS) - PROCESS_LOCAL_AGENTS
+        self.worker_agents = [a.name for a in self.agents if type(a).__name__ in offloaded]
+        self.agents = [a for a in self.agents if type(a).__name__ not in offloaded]
+        self.broker = EventBroker(settings.EVENT_BUS_SOCKET) if settings.EVENT_BUS_TRANSPORT == "socket" else None
         self.is_running = False
         self.is_active = True
         self.tasks_list = [] # Renamed from self.tasks to avoid conflict
@@ -94,7 +107,9 @@ class GovernorAgent:
             "prompts": self.prompts,
             "config": {
                 "max_symbols": settings.MAX_SYMBOLS,
-                "demo_mode": settings.DEMO_MODE
+                "demo_mode": settings.DEMO_MODE,
+                "event_bus_transport": settings.EVENT_BUS_TRANSPORT,
+                "worker_agents": self.worker_agents
             }
         }
 
@@ -107,6 +122,9 @@ class GovernorAgent:
             self.start_time = time.time()
             
         self.is_running = True
+        if self.broker is not None and not self.broker.is_running:
+            await self.broker.start()
+        await event_bus.start()
         await self.log_event("Governor: Starting all agents...", level="INFO")
         
         # In a real hierarchical system, we might start them in order, 
@@ -121,6 +139,7 @@ class GovernorAgent:
             
         # 4. Start equity snapshotting
         self.tasks_list.append(asyncio.create_task(self.equity_snapshot_loop()))
+        self.tasks_list.append(asyncio.create_task(self.analysis_memory_loop()))
             
         # 4. Start symbol initialization
         self.tasks_list.append(asyncio.create_task(self.initialize_symbols_task()))
@@ -156,6 +175,17 @@ class GovernorAgent:
             "timestamp": int(time.time())
         })
 
+    async def analysis_memory_loop(self):
+        """Keeps the analysis objects within ANALYSIS_MEMORY_BUDGET_MB (see AnalysisManager.enforce_budget)."""
+        while self.is_running:
+            await asyncio.sleep(settings.ANALYSIS_MAINTENANCE_INTERVAL)
+            try:
+                # Symbols still fetched by the MarketDataAgent are never evicted for the budget
+                market_data = next((a for a in self.agents if isinstance(a, MarketDataAgent)), None)
+                await AnalysisManager.enforce_budget(active=market_data.symbols if market_data else None)
+            except Exception as e:
+                logger.error(f"Governor: Analysis memory maintenance failed: {e}", exc_info=True)
+
     async def equity_snapshot_loop(self):
         """Periodically snapshots the account equity for history."""
         # Use an exchange instance for balance fetching
@@ -227,9 +257,47 @@ class GovernorAgent:
         finally:
             await exchange.close()
 
+    @staticmethod
+    def _latest_approvals(journal) -> List[str]:
+        """Symbols of the newest approval cycle in the journal, in approval order (one scan)."""
+        cycle, symbols = object(), []
+        for record in journal.replay(event_types=[EventType.SYMBOL_APPROVED.value]):
+            record_cycle = record.data.get("cycle")
+            if record_cycle != cycle:
+                cycle, symbols = record_cycle, []
+            symbol = record.data.get("symbol")
+            if symbol and symbol not in symbols:
+                symbols.append(symbol)
+        return symbols
+
+    async def restore_approved_symbols(self, cycle: str) -> set:
+        """
+        Re-approves the symbols of the last approval cycle journaled before a restart, so agents
+        resume the same symbols without re-running the sanity checks (LLM calls) for them.
+        They are published again as part of `cycle`, so the next restart finds them there;
+        symbols approved in earlier cycles only are not restored.
+        """
+        if event_bus.journal is None or not settings.EVENT_JOURNAL_REPLAY:
+            return set()
+        # CRC checks and unpickling of the whole journal stay off the event loop
+        symbols = (await asyncio.to_thread(self._latest_approvals, event_bus.journal))[:settings.MAX_SYMBOLS]
+        for symbol in symbols:
+            await event_bus.publish(EventType.SYMBOL_APPROVED, {
+                "symbol": symbol,
+                "agent": "SanityAgent",
+                "cycle": cycle,
+                "restored": True,
+            })
+        if symbols:
+            await self.log_event(f"Governor: Restored {len(symbols)} approved symbols from the event journal.", level="INFO")
+        return set(symbols)
+
     async def initialize_symbols_task(self):
         """Fetches, filters, prioritizes, and sanitizes symbols."""
         logger.info("Governor: Starting symbol initialization...")
+        # Approvals carry the cycle they belong to; a restart restores only the newest cycle
+        cycle = uuid.uuid4().hex
+        restored_symbols = await self.restore_approved_symbols(cycle)
         
         # Use a temporary exchange instance to fetch markets
         exchange = ccxt.bingx({
@@ -276,10 +344,14 @@ class GovernorAgent:
             
             logger.info(f"Governor: Starting sanity checks on {len(prioritized_list)} symbols. Limit: {settings.MAX_SYMBOLS}")
             
-            approved_count = 0
+            approved_count = len(restored_symbols)
             for symbol in prioritized_list:
                 if not self.is_running or approved_count >= settings.MAX_SYMBOLS:
                     break
+
+                # Approved before the restart (replayed from the event journal)
+                if symbol.replace('/', '-').split(':')[0] in restored_symbols:
+                    continue
                 
                 # Check with Sanity Agent
                 is_sane = await self.sanity_agent.check_symbol(symbol)
@@ -292,20 +364,15 @@ class GovernorAgent:
                     logger.info(f"Governor: Symbol {display_symbol} PASSED sanity check ({approved_count + 1}/{settings.MAX_SYMBOLS}).")
                     
                     # Task 1: Sequential Analysis. We wait for completion before next symbol.
-                    # We'll use a Future or Event to wait for the ANALYSIS_COMPLETED event.
-                    completion_event = asyncio.Event()
-                    
-                    async def on_completed(data):
-                        if data.get("symbol") == display_symbol:
-                            completion_event.set()
-                    
-                    event_bus.subscribe(EventType.ANALYSIS_COMPLETED, on_completed)
+                    # Registered before the approval goes out so a fast analysis can't be missed.
+                    completed = event_bus.expect(EventType.ANALYSIS_COMPLETED, symbol=display_symbol)
                     
                     # Broadcast approval
                     # Task 2: Pass 'agent': 'SanityAgent' so it shows correctly in audit trail
                     await event_bus.publish(EventType.SYMBOL_APPROVED, {
                         "symbol": display_symbol, 
-                        "agent": "SanityAgent"
+                        "agent": "SanityAgent",
+                        "cycle": cycle
                     })
                     approved_count += 1
 
@@ -313,12 +380,12 @@ class GovernorAgent:
                     # If it times out, we move to the next symbol anyway to avoid getting stuck
                     try:
                         logger.info(f"Governor: Waiting for analysis completion for {display_symbol}...")
-                        await asyncio.wait_for(completion_event.wait(), timeout=60.0)
+                        await asyncio.wait_for(completed, timeout=60.0)
                         logger.info(f"Governor: Analysis completed for {display_symbol}.")
                     except asyncio.TimeoutError:
                         logger.warning(f"Governor: Timeout waiting for analysis completion for {display_symbol}. Moving on.")
                     finally:
-                        event_bus.unsubscribe(EventType.ANALYSIS_COMPLETED, on_completed)
+                        completed.cancel()
                 else:
                     logger.warning(f"Governor: Symbol {symbol} FAILED sanity check (Derivative/Weird). Skipping.")
                 
@@ -349,6 +416,10 @@ class GovernorAgent:
         self.tasks_list = []
         self.is_running = False
         await self.log_event("Governor: System stopped.", level="INFO")
+        # Flushes queued events before the dispatcher goes away
+        await event_bus.stop()
+        if self.broker is not None:
+            await self.broker.stop()
 
     async def emergency_stop(self):
         await self.log_event("Governor: EMERGENCY STOP TRIGGERED!", level="CRITICAL")
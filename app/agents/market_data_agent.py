@@ -3,18 +3,33 @@ import ccxt.async_support as ccxt
 import pandas as pd
 import pandas_ta as ta
 import numpy as np
-from datetime import datetime
-from typing import List, Dict, Any
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple
 from app.agents.base_agent import BaseAgent
 from app.core.config import settings
 from app.core.event_bus import event_bus, EventType
+from app.core.event_payloads import MarketDataPayload
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app.core.database import SessionLocal
 from app.core.analysis import AnalysisManager
+from app.core.indicator_engine import IndicatorEngine, OHLCV_COLUMNS
+from app.core.kline_stream import create_stream_exchange
+from app.core.relative_candles import relative_candle_states, relative_candle_phases, relative_candle_bodies
+from app.core.sr_levels import ClosestLevelsTracker
 from app.models.models import CandleModel
 import logging
 
 logger = logging.getLogger("MarketDataAgent")
 
+# Weekly candles open on Monday 00:00 UTC; the epoch was a Thursday
+WEEK_OPEN_OFFSET_MS = 4 * 86_400_000
+
+# Rows per INSERT ... ON CONFLICT statement. 8 bound parameters per candle keeps a
+# statement well below SQLite's (32766) and PostgreSQL's (65535) parameter limits.
+UPSERT_CHUNK_ROWS = 500
+
 class MarketDataAgent(BaseAgent):
     def __init__(self):
         super().__init__(name="MarketDataAgent")
@@ -35,6 +50,7 @@ class MarketDataAgent(BaseAgent):
         self.exchange = ccxt.bingx({
             'apiKey': settings.BINGX_API_KEY,
             'secret': settings.BINGX_SECRET_KEY,
+            'enableRateLimit': True,
             'options': {
                 'defaultType': 'swap',  # Trading perps
                 'sandbox': settings.BINGX_IS_SANDBOX, 
@@ -55,12 +71,54 @@ class MarketDataAgent(BaseAgent):
         self.retry_delays = [1, 2, 5]  # Exponential backoff delays in seconds
         self.retry_tracker = {}  # Track retries per symbol-timeframe: {(symbol, tf): retry_count}
 
+        # Delta fetching: once an indicator engine is seeded, only request candles since its newest one
+        self.delta_fetch = True
+        self.fetch_limit = 300
+
+        # Fetch scheduler: bounded number of in-flight exchange requests
+        self.fetch_concurrency = settings.MARKET_DATA_CONCURRENCY
+        self.fetch_semaphore = asyncio.Semaphore(self.fetch_concurrency)
+
+        # Candle-close scheduling: each timeframe is fetched right after its candle closes
+        # (plus a grace period for the exchange to finalize it); the lowest timeframe also
+        # gets intrabar refreshes of the forming candle.
+        self.next_close = {}  # {tf: close time (ms) of the candle forming at the last fetch}
+        self.next_intrabar = {}  # {tf: ms}
+        self.close_grace_seconds = 2
+        self.intrabar_timeframes = [min(self.timeframes, key=self._timeframe_to_minutes)] if self.timeframes else []
+        self.intrabar_interval = 10
+        self.max_sleep_seconds = 60
+        self.scheduled_symbols = set()
+        self.schedule_changed = asyncio.Event()
+
+        # Streaming ingestion (ccxt.pro watch_ohlcv): the forming candle of the stream timeframes
+        # is updated from kline pushes instead of intrabar polling; REST still seeds the history
+        # and fetches candle closes.
+        self.streaming = settings.MARKET_DATA_STREAMING
+        self.stream_timeframes = list(self.intrabar_timeframes)
+        self.stream_exchange = None
+        self.stream_tasks = {}  # {(symbol, tf): asyncio.Task}
+        self.stream_opened = set()  # {(symbol, tf)} whose newest candle was opened by the stream
+
+        # On-demand fetches (MARKET_DATA_REQUEST) in progress, shared by concurrent requests
+        self.inflight_requests = {}  # {(symbol, tf): asyncio.Task}
+        self.reply_tasks = set()
+
+        # Incremental indicator state per symbol-timeframe: {(symbol, tf): IndicatorEngine}
+        self.indicator_engines = {}
+
+        # Candle persistence: bulk upsert of candles at/after the last persisted timestamp
+        self.bulk_upsert = True
+        self.last_persisted = {}  # {(symbol, tf): datetime of newest stored candle}
+        self._candle_index_ready = None
+
     async def handle_symbol_approved(self, data: Dict[str, Any]):
         """Callback for when a symbol is approved by SanityAgent"""
         symbol = data.get("symbol")
         if symbol and symbol not in self.symbols:
             logger.info(f"MarketDataAgent: Adding approved symbol {symbol}")
             self.symbols.append(symbol)
+            self.schedule_changed.set()
 
     def get_status(self):
         status = super().get_status()
@@ -68,15 +126,20 @@ class MarketDataAgent(BaseAgent):
             "symbols": self.symbols[:5] if len(self.symbols) > 5 else self.symbols,  # Show first 5
             "total_symbols": len(self.symbols),
             "timeframes": self.timeframes,
-            "cache_enabled": self.cache_enabled
+            "cache_enabled": self.cache_enabled,
+            "indicator_engines": len(self.indicator_engines),
+            "candle_buffer_bytes": sum(engine.buffer.nbytes for engine in self.indicator_engines.values())
         }
         return status
 
     async def run_loop(self):
-        """Main loop with prioritized fetching"""
+        """Main loop: wakes up when a candle closes on any timeframe (plus intrabar refreshes)"""
         # Subscribe to events
         event_bus.subscribe(EventType.MARKET_DATA_REQUEST, self.handle_data_request)
         event_bus.subscribe(EventType.SYMBOL_APPROVED, self.handle_symbol_approved)
+
+        if self.streaming:
+            self.intrabar_timeframes = [tf for tf in self.intrabar_timeframes if tf not in self.stream_timeframes]
         
         while self.is_running and self.is_active:
             if not self.symbols:
@@ -85,18 +148,170 @@ class MarketDataAgent(BaseAgent):
                 await asyncio.sleep(5)
                 continue
 
-            # Task 6: Fetch in order from higher timeframe to lower
-            for timeframe in sorted(self.timeframes, key=lambda x: self._timeframe_to_minutes(x), reverse=True):
-                if not self.is_running or not self.is_active:
-                    break
-                    
-                for symbol in self.symbols:
-                    if not self.is_running or not self.is_active:
-                        break
-                    await self.fetch_and_publish(symbol, timeframe)
-            
-            # Sleep between cycles
-            await asyncio.sleep(10)
+            await self.run_scheduled_fetches()
+            if self.streaming:
+                self.start_streams()
+
+            # Sleep until the next candle close / intrabar refresh, or until a symbol is approved
+            self.schedule_changed.clear()
+            try:
+                await asyncio.wait_for(self.schedule_changed.wait(), timeout=self.seconds_until_next_fetch())
+            except asyncio.TimeoutError:
+                pass
+
+    def _now_ms(self) -> int:
+        return int(datetime.now(timezone.utc).timestamp() * 1000)
+
+    def next_candle_close(self, timeframe: str, now_ms: int) -> int:
+        """Close time (ms, UTC) of the candle that is forming at now_ms."""
+        unit = timeframe[-1]
+        if unit == 'M':
+            # Calendar months; _timeframe_to_minutes only approximates them as 30 days
+            months = int(timeframe[:-1]) if timeframe[:-1].isdigit() else 1
+            now = datetime.fromtimestamp(now_ms / 1000, tz=timezone.utc)
+            index = ((now.year * 12 + now.month - 1) // months + 1) * months
+            return int(datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+
+        tf_ms = self._timeframe_to_minutes(timeframe) * 60_000
+        offset = WEEK_OPEN_OFFSET_MS if unit == 'w' else 0
+        return ((now_ms - offset) // tf_ms + 1) * tf_ms + offset
+
+    def due_fetches(self, now_ms: int) -> List[tuple]:
+        """
+        (symbol, timeframe, use_cache) jobs that are due at now_ms and advances the schedule:
+        every symbol of a timeframe whose candle closed, live refreshes of the forming candle
+        on intrabar timeframes, and a first fetch for symbols approved since the last run.
+        """
+        symbols = list(self.symbols)
+        new_symbols = [s for s in symbols if s not in self.scheduled_symbols]
+        grace_ms = self.close_grace_seconds * 1000
+        jobs = []
+        for tf in self.timeframes:
+            if now_ms >= self.next_close.get(tf, 0) + grace_ms:
+                # A closed candle must come from the exchange; only the first run may start from the cache
+                jobs += [(s, tf, tf not in self.next_close) for s in symbols]
+                self.next_close[tf] = self.next_candle_close(tf, now_ms)
+                self.next_intrabar[tf] = now_ms + self.intrabar_interval * 1000
+            elif tf in self.intrabar_timeframes and now_ms >= self.next_intrabar.get(tf, 0):
+                jobs += [(s, tf, False) for s in symbols]
+                self.next_intrabar[tf] = now_ms + self.intrabar_interval * 1000
+            else:
+                jobs += [(s, tf, True) for s in new_symbols]
+        self.scheduled_symbols.update(symbols)
+        return jobs
+
+    def seconds_until_next_fetch(self) -> float:
+        now_ms = self._now_ms()
+        grace_ms = self.close_grace_seconds * 1000
+        wake_times = [self.next_close[tf] + grace_ms for tf in self.timeframes if tf in self.next_close]
+        wake_times += [self.next_intrabar[tf] for tf in self.intrabar_timeframes if tf in self.next_intrabar]
+        if not wake_times:
+            return 0
+        # Capped so a stop request is noticed even when only monthly candles are scheduled
+        return min(max(0, (min(wake_times) - now_ms) / 1000), self.max_sleep_seconds)
+
+    async def run_scheduled_fetches(self):
+        jobs = self.due_fetches(self._now_ms())
+        if jobs:
+            await self.fetch_cycle(jobs)
+
+    async def fetch_cycle(self, jobs: List[tuple] = None):
+        """
+        Fetches symbol-timeframe jobs concurrently (default: every symbol and timeframe).
+        Requests are queued on the fetch semaphore from higher to lower timeframe (Task 6),
+        and the semaphore wakes waiters in FIFO order, so higher timeframes still go out first.
+        """
+        if jobs is None:
+            jobs = [(symbol, tf, True) for tf in self.timeframes for symbol in list(self.symbols)]
+        jobs = sorted(jobs, key=lambda job: self._timeframe_to_minutes(job[1]), reverse=True)
+        results = await asyncio.gather(
+            *(self.fetch_and_publish(symbol, tf, use_cache=use_cache) for symbol, tf, use_cache in jobs),
+            return_exceptions=True
+        )
+        for (symbol, tf, _), result in zip(jobs, results):
+            if isinstance(result, Exception):
+                logger.error(f"Fetch task for {symbol} {tf} failed: {result}")
+
+    def start_streams(self):
+        """Starts a kline stream task for every symbol on the stream timeframes (restarting finished ones)."""
+        if self.stream_exchange is None:
+            self.stream_exchange = create_stream_exchange()
+        for symbol in list(self.symbols):
+            for timeframe in self.stream_timeframes:
+                task = self.stream_tasks.get((symbol, timeframe))
+                if task is None or task.done():
+                    self.stream_tasks[(symbol, timeframe)] = asyncio.create_task(self.stream_candles(symbol, timeframe))
+
+    async def stream_candles(self, symbol: str, timeframe: str):
+        """Consumes kline pushes for one symbol-timeframe and publishes MARKET_DATA whenever the candles change."""
+        key = (symbol, timeframe)
+        errors = 0
+        while self.is_running and self.is_active and symbol in self.symbols:
+            try:
+                candles = await self.stream_exchange.watch_ohlcv(symbol, timeframe)
+                errors = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = self.retry_delays[min(errors, len(self.retry_delays) - 1)]
+                errors += 1
+                logger.warning(f"Kline stream error for {symbol} {timeframe}: {e}. Reconnecting in {delay}s...")
+                await asyncio.sleep(delay)
+                continue
+
+            engine = self.indicator_engines.get(key)
+            if engine is None or not engine.is_seeded:
+                # The REST scheduler loads the history first
+                continue
+
+            rows = self.stitch_stream_candles(engine, candles)
+            if rows is None:
+                # Candles were missed; a REST delta fetch fills the gap
+                await self.fetch_and_publish(symbol, timeframe, use_cache=False)
+            elif rows:
+                df_with_ind = self.update_indicators(symbol, timeframe, rows)
+                await self.publish_stream_update(symbol, timeframe, df_with_ind)
+                if len(rows) > 1:
+                    # A candle closed: store it, and let the close-time REST fetch re-read it
+                    # (its last push may not carry the final values)
+                    self.stream_opened.add(key)
+                    await asyncio.to_thread(self.persist_candles, symbol, timeframe, rows[:-1])
+
+    def stitch_stream_candles(self, engine: IndicatorEngine, candles: List) -> List:
+        """
+        Rows to feed the indicator engine for a kline push: [] when nothing changed, None when
+        the push doesn't continue the stored candles (missed candles).
+        """
+        last_ts = engine.last_timestamp
+        rows = [c for c in candles if int(c[0]) >= last_ts]
+        if not rows:
+            return []
+
+        forming = [engine.buffer.latest(col) for col in OHLCV_COLUMNS]
+        first_ts = int(rows[0][0])
+        if first_ts == last_ts:
+            if len(rows) == 1 and [float(x) for x in rows[0][1:6]] == [float(x) for x in forming[1:6]]:
+                return []
+            return rows
+        if first_ts == self.next_candle_close(engine.timeframe, last_ts):
+            # A new candle opened; the stored forming candle anchors it
+            return [forming] + rows
+        return None
+
+    async def publish_stream_update(self, symbol: str, timeframe: str, df_with_ind: pd.DataFrame):
+        analysis = await AnalysisManager.get_analysis(symbol)
+        await analysis.update_section("market_data", df_with_ind, timeframe)
+        await event_bus.publish(EventType.MARKET_DATA, MarketDataPayload(
+            symbol=symbol,
+            timeframe=timeframe,
+            timestamp=df_with_ind['timestamp'].iloc[-1],
+            latest_close=float(df_with_ind['Close'].iloc[-1]),
+            agent=self.name,
+            from_cache=False,
+            streamed=True,
+            candles=len(df_with_ind)
+        ))
+        self.processed_count += 1
 
     def calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """Applies all requested indicators to the DataFrame"""
@@ -119,183 +334,15 @@ class MarketDataAgent(BaseAgent):
             df['Heikin Ashi Close'] = ha['HA_close']
 
             # 2. Relative Candles (Logic from TODO.md)
-            # We strictly implement the state machine and phase logic provided.
-            # Convert to numpy for faster access
-            opens = df['Open'].values
-            highs = df['High'].values
-            lows = df['Low'].values
-            closes = df['Close'].values
-            n = len(df)
-            
-            # Helper lambdas (using numpy array indexing)
-            # Note: i is index
-            def is_HH(i): return i > 0 and highs[i] > highs[i-1]
-            def is_HL(i): return i > 0 and lows[i] > lows[i-1]
-            def is_LH(i): return i > 0 and highs[i] < highs[i-1]
-            def is_LL(i): return i > 0 and lows[i] < lows[i-1]
-            def is_green(i): return closes[i] > opens[i]
-            def is_red(i): return closes[i] < opens[i]
-
-            states = ['X'] * n
-            
-            for i in range(2, n):
-                prev_state = states[i-1]
-                
-                # Logic from TODO.md
-                if prev_state == 'X':
-                    if is_HH(i) and is_HL(i): states[i] = 'U'
-                    elif is_LH(i) and is_LL(i): states[i] = 'D'
-                    elif is_LH(i) and is_HL(i):
-                        if is_LH(i-1) and is_HL(i-1): states[i] = 'I2'
-                        else: states[i] = 'I'
-                    elif is_HH(i) and is_LL(i):
-                        if is_green(i): states[i] = 'RU2'
-                        elif is_red(i): states[i] = 'RD2'
-
-                elif prev_state == 'U':
-                    if is_HH(i) and is_HL(i): states[i] = 'U'
-                    elif is_LH(i) and is_LL(i): states[i] = 'RD'
-                    elif is_LH(i) and is_HL(i):
-                        if is_LH(i-1) and is_HL(i-1): states[i] = 'I2'
-                        else: states[i] = 'I'
-                    elif is_HH(i) and is_LL(i): states[i] = 'RU'
-
-                elif prev_state == 'D':
-                    if is_HH(i) and is_HL(i): states[i] = 'RU'
-                    elif is_LH(i) and is_LL(i): states[i] = 'D'
-                    elif is_LH(i) and is_HL(i):
-                        if is_LH(i-1) and is_HL(i-1): states[i] = 'I2'
-                        else: states[i] = 'I'
-                    elif is_HH(i) and is_LL(i): states[i] = 'RU' # Code says RU for both? line 107
-                
-                elif prev_state in ['RU', 'RU2']:
-                    if is_HH(i) and is_HL(i): states[i] = 'U'
-                    elif is_LH(i) and is_LL(i): states[i] = 'RD'
-                    elif is_LH(i) and is_HL(i):
-                        if is_LH(i-1) and is_HL(i-1): states[i] = 'I2'
-                        else: states[i] = 'I'
-                    elif is_HH(i) and is_LL(i):
-                        if is_green(i): states[i] = 'RU2'
-                        elif is_red(i): states[i] = 'RD2'
-
-                elif prev_state in ['RD', 'RD2']:
-                    if is_HH(i) and is_HL(i): states[i] = 'RU'
-                    elif is_LH(i) and is_LL(i): states[i] = 'D'
-                    elif is_LH(i) and is_HL(i): states[i] = 'I'
-                    elif is_HH(i) and is_LL(i):
-                        if is_green(i): states[i] = 'RU2'
-                        elif is_red(i): states[i] = 'RD2'
-                
-                elif prev_state == 'I':
-                    if is_HH(i) and is_HL(i): states[i] = 'RU'
-                    elif is_LH(i) and is_LL(i): states[i] = 'RD'
-                    elif is_LH(i) and is_HL(i): states[i] = 'I2'
-                    elif is_HH(i) and is_LL(i):
-                        if is_green(i): states[i] = 'RU2'
-                        elif is_red(i): states[i] = 'RD2'
-
-                elif prev_state == 'I2':
-                    if is_HH(i) and is_HL(i): states[i] = 'RU'
-                    elif is_LH(i) and is_LL(i): states[i] = 'RD'
-                    elif is_LH(i) and is_HL(i): states[i] = 'I2'
-                    elif is_HH(i) and is_LL(i):
-                        if is_green(i): states[i] = 'RU2'
-                        elif is_red(i): states[i] = 'RD2'
-                else:
-                    states[i] = 'X'
+            # Integer-coded state machine and 3-gram phase lookup (app/core/relative_candles.py)
+            opens = df['Open'].to_numpy(dtype=float)
+            highs = df['High'].to_numpy(dtype=float)
+            lows = df['Low'].to_numpy(dtype=float)
+            closes = df['Close'].to_numpy(dtype=float)
 
-            # Calculate Phases
-            phases = np.zeros(n)
-            # Initialize first phase (0)
-            phases[0] = 1 if is_green(0) else -1
-            for i in range(1, 3):
-                phases[i] = phases[i-1]
-
-            for i in range(3, n):
-                s2, s1, s0 = states[i-2], states[i-1], states[i]
-                
-                up_seq = (
-                    (s1 == 'D' and s0 == 'RU') or
-                    (s2 == 'D' and s1 == 'I' and s0 == 'RU') or
-                    (s1 == 'D' and s0 == 'RU2') or
-                    (s2 == 'D' and s1 == 'I' and s0 == 'RU2') or
-                    (s1 == 'RD' and s0 == 'RU') or
-                    (s2 == 'RD' and s1 == 'I' and s0 == 'RU') or
-                    (s1 == 'RD' and s0 == 'RU2') or
-                    (s2 == 'RD' and s1 == 'I' and s0 == 'RU2') or
-                    (s1 == 'RD2' and s0 == 'RU') or
-                    (s2 == 'RD2' and s1 == 'I' and s0 == 'RU') or
-                    (s1 == 'RD2' and s0 == 'RU2') or
-                    (s2 == 'RD2' and s1 == 'I' and s0 == 'RU2') or
-                    (s2 == 'I' and s1 == 'I2' and s0 == 'RU') or
-                    (s2 == 'I' and s1 == 'I2' and s0 == 'RU2')
-                )
-                
-                down_seq = (
-                    (s1 == 'U' and s0 == 'RD') or
-                    (s2 == 'U' and s1 == 'I' and s0 == 'RD') or
-                    (s1 == 'U' and s0 == 'RD2') or
-                    (s2 == 'U' and s1 == 'I' and s0 == 'RD2') or
-                    (s1 == 'RU' and s0 == 'RD') or
-                    (s2 == 'RU' and s1 == 'I' and s0 == 'RD') or
-                    (s1 == 'RU' and s0 == 'RD2') or
-                    (s2 == 'RU' and s1 == 'I' and s0 == 'RD2') or
-                    (s1 == 'RU2' and s0 == 'RD') or
-                    (s2 == 'RU2' and s1 == 'I' and s0 == 'RD') or
-                    (s1 == 'RU2' and s0 == 'RD2') or
-                    (s2 == 'RU2' and s1 == 'I' and s0 == 'RD2') or
-                    (s2 == 'I' and s1 == 'I2' and s0 == 'RD') or
-                    (s2 == 'I' and s1 == 'I2' and s0 == 'RD2')
-                )
-                
-                if up_seq:
-                    phases[i] = 1
-                elif down_seq:
-                    phases[i] = -1
-                else:
-                    phases[i] = phases[i-1]
-
-            # Calculate Relative Candles Open/Close (Drawing Logic)
-            # Logic provided by user:
-            # HH & !LL -> Bullish (O=L, C=H)
-            # LL & !HH -> Bearish (O=H, C=L)
-            # HH & LL -> Outside (Follows original candle color: Red->Full Red, Green->Full Green)
-            # Else (Inside/Equal) -> Bearish Full (O=H, C=L)
-            
-            rel_opens = np.copy(opens)
-            rel_closes = np.copy(closes)
-            rel_modes = np.array(['Standard'] * n, dtype=object)
-            
-            # Vectorize or Loop? Loop is strictly safer for exact logic match, n is small (100-1000)
-            for i in range(1, n):
-                prev_h = highs[i-1]
-                prev_l = lows[i-1]
-                curr_h = highs[i]
-                curr_l = lows[i]
-                curr_o = opens[i]
-                curr_c = closes[i]
-                
-                hh = curr_h > prev_h
-                ll = curr_l < prev_l
-                
-                if hh and not ll:
-                    rel_opens[i] = curr_l
-                    rel_closes[i] = curr_h
-                elif ll and not hh:
-                    rel_opens[i] = curr_h
-                    rel_closes[i] = curr_l
-                elif hh and ll:
-                    if curr_o > curr_c: # Original Red
-                        rel_opens[i] = curr_h
-                        rel_closes[i] = curr_l
-                    else: # Original Green/Doji
-                        rel_opens[i] = curr_l
-                        rel_closes[i] = curr_h
-                else:
-                    # Inside or exact -> O=High, C=Low (Red in basic logic, but marked Inside for Gray)
-                    rel_opens[i] = curr_h
-                    rel_closes[i] = curr_l
-                    rel_modes[i] = 'Inside'
+            states = relative_candle_states(opens, highs, lows, closes)
+            phases = relative_candle_phases(states, first_green=bool(closes[0] > opens[0]))
+            rel_opens, rel_closes, rel_modes = relative_candle_bodies(opens, highs, lows, closes)
 
             df['Relative Candles Open'] = rel_opens
             df['Relative Candles Close'] = rel_closes
@@ -443,9 +490,8 @@ class MarketDataAgent(BaseAgent):
             supports = [None] * n
             resistances = [None] * n
             
-            # Pools of confirmed levels
-            support_pool = []
-            resistance_pool = []
+            # Sorted pools of confirmed levels (bisect lookups, see app/core/sr_levels.py)
+            levels = ClosestLevelsTracker()
             
             offset = 9 // 2 # 4
             
@@ -456,34 +502,21 @@ class MarketDataAgent(BaseAgent):
                 # 1. Update pools with fractals confirmed at index i
                 # A fractal at conf_idx is confirmed when we have offset candles after it.
                 conf_idx = i - offset
+                new_support = new_resistance = None
                 
                 if conf_idx >= 0:
                     # New Resistance confirmed (High Fractal) -> Use Body Top
                     if not np.isnan(fh9_vals[conf_idx]):
-                        resistance_pool.append(body_top[conf_idx])
+                        new_resistance = body_top[conf_idx]
                     
                     # New Support confirmed (Low Fractal) -> Use Body Bottom
                     if not np.isnan(fl9_vals[conf_idx]):
-                        support_pool.append(body_bottom[conf_idx])
-                
-                current_price = closes[i]
+                        new_support = body_bottom[conf_idx]
                 
-                # 2. Find Closest Support (Max Level < Price)
-                below = [l for l in support_pool if l < current_price]
-                if below:
-                    supports[i] = max(below)
-                else:
-                    # Fallback to older levels if broken? 
-                    # user said: "If price breaks a support, the closest support should immediately be the next fractal down."
-                    # This is naturally handled by max(below) if we keep all historical levels.
-                    supports[i] = None
-                    
-                # 3. Find Closest Resistance (Min Level > Price)
-                above = [l for l in resistance_pool if l > current_price]
-                if above:
-                    resistances[i] = min(above)
-                else:
-                    resistances[i] = None
+                # 2. Closest Support (Max Level < Price) and Closest Resistance (Min Level > Price)
+                # If price breaks a support, the next fractal down becomes the closest support
+                # since all historical levels are kept in the pool.
+                supports[i], resistances[i] = levels.update(closes[i], support=new_support, resistance=new_resistance)
 
             df['Closest Support'] = supports
             df['Closest Resistance'] = resistances
@@ -494,39 +527,50 @@ class MarketDataAgent(BaseAgent):
             logger.error(f"Error calculating indicators: {e}", exc_info=True)
             return df
 
-    async def fetch_and_publish(self, symbol: str, timeframe: str):
-        """Fetch data with caching support and retry logic"""
+    def update_indicators(self, symbol: str, timeframe: str, ohlcv: List) -> pd.DataFrame:
+        """
+        Incrementally updates the indicators for a symbol-timeframe.
+        Only the newest candles are computed once the engine has enough history;
+        otherwise (first fetch, warm-up, gaps) the full calculate_indicators batch runs.
+        """
+        key = (symbol, timeframe)
+        engine = self.indicator_engines.get(key)
+        if engine is None:
+            engine = IndicatorEngine(symbol, timeframe, batch=self.calculate_indicators)
+            self.indicator_engines[key] = engine
+        try:
+            return engine.update(ohlcv)
+        except Exception as e:
+            logger.error(f"Incremental indicator update failed for {symbol} {timeframe}: {e}", exc_info=True)
+            return engine.seed(ohlcv)
+
+    async def fetch_and_publish(self, symbol: str, timeframe: str, use_cache: bool = True) -> Optional[MarketDataPayload]:
+        """Fetch data with caching support and retry logic. Returns the published payload, None if the fetch failed."""
         retry_key = (symbol, timeframe)
         
-        # Check cache first
-        if self.cache_enabled:
+        # Check cache first (skipped for intrabar refreshes, which want the live forming candle)
+        if self.cache_enabled and use_cache:
             cached_data = self.get_cached_data(symbol, timeframe)
             if cached_data and self.is_cache_valid(cached_data, timeframe):
-                # We need to reconstruct DF to calc indicators? 
-                # Yes, because cached data might be just raw OHLCV or old format.
-                # For now assume cached data is OHLCV. 
-                # Calculating indicators on every fetch is okay.
+                # Cached data is raw OHLCV; the indicator engine only computes
+                # the candles it has not seen yet.
                 
                 df_cache = pd.DataFrame(cached_data, columns=['timestamp', 'Open', 'High', 'Low', 'Close', 'Volume'])
-                df_with_ind = self.calculate_indicators(df_cache)
+                df_with_ind = self.update_indicators(symbol, timeframe, cached_data)
                 
                 # Update Analysis Object
                 analysis = await AnalysisManager.get_analysis(symbol)
                 await analysis.update_section("market_data", df_with_ind, timeframe)
 
-                # Serialize for event bus
-                columns = df_with_ind.columns.tolist()
-                values = df_with_ind.replace({np.nan: None}).values.tolist()
-                
-                data = {
-                    "symbol": symbol,
-                    "timeframe": timeframe,
-                    "timestamp": float(df_cache['timestamp'].values[-1]),
-                    "latest_close": float(df_cache['Close'].iloc[-1]),
-                    "agent": self.name,
-                    "from_cache": True,
-                    "candles": len(df_cache)
-                }
+                data = MarketDataPayload(
+                    symbol=symbol,
+                    timeframe=timeframe,
+                    timestamp=float(df_cache['timestamp'].values[-1]),
+                    latest_close=float(df_cache['Close'].iloc[-1]),
+                    agent=self.name,
+                    from_cache=True,
+                    candles=len(df_cache)
+                )
                 await self.log_market_action("FETCH_DATA_CACHE", symbol, {"timeframe": timeframe})
                 await event_bus.publish(EventType.MARKET_DATA, data)
                 self.processed_count += 1
@@ -535,7 +579,7 @@ class MarketDataAgent(BaseAgent):
                 if retry_key in self.retry_tracker:
                     del self.retry_tracker[retry_key]
                     
-                return
+                return data
         
         # Get current retry count
         retry_count = self.retry_tracker.get(retry_key, 0)
@@ -547,31 +591,30 @@ class MarketDataAgent(BaseAgent):
                 
             logger.debug(f"Fetching {symbol} {timeframe} (attempt {retry_count + 1}/{self.max_retries + 1})")
             
-            # Task 4: Fetch at least 200 candles (300 for safety and indicator warm-up)
-            ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, limit=300)
+            async with self.fetch_semaphore:
+                if not self.is_running:
+                    return
+                ohlcv, is_delta = await self.fetch_candles(symbol, timeframe)
             
             if not ohlcv or not self.is_running:
                 raise ValueError(f"Empty OHLCV data returned for {symbol} {timeframe}")
             
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'Open', 'High', 'Low', 'Close', 'Volume'])
-            df_with_ind = self.calculate_indicators(df)
+            df_with_ind = self.update_indicators(symbol, timeframe, ohlcv)
             
             # Update Analysis Object
             analysis = await AnalysisManager.get_analysis(symbol)
             await analysis.update_section("market_data", df_with_ind, timeframe)
 
-            columns = df_with_ind.columns.tolist()
-            values = df_with_ind.replace({np.nan: None}).values.tolist()
-            
-            data = {
-                "symbol": symbol,
-                "timeframe": timeframe,
-                "timestamp": df_with_ind['timestamp'].iloc[-1],
-                "latest_close": float(df_with_ind['Close'].iloc[-1]),
-                "agent": self.name,
-                "from_cache": False,
-                "candles": len(df)
-            }
+            data = MarketDataPayload(
+                symbol=symbol,
+                timeframe=timeframe,
+                timestamp=df_with_ind['timestamp'].iloc[-1],
+                latest_close=float(df_with_ind['Close'].iloc[-1]),
+                agent=self.name,
+                from_cache=False,
+                delta_fetch=is_delta,
+                candles=len(df_with_ind)
+            )
             
             await self.log_market_action("FETCH_DATA_LIVE", symbol, {"timeframe": timeframe})
             await event_bus.publish(EventType.MARKET_DATA, data)
@@ -581,12 +624,14 @@ class MarketDataAgent(BaseAgent):
             # Or persist everything?
             # `persist_candles` currently only handles OHLCV logic. 
             # I will keep persisting only OHLCV to maintain schema compatibility.
-            self.persist_candles(symbol, timeframe, ohlcv)
+            # Off the event loop so DB writes don't stall other fetches
+            await asyncio.to_thread(self.persist_candles, symbol, timeframe, ohlcv)
             
             # Success - reset retry counter
             if retry_key in self.retry_tracker:
                 logger.info(f"Successfully fetched {symbol} {timeframe} after {retry_count + 1} attempts")
                 del self.retry_tracker[retry_key]
+            return data
             
         except Exception as e:
             # During shutdown, some exchange methods might fail with attribute errors
@@ -612,7 +657,7 @@ class MarketDataAgent(BaseAgent):
                 await asyncio.sleep(delay)
                 
                 # Retry the fetch
-                await self.fetch_and_publish(symbol, timeframe)
+                return await self.fetch_and_publish(symbol, timeframe, use_cache=use_cache)
             else:
                 # Max retries exceeded
                 logger.error(
@@ -631,33 +676,90 @@ class MarketDataAgent(BaseAgent):
                     "retry_count": retry_count + 1
                 })
 
+    async def fetch_candles(self, symbol: str, timeframe: str) -> Tuple[List, bool]:
+        """
+        Fetches OHLCV from the exchange. Once the indicator engine holds a full history, only the
+        candles since its newest (forming) candle are requested (since the candle before it when
+        the stream opened the newest one); the engine replaces that candle and appends the rest. Falls back to the full window when the delta can't be stitched on
+        (empty response, forming candle missing, or more new candles than one request returns).
+        Returns (ohlcv, is_delta).
+        """
+        key = (symbol, timeframe)
+        engine = self.indicator_engines.get(key)
+        since = engine.last_timestamp if self.delta_fetch and engine is not None and engine.is_seeded else None
+        if since is not None and key in self.stream_opened:
+            # The stream already opened the newest candle; start at the one it closed
+            since = engine.previous_timestamp or since
+        if since is not None:
+            delta = await self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=self.fetch_limit)
+            if delta and len(delta) < self.fetch_limit and any(int(row[0]) == since for row in delta):
+                self.stream_opened.discard(key)
+                return delta, True
+            logger.debug(f"Delta fetch for {symbol} {timeframe} since {since} did not line up, fetching full window")
+
+        # Task 4: Fetch at least 200 candles (300 for safety and indicator warm-up)
+        self.stream_opened.discard(key)
+        return await self.exchange.fetch_ohlcv(symbol, timeframe, limit=self.fetch_limit), False
+
     async def handle_data_request(self, data: Dict[str, Any]):
-        """Handle on-demand data requests from other agents (Task 5)"""
+        """
+        Handle on-demand data requests from other agents (Task 5). Concurrent requests for the
+        same symbol and timeframe share one fetch. Requests sent with `event_bus.request` get
+        the published MARKET_DATA payload as reply (None if the fetch failed).
+        """
         if not self.is_active:
             return
-            
+        
         symbol = data.get('symbol')
         timeframe = data.get('timeframe', self.timeframe)
         requester = data.get('requester', 'Unknown')
         
-        if symbol:
-            logger.info(f"Received data request from {requester} for {symbol} {timeframe}")
-            await self.fetch_and_publish(symbol, timeframe)
+        if not symbol:
+            await event_bus.reply(data, error="symbol is required", agent=self.name)
+            return
 
-    def get_cached_data(self, symbol: str, timeframe: str) -> List:
-        """Retrieve cached candles from database (Task 5)"""
+        key = (symbol, timeframe)
+        fetch = self.inflight_requests.get(key)
+        if fetch is None:
+            logger.info(f"Received data request from {requester} for {symbol} {timeframe}")
+            fetch = asyncio.create_task(self.fetch_and_publish(symbol, timeframe))
+            self.inflight_requests[key] = fetch
+            fetch.add_done_callback(lambda _: self.inflight_requests.pop(key, None))
+        else:
+            logger.info(f"Data request from {requester} for {symbol} {timeframe} joins the fetch in progress")
+
+        # Replies wait for the fetch in their own task so the inbox keeps taking requests
+        if data.get('correlation_id') is not None:
+            task = asyncio.create_task(self._reply_when_fetched(data, fetch))
+            self.reply_tasks.add(task)
+            task.add_done_callback(self.reply_tasks.discard)
+
+    async def _reply_when_fetched(self, request: Dict[str, Any], fetch: asyncio.Task):
+        try:
+            result = await asyncio.shield(fetch)
+        except Exception as e:
+            await event_bus.reply(request, error=e, agent=self.name)
+            return
+        await event_bus.reply(request, result=result, agent=self.name)
+
+    def get_cached_data(self, symbol: str, timeframe: str, limit: int = 300) -> List:
+        """
+        Retrieve the latest `limit` cached candles from database (Task 5), oldest first.
+        Walks the (symbol, timeframe, timestamp) index backwards and selects plain columns,
+        so no ORM objects are built.
+        """
         try:
             with SessionLocal() as db:
-                candles = db.query(CandleModel).filter(
+                rows = db.query(
+                    CandleModel.timestamp, CandleModel.open, CandleModel.high,
+                    CandleModel.low, CandleModel.close, CandleModel.volume
+                ).filter(
                     CandleModel.symbol == symbol,
                     CandleModel.timeframe == timeframe
-                ).order_by(CandleModel.timestamp.asc()).limit(300).all()
-                
-                if candles:
-                    return [[
-                        int(c.timestamp.timestamp() * 1000),
-                        c.open, c.high, c.low, c.close, c.volume
-                    ] for c in candles]
+                ).order_by(CandleModel.timestamp.desc()).limit(limit).all()
+
+                if rows:
+                    return [[int(ts.timestamp() * 1000), o, h, l, c, v] for ts, o, h, l, c, v in reversed(rows)]
                 return None
         except Exception as e:
             logger.error(f"Cache read error: {e}")
@@ -668,17 +770,9 @@ class MarketDataAgent(BaseAgent):
         if not cached_data:
             return False
         
-        last_candle_time = cached_data[-1][0]  # timestamp in ms
-        current_time = datetime.now().timestamp() * 1000
-        
-        # Get timeframe duration in ms
-        tf_minutes = self._timeframe_to_minutes(timeframe)
-        tf_ms = tf_minutes * 60 * 1000
-        
-        # Check if last candle is the current one
-        # If time_diff < tf_ms, it means we are still in the same candle window (approx)
-        time_diff = current_time - last_candle_time
-        return time_diff < tf_ms
+        last_candle_time = int(cached_data[-1][0])  # timestamp in ms
+        # The last candle is the current one until it closes (calendar months included)
+        return self._now_ms() < self.next_candle_close(timeframe, last_candle_time)
 
     def _timeframe_to_minutes(self, timeframe: str) -> int:
         """Convert timeframe string to minutes"""
@@ -697,36 +791,83 @@ class MarketDataAgent(BaseAgent):
 
     def persist_candles(self, symbol: str, timeframe: str, candles: List):
         """Persist candles to database cache (Task 5)"""
+        if not candles:
+            return
         try:
             with SessionLocal() as db:
-                for c in candles:
-                    # c is raw OHLCV list: [ts, o, h, l, c, v]
-                    ts = datetime.fromtimestamp(c[0] / 1000.0)
-                    
-                    # Optimization: only check last? or merge?
-                    # For now keep naive merge loop
-                    existing = db.query(CandleModel).filter(
+                key = (symbol, timeframe)
+                if key not in self.last_persisted:
+                    self.last_persisted[key] = db.query(func.max(CandleModel.timestamp)).filter(
                         CandleModel.symbol == symbol,
-                        CandleModel.timestamp == ts,
                         CandleModel.timeframe == timeframe
-                    ).first()
-                    
-                    if not existing:
-                        candle = CandleModel(
-                            symbol=symbol,
-                            timeframe=timeframe,
-                            timestamp=ts,
-                            open=c[1],
-                            high=c[2],
-                            low=c[3],
-                            close=c[4],
-                            volume=c[5]
-                        )
-                        db.add(candle)
+                    ).scalar()
+                last_ts = self.last_persisted[key]
+
+                # c is raw OHLCV list: [ts, o, h, l, c, v]. The last persisted candle is re-sent
+                # because it may have been stored while still forming.
+                rows = []
+                for c in candles:
+                    ts = datetime.fromtimestamp(c[0] / 1000.0)
+                    if last_ts is None or ts >= last_ts:
+                        rows.append({
+                            "symbol": symbol, "timeframe": timeframe, "timestamp": ts,
+                            "open": c[1], "high": c[2], "low": c[3], "close": c[4], "volume": c[5]
+                        })
+                if not rows:
+                    return
+
+                dialect = db.get_bind().dialect.name
+                if self.bulk_upsert and dialect in ("sqlite", "postgresql") and self._ensure_candle_index(db):
+                    self._upsert_candles(db, dialect, rows)
+                else:
+                    self._merge_candles(db, rows)
                 db.commit()
+                self.last_persisted[key] = max(r["timestamp"] for r in rows)
         except Exception as e:
              logger.error(f"Error persisting candles: {e}")
 
+    def _ensure_candle_index(self, db) -> bool:
+        """Creates the unique candle index on databases created before it existed (checked once)."""
+        if self._candle_index_ready is None:
+            try:
+                for index in CandleModel.__table__.indexes:
+                    if index.unique:
+                        index.create(bind=db.connection(), checkfirst=True)
+                self._candle_index_ready = True
+            except Exception as e:
+                logger.warning(f"Unique candle index unavailable, using per-row persistence: {e}")
+                self._candle_index_ready = False
+        return self._candle_index_ready
+
+    def _upsert_candles(self, db, dialect: str, rows: List[Dict[str, Any]]):
+        """INSERT ... ON CONFLICT per UPSERT_CHUNK_ROWS candles; existing candles get their OHLCV refreshed."""
+        insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+        for start in range(0, len(rows), UPSERT_CHUNK_ROWS):
+            stmt = insert(CandleModel).values(rows[start:start + UPSERT_CHUNK_ROWS])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["symbol", "timeframe", "timestamp"],
+                set_={col: stmt.excluded[col] for col in ("open", "high", "low", "close", "volume")}
+            )
+            db.execute(stmt)
+
+    def _merge_candles(self, db, rows: List[Dict[str, Any]]):
+        """Fallback for other dialects: one lookup per candle, insert if missing."""
+        for row in rows:
+            existing = db.query(CandleModel).filter(
+                CandleModel.symbol == row["symbol"],
+                CandleModel.timestamp == row["timestamp"],
+                CandleModel.timeframe == row["timeframe"]
+            ).first()
+            if not existing:
+                db.add(CandleModel(**row))
+
     async def stop(self):
         await super().stop()
+        for task in self.stream_tasks.values():
+            task.cancel()
+        self.stream_tasks.clear()
+        for task in [*self.inflight_requests.values(), *self.reply_tasks]:
+            task.cancel()
+        if self.stream_exchange is not None:
+            await self.stream_exchange.close()
         await self.exchange.close()
@@ -57,15 +57,12 @@ class RegimeDetectionAgent(BaseAgent):
         self.overall_chain = self.overall_prompt | self.llm | JsonOutputParser()
 
     async def run_loop(self):
-        """Triggered by ANALYSIS_UPDATE from MarketStructureAgent"""
-        event_bus.subscribe(EventType.ANALYSIS_UPDATE, self.handle_analysis_update)
+        """Triggered by market_structure updates (MarketStructureAgent)"""
+        AnalysisManager.watch("market_structure", self.handle_analysis_update)
         while self.is_running:
             await asyncio.sleep(1)
 
     async def handle_analysis_update(self, data: Dict[str, Any]):
-        if data.get("section") != "market_structure":
-            return
-        
         symbol = data.get("symbol")
         timeframe = data.get("timeframe")
         logger.info(f"RegimeDetectionAgent: Triggered for {symbol} {timeframe}")
@@ -3,6 +3,7 @@ import pandas as pd
 import pandas_ta as ta
 from app.agents.base_agent import BaseAgent
 from app.core.event_bus import event_bus, EventType
+from app.core.event_payloads import OrderRequestPayload
 from app.core.config import settings
 from app.core.analysis import AnalysisManager
 import logging
@@ -147,18 +148,18 @@ class RiskAgent(BaseAgent):
                 logger.warning(f"Risk Rejected: Insufficient balance {free_usdt} for size {trade_size_usdt}")
                 return
 
-            order_request = {
-                "symbol": data.get("symbol"),
-                "side": "buy" if data.get("signal") == "BUY" else "sell",
-                "type": "market",
-                "amount": float(trade_size_usdt / signal_price),
-                "price": signal_price,
-                "sl_price": sl_price,
-                "tp_price": tp_price,
-                "confidence": confidence,
-                "rationale": f"{data.get('rationale')} | Conf: {confidence:.2f} | Size: {trade_size_usdt:.2f} USDT",
-                "agent": self.name
-            }
+            order_request = OrderRequestPayload(
+                symbol=data.get("symbol"),
+                side="buy" if data.get("signal") == "BUY" else "sell",
+                type="market",
+                amount=float(trade_size_usdt / signal_price),
+                price=signal_price,
+                sl_price=sl_price,
+                tp_price=tp_price,
+                confidence=confidence,
+                rationale=f"{data.get('rationale')} | Conf: {confidence:.2f} | Size: {trade_size_usdt:.2f} USDT",
+                agent=self.name
+            )
         except Exception as e:
             logger.error(f"Error calculating risk: {e}", exc_info=True)
             return
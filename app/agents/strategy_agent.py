@@ -2,6 +2,7 @@ import pandas as pd
 import pandas_ta as ta
 from app.agents.base_agent import BaseAgent
 from app.core.event_bus import event_bus, EventType
+from app.core.event_payloads import StrategySignalPayload
 from app.core.analysis import AnalysisManager
 import logging
 import asyncio
@@ -95,14 +96,14 @@ class StrategyAgent(BaseAgent):
 
         if signal != "HOLD":
             logger.info(f"[{self.strategy_id}] Generated Signal: {signal} | Confidence: {confidence}")
-            await event_bus.publish(EventType.STRATEGY_SIGNAL, {
-                "strategy_id": self.strategy_id,
-                "symbol": data.get("symbol"),
-                "signal": signal,
-                "confidence": confidence,
-                "rationale": rationale,
-                "price": data.get("latest_close"),
-                "timestamp": timestamp
-            })
+            await event_bus.publish(EventType.STRATEGY_SIGNAL, StrategySignalPayload(
+                strategy_id=self.strategy_id,
+                symbol=data.get("symbol"),
+                signal=signal,
+                confidence=confidence,
+                rationale=rationale,
+                price=data.get("latest_close"),
+                timestamp=timestamp
+            ))
 
 import asyncio # Needs to be imported for run_loop's sleep
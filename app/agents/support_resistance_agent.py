@@ -5,7 +5,6 @@ import time
 import logging
 from typing import Dict, Any, List
 from app.agents.base_agent import BaseAgent
-from app.core.event_bus import event_bus, EventType
 from app.core.analysis import AnalysisManager
 
 logger = logging.getLogger("SupportResistanceAgent")
@@ -16,8 +15,9 @@ class SupportResistanceAgent(BaseAgent):
         self.last_processed = {} # {symbol_tf: timestamp}
 
     async def run_loop(self):
-        # Listen for analysis updates from MarketStructure and ValueAreas
-        event_bus.subscribe(EventType.ANALYSIS_UPDATE, self.handle_analysis_update)
+        # Levels combine market structure and value areas, so either update triggers a pass
+        AnalysisManager.watch("market_structure", self.handle_analysis_update)
+        AnalysisManager.watch("value_areas", self.handle_analysis_update)
         while self.is_running:
             await asyncio.sleep(1)
 
@@ -7,6 +7,7 @@ from typing import Dict, Any, List, Optional
 from app.agents.base_agent import BaseAgent
 from app.core.event_bus import event_bus, EventType
 from app.core.analysis import AnalysisManager
+from app.core.config import settings
 
 logger = logging.getLogger("ValueAreasAgent")
 
@@ -16,6 +17,7 @@ class ValueAreasAgent(BaseAgent):
         self.last_timestamps = {} # {symbol_tf: timestamp}
         self.states = {} # {symbol_tf: state}
         self.poc_history = {} # {symbol_tf: [pocs]} for naked poc tracking
+        self.distribution = settings.VALUE_AREA_DISTRIBUTION
         
         # New prompts for internal/external analysis reference
         self.value_areas_prompt = """
@@ -60,7 +62,7 @@ class ValueAreasAgent(BaseAgent):
 
             # Calculate Value Areas with course-specific granularity (188 rows)
             # Value Area Volume is usually 68-70%, we use 68 as per memo.md
-            calc_result = self.calculate_value_areas(df, num_bins=188, va_pct=0.68)
+            calc_result = self.calculate_value_areas(df, num_bins=188, va_pct=0.68, distribution=self.distribution)
             
             if not calc_result:
                 return
@@ -73,8 +75,9 @@ class ValueAreasAgent(BaseAgent):
                 "last_updated": calc_result['last_updated']
             }
             
+            profile = calc_result["volume_profile"]
             vpvr_data = {
-                "data": calc_result.get("volume_profile", []),
+                "data": [{"price": p, "volume": v} for p, v in zip(profile["price"].tolist(), profile["volume"].tolist())],
                 "last_updated": calc_result['last_updated']
             }
 
@@ -220,7 +223,7 @@ class ValueAreasAgent(BaseAgent):
                 if len(group) < 1:
                     continue
                 # Calculate POC for this specific group
-                group_res = self.calculate_value_areas(group, num_bins=100, lookback=len(group))
+                group_res = self.calculate_value_areas(group, num_bins=100, lookback=len(group), distribution=self.distribution)
                 if group_res:
                     pocs.append(group_res['poc'])
             return pocs
@@ -238,7 +241,14 @@ class ValueAreasAgent(BaseAgent):
         
         return (min(above) if above else None), (max(below) if below else None)
 
-    def calculate_value_areas(self, df: pd.DataFrame, num_bins: int = 188, va_pct: float = 0.68, lookback: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    def calculate_value_areas(self, df: pd.DataFrame, num_bins: int = 188, va_pct: float = 0.68, lookback: Optional[int] = None,
+                              distribution: str = "uniform") -> Optional[Dict[str, Any]]:
+        """
+        Volume profile of the last `lookback` candles over `num_bins` price bins, with its POC and
+        value area. `volume_profile` holds the bin centers and volumes as arrays ("price", "volume").
+        distribution="uniform" gives every bin a candle's range touches an equal share of its volume,
+        "tick" gives each bin the share of the range (in price ticks) that falls inside it.
+        """
         try:
             if lookback is None:
                 lookback = 100
@@ -246,53 +256,62 @@ class ValueAreasAgent(BaseAgent):
             actual_lookback = min(lookback, len(df))
             subset = df.iloc[-actual_lookback:]
             
-            prices = subset['Close'].values
-            volumes = subset['Volume'].values
-            highs = subset['High'].values
-            lows = subset['Low'].values
+            volumes = subset['Volume'].to_numpy(dtype=np.float64)
+            highs = subset['High'].to_numpy(dtype=np.float64)
+            lows = subset['Low'].to_numpy(dtype=np.float64)
 
             min_p = np.min(lows)
             max_p = np.max(highs)
             
-            if max_p == min_p: return None
+            if not (np.isfinite(min_p) and np.isfinite(max_p)) or max_p == min_p: return None
 
             bin_size = (max_p - min_p) / num_bins
             bins = np.linspace(min_p, max_p, num_bins + 1)
-            profile = np.zeros(num_bins)
-
-            # Distribute volume across bins hit by the candle range
-            for i in range(len(subset)):
-                h, l, v = highs[i], lows[i], volumes[i]
-                # Identify which bins the candle covers
-                start_bin = int((l - min_p) / bin_size)
-                end_bin = int((h - min_p) / bin_size)
-                
-                # Boundary checks
-                start_bin = max(0, min(num_bins - 1, start_bin))
-                end_bin = max(0, min(num_bins - 1, end_bin))
-                
-                num_bins_covered = (end_bin - start_bin) + 1
-                vol_per_bin = v / num_bins_covered
-                
-                for b in range(start_bin, end_bin + 1):
-                    profile[b] += vol_per_bin
+
+            # Bins covered by each candle range
+            start_bin = np.clip(((lows - min_p) / bin_size).astype(np.int64), 0, num_bins - 1)
+            end_bin = np.clip(((highs - min_p) / bin_size).astype(np.int64), 0, num_bins - 1)
+
+            # Range spreading with difference arrays: +w at the first bin, -w after the last, cumsum
+            if distribution == "tick":
+                ranges = highs - lows
+                density = np.divide(volumes, ranges, out=np.zeros_like(volumes), where=ranges > 0)
+                spans = end_bin > start_bin
+                inner = np.where(end_bin > start_bin + 1, density * bin_size, 0.0)
+                diff = np.bincount(start_bin + 1, weights=inner, minlength=num_bins + 1)
+                diff -= np.bincount(end_bin, weights=inner, minlength=num_bins + 1)
+                profile = np.cumsum(diff[:num_bins])
+                # Partial first and last bins; a candle inside one bin puts all its volume there
+                first = np.where(spans, density * np.maximum(bins[start_bin + 1] - lows, 0.0), volumes)
+                last = np.where(spans, density * np.maximum(highs - bins[end_bin], 0.0), 0.0)
+                profile += np.bincount(start_bin, weights=first, minlength=num_bins)
+                profile += np.bincount(end_bin, weights=last, minlength=num_bins)
+            else:
+                share = volumes / (end_bin - start_bin + 1)
+                diff = np.bincount(start_bin, weights=share, minlength=num_bins + 1)
+                diff -= np.bincount(end_bin + 1, weights=share, minlength=num_bins + 1)
+                profile = np.cumsum(diff[:num_bins])
+
+            # Bins no candle reaches are exactly empty (the cumsum leaves rounding residue there)
+            coverage = np.cumsum(np.bincount(start_bin, minlength=num_bins + 1) - np.bincount(end_bin + 1, minlength=num_bins + 1))
+            profile[coverage[:num_bins] == 0] = 0.0
 
             # POC
-            poc_index = np.argmax(profile)
+            poc_index = int(np.argmax(profile))
             poc = float(bins[poc_index] + bin_size / 2)
 
             # Value Area (68% Volume as per memo.md)
-            total_vol = np.sum(profile)
-            target_vol = total_vol * va_pct
+            levels = profile.tolist()
+            target_vol = sum(levels) * va_pct
             
             va_low_idx = poc_index
             va_high_idx = poc_index
-            current_vol = profile[poc_index]
+            current_vol = levels[poc_index]
 
             while current_vol < target_vol:
                 # Check neighbors
-                low_vol = profile[va_low_idx - 1] if va_low_idx > 0 else 0
-                high_vol = profile[va_high_idx + 1] if va_high_idx < num_bins - 1 else 0
+                low_vol = levels[va_low_idx - 1] if va_low_idx > 0 else 0
+                high_vol = levels[va_high_idx + 1] if va_high_idx < num_bins - 1 else 0
                 
                 if low_vol == 0 and high_vol == 0:
                     break
@@ -311,10 +330,7 @@ class ValueAreasAgent(BaseAgent):
                 "poc": poc,
                 "vah": vah,
                 "val": val,
-                "volume_profile": [
-                    {"price": float(bins[i] + bin_size/2), "volume": float(profile[i])} 
-                    for i in range(num_bins)
-                ],
+                "volume_profile": {"price": bins[:-1] + bin_size / 2, "volume": profile},
                 "last_updated": int(asyncio.get_event_loop().time())
             }
         except Exception as e:
@@ -338,7 +354,7 @@ class ValueAreasAgent(BaseAgent):
             idx = len(df) - i
             if idx < 50: break
             # Each 'POC' here is a localized POC
-            res = self.calculate_value_areas(df.iloc[:idx], lookback=30)
+            res = self.calculate_value_areas(df.iloc[:idx], lookback=30, distribution=self.distribution)
             if res:
                 pocs.append(res['poc'])
         
@@ -1,15 +1,173 @@
 import asyncio
+import itertools
+import os
+import pickle
+import re
+import sys
 import time
-from typing import Dict, Any, Optional, List
+import uuid
+import weakref
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Callable, Dict, Any, Iterable, Optional, List, Tuple
 from datetime import datetime
 import logging
+import numpy as np
+import pandas as pd
+from app.core.config import settings
+from app.core.event_bus import (BackpressurePolicy, Event, EventType, InboxPolicy, RouteTable,
+                                SubscriberInbox, TopicFilter, event_bus)
 
 logger = logging.getLogger("Analysis")
 
+# market_data storage layout. Prices and price-valued indicators (Heikin Ashi, EMAs, levels)
+# stay float64 (agents compare them with prices); every other float column (oscillators,
+# volumes derived from indicators) is stored as float32, phases/directions as int8 codes and
+# text columns (Relative Candles Mode) as categoricals.
+PRICE_COLUMNS = frozenset({
+    'Open', 'High', 'Low', 'Close', 'Volume', 'Relative Candles Open', 'Relative Candles Close',
+    'Heikin Ashi Open', 'Heikin Ashi High', 'Heikin Ashi Low', 'Heikin Ashi Close',
+    'Pivot Points', 'Closest Support', 'Closest Resistance',
+})
+PRICE_COLUMN_PREFIXES = ('Williams Fractals', 'Exponential Moving Average')
+CODE_COLUMNS = frozenset({'Relative Candles Phase', 'Weis Waves Direction'})
+
+def _int8_codes(values: pd.Series) -> Optional[np.ndarray]:
+    """The column as int8 when every value is a small integer (-1/0/1 style), else None"""
+    values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    if not np.isfinite(values).all() or (np.abs(values) > 127).any() or (values != np.round(values)).any():
+        return None
+    return values.astype(np.int8)
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """The market_data frame in its stored, compact layout (see PRICE_COLUMNS)"""
+    narrow, codes, categorical = [], {}, []
+    for name, dtype in df.dtypes.items():
+        if name in CODE_COLUMNS and pd.api.types.is_numeric_dtype(dtype) and dtype != np.int8:
+            coded = _int8_codes(df[name])
+            if coded is not None:
+                codes[name] = coded
+                continue
+        if dtype == np.float64:
+            if name not in PRICE_COLUMNS and not str(name).startswith(PRICE_COLUMN_PREFIXES):
+                narrow.append(name)
+        elif dtype == object or pd.api.types.is_string_dtype(dtype):
+            try:
+                # All-null columns (no S/R level yet) keep their dtype
+                if df[name].notna().any() and df[name].nunique(dropna=True) <= 64:
+                    categorical.append(name)
+            except TypeError:  # unhashable cells (lists)
+                continue
+    if not narrow and not codes and not categorical:
+        return df
+    # One float32 block for all narrowed columns; converting column by column is several times slower
+    rest = df.drop(columns=narrow)
+    for name, coded in codes.items():
+        rest[name] = coded
+    for name in categorical:
+        rest[name] = pd.Categorical(rest[name])
+    if not narrow:
+        return rest
+    floats = pd.DataFrame(df[narrow].to_numpy(np.float32), index=df.index, columns=narrow)
+    return pd.concat([rest, floats], axis=1)[list(df.columns)]
+
+
+def _estimate_bytes(value: Any) -> int:
+    """Approximate memory held by a section value (DataFrames and arrays by their buffers)"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_estimate_bytes(k) + _estimate_bytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_estimate_bytes(item) for item in value)
+    return sys.getsizeof(value)
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _dump(path: str, value: Any):
+    with open(path, "wb") as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+class SpilledSection:
+    """
+    Stands in for a section written to disk. The next read through `get_data` or update of the
+    section loads it back (off the event loop) and keeps it in memory. The file is removed once
+    no version refers to it.
+    """
+    __slots__ = ('path', 'nbytes', '__weakref__')
+
+    def __init__(self, path: str, nbytes: int):
+        self.path = path
+        self.nbytes = nbytes
+        weakref.finalize(self, _remove_file, path)
+
+    def load(self) -> Any:
+        with open(self.path, "rb") as f:
+            return pickle.load(f)
+
+    def __repr__(self):
+        return f"<spilled section, {self.nbytes} bytes>"
+
+def _read_only(value: Any) -> Any:
+    if isinstance(value, SpilledSection):
+        value = value.load()
+    if isinstance(value, dict):
+        return ReadOnlyView(value)
+    if isinstance(value, list):
+        return tuple(_read_only(item) for item in value)
+    if isinstance(value, pd.DataFrame):
+        # Lazy copy (pandas copy-on-write): shares the data until either side modifies it
+        return value.copy(deep=False)
+    return value
+
+class ReadOnlyView(Mapping):
+    """
+    Read-only view of an analysis snapshot. Nested dicts come back as views, lists as tuples
+    and DataFrames as lazy copies, so a reader adding columns to a frame only changes its own
+    copy. Prints like the underlying dict.
+    """
+    __slots__ = ('_data',)
+
+    def __init__(self, data: Dict[str, Any]):
+        self._data = data
+
+    def __getitem__(self, key):
+        return _read_only(self._data[key])
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self):
+        return repr(self._data)
+
 class AnalysisObject:
     """
     Symbol-scoped Analysis Object acting as the single source of truth.
-    Thread-safe and conforms to app/models/analysis.json schema.
+    Conforms to app/models/analysis.json schema.
+
+    Copy-on-write: `update_section` never modifies the current `data` in place. It builds the
+    next version (copying only the touched section and timeframe entry) and swaps it in, so
+    readers take read-only snapshots without a lock and a snapshot never changes.
+
+    Each (section, timeframe) is versioned separately, and every update notifies the watchers
+    of that section (`AnalysisManager.watch`). Building and swapping in the next version doesn't
+    await, so concurrent writers can't lose each other's updates and need no lock.
+
+    Sections that haven't been updated for a while can be spilled to disk (`spill`) and
+    `memory_usage` estimates what each section holds; AnalysisManager uses both to stay
+    within its memory budget.
     """
     def __init__(self, symbol: str):
         self.symbol = symbol
@@ -60,8 +218,14 @@ class AnalysisObject:
                 "last_updated": None
             }
         }
-        self._lock = asyncio.Lock()
         self._last_updated = time.time()
+        self.version = 0
+        self.versions: Dict[Tuple[str, Optional[str]], int] = {}  # {(section, timeframe): updates}
+        self.created = self.last_access = time.monotonic()
+        self.section_updated: Dict[str, float] = {}  # {section: monotonic time of its last update}
+        self._section_versions: Dict[str, int] = {}
+        self._sizes: Dict[str, Tuple[int, int]] = {}  # {section: (section version, estimated bytes)}
+        self._snapshot: Optional[ReadOnlyView] = None
 
     def _default_market_structure(self):
         return {
@@ -97,59 +261,285 @@ class AnalysisObject:
         Incrementally update a section of the analysis object.
         Agents only mutate their owned sections.
         """
-        async with self._lock:
-            if section not in self.data:
-                self.data[section] = {}
-            
-            target = self.data[section]
-            
-            if timeframe:
-                # Special handling for market_data which stores DataFrames directly
-                if section == "market_data":
-                    target[timeframe] = updates
-                else:
-                    if timeframe not in target or target[timeframe] is None:
-                        target[timeframe] = {}
-                    
-                    if isinstance(target[timeframe], dict) and isinstance(updates, dict):
-                        target[timeframe].update(updates)
-                    else:
-                        target[timeframe] = updates
+        key = (section, timeframe or None)
+        await self._restore(section)
+        # Next version: unchanged sections are shared, the touched ones are copied
+        data = dict(self.data)
+        target = data.get(section, {})
+        if isinstance(target, dict):
+            target = dict(target)
+        data[section] = target
+        now = datetime.now().isoformat()
+        
+        if timeframe:
+            # Special handling for market_data which stores DataFrames directly (compacted)
+            if section == "market_data":
+                target[timeframe] = compact_frame(updates) if isinstance(updates, pd.DataFrame) else updates
             else:
-                if isinstance(target, dict) and isinstance(updates, dict):
-                    target.update(updates)
+                current = target.get(timeframe)
+                if current is None:
+                    current = {}
+                
+                if isinstance(current, dict) and isinstance(updates, dict):
+                    target[timeframe] = {**current, **updates}
                 else:
-                    self.data[section] = updates
-            
-            self._last_updated = time.time()
-            self.data["analysis_state"] = "IN_PROGRESS"
-            
-            # Update specific timestamps if applicable
-            # We check the actual data structure to safely update last_updated
-            if isinstance(target, dict) and "last_updated" in target:
-                target["last_updated"] = datetime.now().isoformat()
-            
-            if timeframe and isinstance(target, dict):
-                tf_data = target.get(timeframe)
-                if isinstance(tf_data, dict) and "last_updated" in tf_data:
-                    tf_data["last_updated"] = datetime.now().isoformat()
-
-    async def get_data(self) -> Dict[str, Any]:
-        """Return a copy of the data"""
-        async with self._lock:
-            return self.data.copy()
+                    target[timeframe] = updates
+        else:
+            if isinstance(target, dict) and isinstance(updates, dict):
+                target.update(updates)
+            else:
+                data[section] = updates
+        
+        data["analysis_state"] = "IN_PROGRESS"
+        
+        # Update specific timestamps if applicable
+        # We check the actual data structure to safely update last_updated
+        if data[section] is target and isinstance(target, dict) and "last_updated" in target:
+            target["last_updated"] = now
+        
+        if timeframe and isinstance(target, dict):
+            tf_data = target.get(timeframe)
+            if isinstance(tf_data, dict) and "last_updated" in tf_data:
+                tf_data["last_updated"] = now
+
+        # From the copy to the swap nothing awaits, so no other writer can interleave
+        self.data = data
+        self.version += 1
+        self.versions[key] = version = self.versions.get(key, 0) + 1
+        self._section_versions[section] = self._section_versions.get(section, 0) + 1
+        self.section_updated[section] = time.monotonic()
+        self._snapshot = None
+        self._last_updated = time.time()
+
+        value = target.get(timeframe) if timeframe and isinstance(target, dict) else data[section]
+        AnalysisManager.notify({"symbol": self.symbol, "section": section, "timeframe": key[1], "version": version},
+                               value)
+
+    def get_version(self, section: str, timeframe: Optional[str] = None) -> int:
+        """Number of updates of a section (or one timeframe of it) so far"""
+        return self.versions.get((section, timeframe), 0)
+
+    def get_section(self, section: str, timeframe: Optional[str] = None) -> Any:
+        """Read-only current value of a section, or of one timeframe of it"""
+        value = self.snapshot().get(section)
+        if timeframe is not None:
+            return value.get(timeframe) if isinstance(value, Mapping) else None
+        return value
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Estimated bytes each section holds in memory (cached until the section changes)"""
+        usage = {}
+        for section, value in self.data.items():
+            version = self._section_versions.get(section, 0)
+            cached = self._sizes.get(section)
+            if cached is None or cached[0] != version:
+                cached = self._sizes[section] = (version, _estimate_bytes(value))
+            usage[section] = cached[1]
+        return usage
+
+    def spilled_usage(self) -> Dict[str, int]:
+        """Bytes of each section currently on disk"""
+        return {section: value.nbytes for section, value in self.data.items() if isinstance(value, SpilledSection)}
+
+    async def spill(self, directory: str, idle_seconds: float, min_bytes: int = 64 * 1024) -> int:
+        """
+        Writes the sections not updated for `idle_seconds` (and holding at least `min_bytes`)
+        to `directory`. Returns the estimated bytes released.
+        """
+        now = time.monotonic()
+        usage = self.memory_usage()
+        name = re.sub(r'[^A-Za-z0-9]+', '_', self.symbol)
+        released = 0
+        for section, value in list(self.data.items()):
+            if not isinstance(value, dict) or usage.get(section, 0) < min_bytes:
+                continue
+            if now - self.section_updated.get(section, self.created) < idle_seconds:
+                continue
+            path = os.path.join(directory, f"{name}-{section}-{uuid.uuid4().hex}.pkl")
+            await asyncio.to_thread(_dump, path, value)
+            if self.data.get(section) is not value:
+                _remove_file(path)  # updated while it was being written
+                continue
+            self.data = {**self.data, section: SpilledSection(path, usage[section])}
+            self._section_versions[section] = self._section_versions.get(section, 0) + 1
+            self._snapshot = None
+            released += usage[section]
+        if released:
+            logger.info(f"Spilled {released} bytes of {self.symbol} analysis to {directory}")
+        return released
+
+    async def _restore(self, section: str):
+        """Loads a spilled section back into memory (in a thread) and keeps it there"""
+        spilled = self.data.get(section)
+        if not isinstance(spilled, SpilledSection):
+            return
+        value = await asyncio.to_thread(spilled.load)
+        if self.data.get(section) is spilled:
+            self.data = {**self.data, section: value}
+            self._section_versions[section] = self._section_versions.get(section, 0) + 1
+            self.section_updated[section] = time.monotonic()  # read back: not cold anymore
+            self._snapshot = None
+
+    def snapshot(self) -> ReadOnlyView:
+        """Read-only view of the current version"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self._snapshot = ReadOnlyView(self.data)
+        return snapshot
+
+    async def get_data(self) -> ReadOnlyView:
+        """Return a read-only snapshot of the data (doesn't wait for writers)"""
+        for section in list(self.spilled_usage()):
+            await self._restore(section)
+        return self.snapshot()
+
+# Watchers only need the latest state, so pending changes of one section/timeframe coalesce
+WATCH_POLICY = InboxPolicy(BackpressurePolicy.COALESCE, 1000, ('symbol', 'section', 'timeframe'))
 
 class AnalysisManager:
-    """Manages symbol-scoped AnalysisObjects"""
-    _instances: Dict[str, AnalysisObject] = {}
+    """
+    Manages symbol-scoped AnalysisObjects, in least recently used order. `enforce_budget`
+    (run periodically by the GovernorAgent) evicts idle symbols, spills cold sections and
+    evicts the least recently used inactive symbols while above the memory budget.
+    """
+    _instances: 'OrderedDict[str, AnalysisObject]' = OrderedDict()
     _lock = asyncio.Lock()
+    evicted = 0
+    _watchers: List[SubscriberInbox] = []
+    _routes = RouteTable([])
+    _watch_seq = itertools.count()
+
+    @classmethod
+    def watch(cls, section: str, callback: Callable[[Dict[str, Any]], None], timeframe=None,
+              symbol=None) -> SubscriberInbox:
+        """
+        Calls `callback(change)` after `section` of an AnalysisObject is updated, optionally
+        only for some timeframes and/or symbols (a value or a list). `change` has the symbol,
+        section, timeframe (None for section-wide updates), the (section, timeframe) version and
+        the read-only new `value`. Each watcher has its own inbox; a change still pending when
+        a newer one of the same section/timeframe arrives is replaced by it.
+        """
+        fields = {"section": section}
+        if timeframe is not None:
+            fields["timeframe"] = timeframe
+        if symbol is not None:
+            fields["symbol"] = symbol
+        inbox = SubscriberInbox(EventType.ANALYSIS_UPDATE, callback, WATCH_POLICY, TopicFilter(fields),
+                                next(cls._watch_seq), event_bus.metrics)
+        cls._watchers = [*cls._watchers, inbox]
+        cls._routes = RouteTable(cls._watchers)
+        logger.info(f"Watching analysis {inbox.topic.describe()}")
+        return inbox
+
+    @classmethod
+    def unwatch(cls, watcher: SubscriberInbox):
+        if watcher in cls._watchers:
+            watcher.close()
+            cls._watchers = [w for w in cls._watchers if w is not watcher]
+            cls._routes = RouteTable(cls._watchers)
+
+    @classmethod
+    def notify(cls, change: Dict[str, Any], value: Any):
+        if not cls._watchers:
+            return
+        for inbox in cls._routes.route(change):
+            # Own read-only view per watcher: DataFrames are copied lazily for each of them
+            inbox.deliver(Event(EventType.ANALYSIS_UPDATE, {**change, "value": _read_only(value)}))
+            event_bus.metrics.analysis_updates.inc(change["section"], inbox.name)
+
+    @classmethod
+    def get_watcher_stats(cls) -> List[Dict[str, Any]]:
+        return [inbox.get_stats() for inbox in cls._watchers]
 
     @classmethod
     async def get_analysis(cls, symbol: str) -> AnalysisObject:
         async with cls._lock:
-            if symbol not in cls._instances:
-                cls._instances[symbol] = AnalysisObject(symbol)
-            return cls._instances[symbol]
+            analysis = cls._instances.get(symbol)
+            if analysis is None:
+                analysis = cls._instances[symbol] = AnalysisObject(symbol)
+            else:
+                cls._instances.move_to_end(symbol)
+            analysis.last_access = time.monotonic()
+            return analysis
+
+    @classmethod
+    async def evict(cls, symbol: str) -> bool:
+        """Drops a symbol's analysis; it starts empty the next time an agent asks for it"""
+        async with cls._lock:
+            if cls._instances.pop(symbol, None) is None:
+                return False
+            cls.evicted += 1
+            return True
+
+    @classmethod
+    def memory_report(cls) -> Dict[str, Any]:
+        """Estimated bytes per symbol and section, plus what is spilled to disk"""
+        now = time.monotonic()
+        symbols = {}
+        for symbol, analysis in cls._instances.items():
+            sections = analysis.memory_usage()
+            spilled = analysis.spilled_usage()
+            symbols[symbol] = {
+                "bytes": sum(sections.values()),
+                "spilled_bytes": sum(spilled.values()),
+                "idle_seconds": round(now - analysis.last_access, 1),
+                "sections": sections,
+                "spilled": spilled,
+            }
+        return {
+            "budget_bytes": settings.ANALYSIS_MEMORY_BUDGET_MB * 1024 * 1024,
+            "total_bytes": sum(s["bytes"] for s in symbols.values()),
+            "spilled_bytes": sum(s["spilled_bytes"] for s in symbols.values()),
+            "evicted": cls.evicted,
+            "symbols": symbols,
+        }
+
+    @classmethod
+    async def enforce_budget(cls, budget_bytes: int = None, idle_seconds: float = None,
+                             spill_dir: str = None, spill_after: float = None,
+                             active: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        1. Evicts symbols not accessed for `idle_seconds`.
+        2. Spills sections not updated for `spill_after` seconds to `spill_dir` (if set).
+        3. Evicts the least recently used symbols outside `active` (default: every symbol is
+           active) while the total is above `budget_bytes`. Active symbols are never evicted
+           for the budget; if they alone exceed it, a warning is logged.
+        Defaults come from the ANALYSIS_* settings. Returns what was done.
+        """
+        budget_bytes = budget_bytes if budget_bytes is not None else settings.ANALYSIS_MEMORY_BUDGET_MB * 1024 * 1024
+        idle_seconds = idle_seconds if idle_seconds is not None else settings.ANALYSIS_IDLE_SECONDS
+        spill_dir = spill_dir if spill_dir is not None else settings.ANALYSIS_SPILL_DIR
+        spill_after = spill_after if spill_after is not None else settings.ANALYSIS_SPILL_AFTER_SECONDS
+        result = {"idle_evicted": 0, "spilled_bytes": 0, "lru_evicted": 0}
+
+        now = time.monotonic()
+        for symbol, analysis in list(cls._instances.items()):
+            if now - analysis.last_access > idle_seconds and await cls.evict(symbol):
+                result["idle_evicted"] += 1
+
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            for analysis in list(cls._instances.values()):
+                result["spilled_bytes"] += await analysis.spill(spill_dir, spill_after)
+
+        total = sum(sum(a.memory_usage().values()) for a in cls._instances.values())
+        active = set(cls._instances) if active is None else set(active)
+        for symbol, analysis in list(cls._instances.items()):
+            if total <= budget_bytes:
+                break
+            if symbol in active:
+                continue
+            size = sum(analysis.memory_usage().values())
+            if await cls.evict(symbol):
+                total -= size
+                result["lru_evicted"] += 1
+        if result["idle_evicted"] or result["lru_evicted"]:
+            logger.info(f"Analysis memory: evicted {result['idle_evicted']} idle and {result['lru_evicted']} "
+                        f"least recently used symbols, {total} bytes in use")
+        if total > budget_bytes:
+            logger.warning(f"Analysis memory: {total} bytes in use by active symbols, "
+                           f"above the {budget_bytes} bytes budget")
+        return result
 
     @classmethod
     async def get_all_symbols(cls) -> List[str]:
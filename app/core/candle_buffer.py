@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Optional, Union
+
+
+class CandleBuffer:
+    """
+    Fixed-capacity columnar candle buffer for one (symbol, timeframe), owned by an IndicatorEngine.
+
+    Each column (timestamp, OHLCV and any indicator column) is a NumPy array of 2 * capacity
+    slots. Rows are appended at the end; when the arrays are full the newest `capacity` rows
+    are moved into freshly allocated arrays, so the window is always one contiguous slice.
+
+    The buffer is engine-internal and is rewritten in place: the forming candle on every poll,
+    and the fractal columns of the candle at the center of the fractal window once that window
+    completes. Anything leaving the engine goes through `to_frame`, which copies the window.
+    """
+    def __init__(self, symbol: str, timeframe: str, capacity: int = 300):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.capacity = capacity
+        self.columns: Dict[str, np.ndarray] = {}
+        self.size = 0       # rows written into the backing arrays
+        self.version = 0    # bumped on every write so readers can tell the data changed
+
+    def __len__(self):
+        return min(self.size, self.capacity)
+
+    @property
+    def start(self) -> int:
+        return max(0, self.size - self.capacity)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(values.nbytes for values in self.columns.values())
+
+    def load(self, frame: pd.DataFrame):
+        """Replaces the whole buffer with (the newest `capacity` rows of) a frame."""
+        rows = frame.iloc[-self.capacity:] if len(frame) > self.capacity else frame
+        self.columns = {}
+        for col in frame.columns:
+            values = rows[col].to_numpy()
+            if values.dtype.kind in 'OUT':
+                values = values.astype(object)
+            backing = self._allocate(values.dtype, 2 * self.capacity)
+            backing[:len(values)] = values
+            self.columns[col] = backing
+        self.size = len(rows)
+        self.version += 1
+
+    def append(self) -> int:
+        """Reserves the next row and returns its index into `columns`."""
+        if self.size == len(self.columns['timestamp']):
+            keep = self.capacity
+            for col, values in self.columns.items():
+                compacted = self._allocate(values.dtype, len(values))
+                compacted[:keep] = values[self.size - keep:self.size]
+                self.columns[col] = compacted
+            self.size = keep
+        self.size += 1
+        self.version += 1
+        return self.size - 1
+
+    def discard_last(self):
+        if self.size:
+            self.size -= 1
+            self.version += 1
+
+    def touch(self):
+        """Marks an in-place rewrite of the last row."""
+        self.version += 1
+
+    def latest(self, column: str):
+        if self.size == 0 or column not in self.columns:
+            return None
+        return self.columns[column][self.size - 1]
+
+    def view(self, column: Optional[Union[str, Iterable[str]]] = None, n: Optional[int] = None) -> Union[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Read-only view(s) of the newest `n` rows (default: the whole window) for the engine
+        itself. They alias the buffer, so in-place rewrites show through them.
+        A single column name returns an array, otherwise a {column: array} dict.
+        """
+        start = self.start if n is None else max(self.start, self.size - n)
+        if isinstance(column, str):
+            return self._readonly(self.columns[column][start:self.size])
+        names = self.columns.keys() if column is None else column
+        return {name: self._readonly(self.columns[name][start:self.size]) for name in names}
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame copy of the window (O(window)), indexed by candle open time."""
+        data = {col: values[self.start:self.size].copy() for col, values in self.columns.items()}
+        df = pd.DataFrame(data, columns=list(self.columns.keys()))
+        if 'timestamp' in df.columns:
+            df.set_index(pd.to_datetime(df['timestamp'], unit='ms'), inplace=True, drop=False)
+        return df
+
+    @staticmethod
+    def _allocate(dtype: np.dtype, length: int) -> np.ndarray:
+        if dtype.kind == 'f':
+            return np.full(length, np.nan, dtype=dtype)
+        if dtype.kind == 'O':
+            return np.full(length, None, dtype=object)
+        return np.zeros(length, dtype=dtype)
+
+    @staticmethod
+    def _readonly(values: np.ndarray) -> np.ndarray:
+        view = values.view()
+        view.flags.writeable = False
+        return view
@@ -1,10 +1,18 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 from pydantic import BaseModel
 from cryptography.fernet import Fernet
 
 load_dotenv()
 
+def default_runtime_dir() -> str:
+    """Per-user directory for sockets: $XDG_RUNTIME_DIR/trading-bot, else <tmp>/trading-bot-<uid>"""
+    base = os.getenv("XDG_RUNTIME_DIR")
+    if base:
+        return os.path.join(base, "trading-bot")
+    return os.path.join(tempfile.gettempdir(), f"trading-bot-{os.getuid()}")
+
 def decrypt_secret(secret_raw: str):
     if not secret_raw or not secret_raw.startswith("ENCR:"):
         return secret_raw
@@ -43,6 +51,39 @@ class Settings(BaseModel):
     # Analysis Limits
     MAX_SYMBOLS: int = int(os.getenv("MAX_SYMBOLS", "30"))
 
+    # Market data fetching: max concurrent exchange requests (ccxt's rate limiter still applies)
+    MARKET_DATA_CONCURRENCY: int = int(os.getenv("MARKET_DATA_CONCURRENCY", "8"))
+    # Stream the lowest timeframe over websockets (watch_ohlcv) instead of intrabar polling.
+    # MARKET_DATA_STREAM_REPLAY points to a JSON-lines kline file to replay offline instead.
+    MARKET_DATA_STREAMING: bool = os.getenv("MARKET_DATA_STREAMING", "False").lower() == "true"
+    MARKET_DATA_STREAM_REPLAY: str = os.getenv("MARKET_DATA_STREAM_REPLAY", "")
+
+    # Event bus transport: "local" (single process) or "socket" (EventBroker on a Unix socket,
+    # so agents listed in WORKER_AGENTS can run in `python -m app.worker` processes)
+    EVENT_BUS_TRANSPORT: str = os.getenv("EVENT_BUS_TRANSPORT", "local").lower()
+    # The broker creates the socket's directory (0700) if missing and the socket itself as 0600
+    EVENT_BUS_SOCKET: str = os.getenv("EVENT_BUS_SOCKET", os.path.join(default_runtime_dir(), "event_bus.sock"))
+    WORKER_AGENTS: list = [name.strip() for name in os.getenv("WORKER_AGENTS", "").split(",") if name.strip()]
+
+    # Durable event journal (empty = disabled). With EVENT_JOURNAL_REPLAY the Governor restores
+    # the symbols approved before a restart instead of re-running their sanity checks.
+    EVENT_JOURNAL_DIR: str = os.getenv("EVENT_JOURNAL_DIR", "")
+    EVENT_JOURNAL_REPLAY: bool = os.getenv("EVENT_JOURNAL_REPLAY", "True").lower() == "true"
+
+    # Analysis objects memory: symbols not accessed for ANALYSIS_IDLE_SECONDS are evicted, sections
+    # not updated for ANALYSIS_SPILL_AFTER_SECONDS are written to ANALYSIS_SPILL_DIR (empty = never
+    # spill), and least recently used symbols no longer fetched are evicted while above
+    # ANALYSIS_MEMORY_BUDGET_MB (symbols still fetched are kept, with a warning).
+    ANALYSIS_MEMORY_BUDGET_MB: int = int(os.getenv("ANALYSIS_MEMORY_BUDGET_MB", "1024"))
+    ANALYSIS_IDLE_SECONDS: int = int(os.getenv("ANALYSIS_IDLE_SECONDS", "3600"))
+    ANALYSIS_SPILL_DIR: str = os.getenv("ANALYSIS_SPILL_DIR", "")
+    ANALYSIS_SPILL_AFTER_SECONDS: int = int(os.getenv("ANALYSIS_SPILL_AFTER_SECONDS", "900"))
+    ANALYSIS_MAINTENANCE_INTERVAL: int = int(os.getenv("ANALYSIS_MAINTENANCE_INTERVAL", "60"))
+
+    # How ValueAreasAgent spreads a candle's volume over the price bins it spans: "uniform"
+    # (equal share per bin) or "tick" (proportional to the part of the range inside each bin)
+    VALUE_AREA_DISTRIBUTION: str = os.getenv("VALUE_AREA_DISTRIBUTION", "uniform")
+
     # Ollama / Sanity Agent
     OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     OLLAMA_MODEL: str = os.getenv("OLLAMA_MODEL", "phi3:mini")
@@ -1,9 +1,18 @@
 import asyncio
-from typing import Callable, List, Dict, Any
+import itertools
+import time
+import uuid
+from typing import Callable, List, Dict, Any, Optional
 from enum import Enum, IntEnum
-from collections import deque
+from collections import OrderedDict, deque
+from collections.abc import Mapping
 from datetime import datetime
 import logging
+import numpy as np
+from app.core.metrics import MetricsRegistry
+from app.core.event_transport import EventTransport, create_transport
+from app.core.event_journal import EventJournal
+from app.core.config import settings
 
 logger = logging.getLogger("EventBus")
 
@@ -34,6 +43,7 @@ class EventType(Enum):
     VALUE_AREAS_UPDATED = "value_areas_updated"
     ANALYSIS_COMPLETED = "analysis_completed"
     AGENT_LOG = "agent_log"
+    REPLY = "reply"
 
 # Default priority mapping for event types
 EVENT_PRIORITY_MAP = {
@@ -43,6 +53,7 @@ EVENT_PRIORITY_MAP = {
     EventType.STRATEGY_SIGNAL: EventPriority.HIGH,
     EventType.SIGNAL: EventPriority.HIGH,
     EventType.ANOMALY_ALERT: EventPriority.HIGH,
+    EventType.REPLY: EventPriority.HIGH,
     EventType.MARKET_DATA: EventPriority.NORMAL,
     EventType.MARKET_DATA_REQUEST: EventPriority.NORMAL,
     EventType.REGIME_CHANGE: EventPriority.NORMAL,
@@ -55,99 +66,727 @@ EVENT_PRIORITY_MAP = {
     EventType.AGENT_LOG: EventPriority.LOW,
 }
 
+def _to_serializable(obj: Any) -> Any:
+    """Convert numpy and other non-serializable types to native Python types"""
+    if isinstance(obj, Mapping):
+        return {k: _to_serializable(v) for k, v in obj.items()}
+    elif isinstance(obj, (list, tuple)):
+        return [_to_serializable(item) for item in obj]
+    elif isinstance(obj, np.integer):
+        return int(obj)
+    elif isinstance(obj, np.floating):
+        return float(obj)
+    elif isinstance(obj, np.ndarray):
+        return obj.tolist()
+    else:
+        return obj
+
+# Converts monotonic event times to wall-clock time for display
+_WALL_CLOCK_OFFSET_NS = time.time_ns() - time.monotonic_ns()
+
 class Event:
-    """Wrapper for events with priority and metadata"""
+    """
+    Wrapper for events with priority and metadata. Slotted and stamped with a single
+    monotonic clock read; the wall-clock `timestamp` is derived only when displayed.
+    """
+    __slots__ = ('event_type', 'data', 'priority', 'created_ns', 'agent_name', '_serialized')
+
     def __init__(self, event_type: EventType, data: Dict[str, Any], priority: EventPriority = None):
         self.event_type = event_type
         self.data = data
         self.priority = priority if priority is not None else EVENT_PRIORITY_MAP.get(event_type, EventPriority.NORMAL)
-        self.timestamp = datetime.now()
+        self.created_ns = time.monotonic_ns()
         self.agent_name = data.get('agent', 'Unknown')
+        self._serialized: Optional[Dict[str, Any]] = None
+
+    @property
+    def wall_ns(self) -> int:
+        return self.created_ns + _WALL_CLOCK_OFFSET_NS
+
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self.wall_ns / 1e9)
+
+    def age(self) -> float:
+        """Seconds since the event was published"""
+        return (time.monotonic_ns() - self.created_ns) / 1e9
     
     def __lt__(self, other):
         """Compare events by priority for queue ordering"""
         return self.priority < other.priority
 
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        JSON-ready form of the event for the API. Built on first access and cached, so the
+        payload is converted once no matter how often the history is polled (published
+        payloads are treated as immutable).
+        """
+        if self._serialized is None:
+            self._serialized = {
+                'event_type': self.event_type.value,
+                'data': _to_serializable(self.data),
+                'timestamp': self.timestamp.isoformat(),
+                'priority': self.priority.name,
+                'agent_name': self.agent_name
+            }
+        return self._serialized
+
+async def _invoke(callback: Callable[[Dict[str, Any]], None], data: Dict[str, Any]):
+    if asyncio.iscoroutinefunction(callback):
+        await callback(data)
+    else:
+        callback(data)
+
+class TopicFilter:
+    """
+    Which events of a type a subscriber wants: required payload field values (a value or a
+    collection of accepted values per field) and/or a predicate over the payload.
+    """
+    def __init__(self, fields: Dict[str, Any] = None, predicate: Callable[[Dict[str, Any]], bool] = None):
+        self.fields = {
+            name: frozenset(value) if isinstance(value, (list, tuple, set, frozenset)) else frozenset([value])
+            for name, value in (fields or {}).items()
+        }
+        self.predicate = predicate
+
+    def matches(self, data: Dict[str, Any]) -> bool:
+        for name, values in self.fields.items():
+            try:
+                if data.get(name) not in values:
+                    return False
+            except TypeError:  # unhashable payload value
+                return False
+        return self.predicate is None or bool(self.predicate(data))
+
+    def describe(self) -> Optional[str]:
+        parts = [f"{name}={'|'.join(sorted(map(str, values)))}" for name, values in self.fields.items()]
+        if self.predicate is not None:
+            parts.append(getattr(self.predicate, '__qualname__', 'predicate'))
+        return ", ".join(parts) or None
+
+# Fields preferred as routing keys, most selective first
+ROUTING_FIELDS = ('section', 'symbol', 'timeframe')
+
+class RouteTable:
+    """
+    Subscribers of one event type indexed by a routing field of their TopicFilter, so
+    dispatching an event only looks at subscribers that can match it instead of invoking
+    every callback and letting it discard the event.
+    """
+    def __init__(self, inboxes: List['SubscriberInbox']):
+        self.unindexed: List['SubscriberInbox'] = []
+        self.index: Dict[str, Dict[Any, List['SubscriberInbox']]] = {}
+        for inbox in inboxes:
+            fields = inbox.topic.fields
+            field = next((f for f in ROUTING_FIELDS if f in fields), next(iter(fields), None))
+            if field is None:
+                self.unindexed.append(inbox)
+                continue
+            by_value = self.index.setdefault(field, {})
+            for value in fields[field]:
+                by_value.setdefault(value, []).append(inbox)
+
+    def route(self, data: Dict[str, Any]) -> List['SubscriberInbox']:
+        candidates = list(self.unindexed)
+        for field, by_value in self.index.items():
+            try:
+                candidates.extend(by_value.get(data.get(field), ()))
+            except TypeError:
+                continue
+        if len(candidates) > 1:
+            candidates.sort(key=lambda inbox: inbox.seq)  # subscription order
+        matched = []
+        for inbox in candidates:
+            try:
+                if inbox.topic.matches(data):
+                    matched.append(inbox)
+            except Exception as e:
+                logger.error(f"Error in topic filter of {inbox.name} for {inbox.event_type.value}: {e}")
+        return matched
+
+class BackpressurePolicy(Enum):
+    NEVER_DROP = "never_drop"    # unbounded; exceeding the capacity only logs a warning
+    DROP_OLDEST = "drop_oldest"  # a full inbox discards its oldest pending event
+    COALESCE = "coalesce"        # a pending event with the same key is replaced by the newest one
+
+class InboxPolicy:
+    """Backpressure policy and capacity of the subscriber inboxes for one event type"""
+    def __init__(self, policy: BackpressurePolicy, capacity: int = 1000, key_fields: tuple = ()):
+        self.policy = policy
+        self.capacity = capacity
+        self.key_fields = key_fields
+
+    def key(self, data: Dict[str, Any]) -> tuple:
+        return tuple(data.get(field) for field in self.key_fields)
+
+# Replaying these would place or cancel real orders again
+UNSAFE_TO_REPLAY = {EventType.ORDER_REQUEST, EventType.ORDER_FILLED, EventType.EMERGENCY_EXIT}
+
+# Event types not listed here are never dropped. MARKET_DATA and the analysis notifications
+# only say "this changed" (the data lives in the AnalysisObject), so the latest one per key is enough.
+DEFAULT_INBOX_POLICIES = {
+    EventType.MARKET_DATA: InboxPolicy(BackpressurePolicy.COALESCE, 1000, ('symbol', 'timeframe')),
+    EventType.ANALYSIS_UPDATE: InboxPolicy(BackpressurePolicy.COALESCE, 1000, ('symbol', 'timeframe', 'section')),
+    EventType.VALUE_AREAS_UPDATED: InboxPolicy(BackpressurePolicy.COALESCE, 1000, ('symbol', 'timeframe')),
+    EventType.AGENT_LOG: InboxPolicy(BackpressurePolicy.DROP_OLDEST, 500),
+    EventType.SYSTEM_STATUS: InboxPolicy(BackpressurePolicy.DROP_OLDEST, 100),
+    EventType.ERROR: InboxPolicy(BackpressurePolicy.DROP_OLDEST, 500),
+}
+
+class EventBusMetrics:
+    """
+    Prometheus metrics of one EventBus: publish counts, time spent in the priority queue,
+    time spent in subscriber inboxes, handler execution time and errors, and load shedding.
+    """
+    def __init__(self, bus: 'EventBus'):
+        self.registry = MetricsRegistry()
+        self.published = self.registry.counter(
+            "eventbus_events_published_total", "Events published", ("event_type",))
+        self.received = self.registry.counter(
+            "eventbus_events_received_total", "Events received from other processes", ("event_type",))
+        self.replayed = self.registry.counter(
+            "eventbus_events_replayed_total", "Events replayed from the journal", ("event_type",))
+        self.queue_wait = self.registry.histogram(
+            "eventbus_queue_wait_seconds", "Time between publish and dispatch", ("event_type",))
+        self.inbox_wait = self.registry.histogram(
+            "eventbus_inbox_wait_seconds", "Time between publish and handler start", ("event_type", "handler"))
+        self.handler_duration = self.registry.histogram(
+            "eventbus_handler_duration_seconds", "Handler execution time", ("event_type", "handler"))
+        self.handler_errors = self.registry.counter(
+            "eventbus_handler_errors_total", "Handler exceptions", ("event_type", "handler"))
+        self.dropped = self.registry.counter(
+            "eventbus_events_dropped_total", "Events dropped by a full inbox", ("event_type", "handler"))
+        self.coalesced = self.registry.counter(
+            "eventbus_events_coalesced_total", "Events replaced by a newer one in an inbox", ("event_type", "handler"))
+        self.analysis_updates = self.registry.counter(
+            "eventbus_analysis_updates_total",
+            "Analysis section updates delivered to AnalysisManager watchers (not published)", ("section", "handler"))
+        self.requests = self.registry.counter(
+            "eventbus_requests_total", "Requests by outcome (ok, error, timeout, cancelled)", ("event_type", "outcome"))
+        self.registry.gauge(
+            "eventbus_queue_depth", "Events waiting for the dispatcher",
+            collect=lambda: {(): bus._event_queue.qsize()})
+        self.registry.gauge(
+            "eventbus_pending_requests", "Requests waiting for a reply",
+            collect=lambda: {(): len(bus._pending)})
+        self.registry.gauge(
+            "eventbus_inbox_depth", "Events waiting in a subscriber inbox", ("event_type", "handler"),
+            collect=lambda: {(inbox.event_type.value, inbox.name): inbox.depth
+                             for inboxes in bus._subscribers.values() for inbox in inboxes})
+
+    def observe_handler(self, event: 'Event', handler: str, started: float, failed: bool):
+        self.handler_duration.observe(time.monotonic() - started, event.event_type.value, handler)
+        if failed:
+            self.handler_errors.inc(event.event_type.value, handler)
+
+    def render(self) -> str:
+        return self.registry.render()
+
+class SubscriberInbox:
+    """
+    One subscriber callback with its own inbox and worker task, so a slow subscriber
+    (e.g. an LLM-backed agent) only delays its own events. Delivering never blocks the
+    dispatcher: a full inbox sheds load according to its InboxPolicy.
+    """
+    def __init__(self, event_type: EventType, callback: Callable[[Dict[str, Any]], None], policy: InboxPolicy,
+                 topic: TopicFilter = None, seq: int = 0, metrics: EventBusMetrics = None):
+        self.event_type = event_type
+        self.callback = callback
+        self.name = getattr(callback, '__qualname__', repr(callback))
+        self.policy = policy
+        self.topic = topic or TopicFilter()
+        self.seq = seq
+        self.metrics = metrics
+        self.processed = 0
+        self.errors = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.last_lag = 0.0   # seconds between publish and handler start
+        self.max_lag = 0.0
+        self.busy_since: Optional[float] = None
+        # Pending events as [event, coalesce_key] slots, so a coalesced event keeps its place in line
+        self._items: deque = deque()
+        self._by_key: Dict[tuple, list] = {}
+        self._unfinished = 0
+        self._over_capacity = False
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._items)
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Events and tasks belong to one event loop (the global bus can outlive a loop)
+            self._loop = loop
+            self._items.clear()
+            self._by_key.clear()
+            self._unfinished = 0
+            self._wakeup = asyncio.Event()
+            self._idle = asyncio.Event()
+            self._idle.set()
+            self._worker = None
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+
+    def deliver(self, event: 'Event'):
+        self._ensure_worker()
+        policy = self.policy
+        key = None
+        if policy.policy is BackpressurePolicy.COALESCE:
+            key = policy.key(event.data)
+            try:
+                slot = self._by_key.get(key)
+            except TypeError:  # unhashable key field, queue it without coalescing
+                key = slot = None
+            if slot is not None:
+                slot[0] = event
+                self.coalesced += 1
+                if self.metrics:
+                    self.metrics.coalesced.inc(self.event_type.value, self.name)
+                return
+
+        if len(self._items) >= policy.capacity:
+            if policy.policy is BackpressurePolicy.NEVER_DROP:
+                if not self._over_capacity:
+                    logger.warning(f"Inbox of {self.name} for {self.event_type.value} is over capacity ({policy.capacity})")
+                    self._over_capacity = True
+            else:
+                self._forget(self._items.popleft())
+                self.dropped += 1
+                if self.metrics:
+                    self.metrics.dropped.inc(self.event_type.value, self.name)
+                self._task_done()
+        elif self._over_capacity and len(self._items) < policy.capacity // 2:
+            self._over_capacity = False
+
+        slot = [event, key]
+        self._items.append(slot)
+        if key is not None:
+            self._by_key[key] = slot
+        self._unfinished += 1
+        self._idle.clear()
+        self._wakeup.set()
+
+    def _forget(self, slot: list):
+        if slot[1] is not None and self._by_key.get(slot[1]) is slot:
+            del self._by_key[slot[1]]
+
+    def _task_done(self):
+        self._unfinished -= 1
+        if self._unfinished == 0:
+            self._idle.set()
+
+    async def join(self):
+        if self._idle is not None and self._loop is asyncio.get_running_loop():
+            await self._idle.wait()
+
+    async def _run(self):
+        while True:
+            while not self._items:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            slot = self._items.popleft()
+            self._forget(slot)
+            event = slot[0]
+            self.busy_since = time.monotonic()
+            self.last_lag = event.age()
+            self.max_lag = max(self.max_lag, self.last_lag)
+            failed = False
+            if self.metrics:
+                self.metrics.inbox_wait.observe(self.last_lag, event.event_type.value, self.name)
+            try:
+                await _invoke(self.callback, event.data)
+            except Exception as e:
+                failed = True
+                self.errors += 1
+                logger.error(f"Error in event handler {self.name} for {event.event_type.value}: {e}")
+            finally:
+                if self.metrics:
+                    self.metrics.observe_handler(event, self.name, self.busy_since, failed)
+                self.busy_since = None
+                self.processed += 1
+                self._task_done()
+
+    def close(self):
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+        self._worker = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'event_type': self.event_type.value,
+            'subscriber': self.name,
+            'topic': self.topic.describe(),
+            'policy': self.policy.policy.value,
+            'queue_depth': self.depth,
+            'queue_capacity': self.policy.capacity,
+            'processed': self.processed,
+            'errors': self.errors,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'last_lag_ms': round(self.last_lag * 1000, 3),
+            'max_lag_ms': round(self.max_lag * 1000, 3),
+            'busy_ms': round((time.monotonic() - self.busy_since) * 1000, 3) if self.busy_since else 0.0,
+        }
+
+class RequestError(Exception):
+    """The responder of an `EventBus.request` replied with an error"""
+    pass
+
 class EventBus:
-    def __init__(self):
-        self._subscribers: Dict[EventType, List[Callable[[Dict[str, Any]], None]]] = {}
+    """
+    Dispatch modes:
+    - "inbox" (default): every subscriber has an inbox and its own worker task, so subscribers
+      of the same event run independently of each other. Inbox capacity and load shedding
+      are configured per event type (DEFAULT_INBOX_POLICIES, `set_policy`).
+    - "sequential": subscribers are awaited one after the other inside the dispatcher.
+
+    A single long-lived dispatcher task drains the priority queue. `start`/`stop` manage it
+    (GovernorAgent calls them); `publish` also starts it on demand.
+
+    The transport (event_transport.py) carries events between processes: published events
+    are also handed to it, and events from other processes come back through `receive`.
+    With a journal (event_journal.py) every published event is also appended to it, and
+    `replay` re-dispatches journaled events.
+
+    Besides subscriptions, callers can await single events: `expect`/`wait_for` resolve with
+    the next matching event, and `request` publishes an event carrying a `correlation_id`
+    and resolves with the REPLY a subscriber sends through `reply`.
+    """
+    def __init__(self, dispatch_mode: str = "inbox", inbox_size: int = 1000, policies: Dict[EventType, InboxPolicy] = None,
+                 transport: EventTransport = None, journal: EventJournal = None):
+        self._subscribers: Dict[EventType, List[SubscriberInbox]] = {}
+        self._routes: Dict[EventType, RouteTable] = {}
+        self._subscription_seq = itertools.count()
         self._event_queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
-        self._processing = False
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._journal_flusher: Optional[asyncio.Task] = None
+        self._loop = None
         self._event_history: deque = deque(maxlen=1000)  # Store last 1000 events
-        self._agent_events: Dict[str, deque] = {}  # Events per agent
+        # Recent events per agent, for the most recently active `max_tracked_agents` agents
+        self._agent_events: OrderedDict[str, deque] = OrderedDict()
+        self.max_tracked_agents = 64
+        self.dispatch_mode = dispatch_mode
+        self.inbox_size = inbox_size
+        self._policies: Dict[EventType, InboxPolicy] = {**DEFAULT_INBOX_POLICIES, **(policies or {})}
+        self.metrics = EventBusMetrics(self)
+        self.transport = transport or EventTransport()
+        self.journal = journal
+        # One-shot waiters (expect) per event type, and request futures by correlation id
+        self._waiters: Dict[EventType, List[tuple]] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    def get_policy(self, event_type: EventType) -> InboxPolicy:
+        policy = self._policies.get(event_type)
+        return policy if policy is not None else InboxPolicy(BackpressurePolicy.NEVER_DROP, self.inbox_size)
 
-    def subscribe(self, event_type: EventType, callback: Callable[[Dict[str, Any]], None]):
+    def set_policy(self, event_type: EventType, policy: InboxPolicy):
+        """Changes the backpressure policy of an event type, including existing subscribers"""
+        self._policies[event_type] = policy
+        for inbox in self._subscribers.get(event_type, []):
+            inbox.policy = policy
+
+    def subscribe(self, event_type: EventType, callback: Callable[[Dict[str, Any]], None],
+                  predicate: Callable[[Dict[str, Any]], bool] = None, **topic):
+        """
+        Subscribe a callback to an event type, optionally only for some events of it:
+        `topic` fields must match the payload (e.g. section="market_structure" or
+        timeframe=["1h", "4h"]) and `predicate(data)` must be true.
+        """
         if event_type not in self._subscribers:
             self._subscribers[event_type] = []
-        self._subscribers[event_type].append(callback)
-        logger.info(f"Subscribed to {event_type.value}")
+        inbox = SubscriberInbox(event_type, callback, self.get_policy(event_type),
+                                TopicFilter(topic, predicate), next(self._subscription_seq), self.metrics)
+        self._subscribers[event_type].append(inbox)
+        self._routes[event_type] = RouteTable(self._subscribers[event_type])
+        if len(self._subscribers[event_type]) == 1:
+            self.transport.subscribed(event_type)
+        described = inbox.topic.describe()
+        logger.info(f"Subscribed to {event_type.value}" + (f" ({described})" if described else ""))
 
     def unsubscribe(self, event_type: EventType, callback: Callable[[Dict[str, Any]], None]):
         """Unsubscribe a callback from an event type"""
-        if event_type in self._subscribers:
-            try:
-                self._subscribers[event_type].remove(callback)
+        for inbox in self._subscribers.get(event_type, []):
+            if inbox.callback == callback:
+                inbox.close()
+                self._subscribers[event_type].remove(inbox)
+                self._routes[event_type] = RouteTable(self._subscribers[event_type])
                 logger.info(f"Unsubscribed from {event_type.value}")
-            except ValueError:
-                pass
+                break
 
     def clear_subscribers(self):
         """Clears all subscribers across all event types. Useful for testing."""
+        for inboxes in self._subscribers.values():
+            for inbox in inboxes:
+                inbox.close()
         self._subscribers = {}
+        self._routes = {}
         logger.info("Cleared all event bus subscribers.")
 
+    def expect(self, event_type: EventType, predicate: Callable[[Dict[str, Any]], bool] = None,
+               **topic) -> asyncio.Future:
+        """
+        Future resolved with the payload of the next `event_type` event matching the topic
+        filter (same arguments as `subscribe`). Call it before publishing whatever triggers
+        the event; cancelling the future stops waiting.
+        """
+        future = asyncio.get_running_loop().create_future()
+        waiter = (TopicFilter(topic, predicate), future)
+        waiters = self._waiters.setdefault(event_type, [])
+        if not waiters and not self._subscribers.get(event_type):
+            self.transport.subscribed(event_type)
+        waiters.append(waiter)
+        future.add_done_callback(lambda _: self._discard_waiter(event_type, waiter))
+        return future
+
+    async def wait_for(self, event_type: EventType, timeout: float,
+                       predicate: Callable[[Dict[str, Any]], bool] = None, **topic) -> Dict[str, Any]:
+        """Waits for the next matching event (see `expect`); raises asyncio.TimeoutError after `timeout` seconds."""
+        return await asyncio.wait_for(self.expect(event_type, predicate, **topic), timeout)
+
+    def _discard_waiter(self, event_type: EventType, waiter: tuple):
+        waiters = self._waiters.get(event_type)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiters[event_type]
+
+    async def request(self, event_type: EventType, data: Dict[str, Any], timeout: float = 30.0,
+                      priority: EventPriority = None) -> Any:
+        """
+        Publishes `data` with a new `correlation_id` and returns the result of the first reply
+        to it (a subscriber calling `reply`). Raises asyncio.TimeoutError when nobody replies
+        within `timeout` seconds and RequestError when the responder replied with an error.
+        Cancelling the caller drops the pending request; a late reply is ignored.
+        """
+        correlation_id = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        self._pending[correlation_id] = future
+        outcome = "cancelled"
+        try:
+            await self.publish(event_type, {**data, "correlation_id": correlation_id}, priority)
+            reply = await asyncio.wait_for(future, timeout)
+            if reply.get("error") is not None:
+                outcome = "error"
+                raise RequestError(reply["error"])
+            outcome = "ok"
+            return reply.get("result")
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise
+        finally:
+            self._pending.pop(correlation_id, None)
+            self.metrics.requests.inc(event_type.value, outcome)
+
+    async def reply(self, request: Dict[str, Any], result: Any = None, error: Any = None, agent: str = None) -> bool:
+        """
+        Answers a request received by a subscriber. Returns False (and publishes nothing)
+        when the event was a plain publish without a `correlation_id`.
+        """
+        correlation_id = request.get("correlation_id")
+        if correlation_id is None:
+            return False
+        data = {"correlation_id": correlation_id, "result": result,
+                "error": str(error) if error is not None else None}
+        if agent is not None:
+            data["agent"] = agent
+        await self.publish(EventType.REPLY, data)
+        return True
+
+    def _resolve_waiters(self, event: Event):
+        if event.event_type is EventType.REPLY:
+            future = self._pending.get(event.data.get("correlation_id"))
+            if future is not None and not future.done():
+                future.set_result(event.data)
+        for topic, future in list(self._waiters.get(event.event_type, ())):
+            if future.done():
+                continue
+            try:
+                if topic.matches(event.data):
+                    future.set_result(event.data)
+            except Exception as e:
+                future.set_exception(e)
+
+    def get_subscriber_stats(self) -> List[Dict[str, Any]]:
+        """Queue depth, lag and handler counters per subscriber"""
+        return [inbox.get_stats() for inboxes in self._subscribers.values() for inbox in inboxes]
+
+    @property
+    def is_running(self) -> bool:
+        return self._dispatcher is not None and not self._dispatcher.done()
+
+    async def start(self):
+        """Starts the dispatcher task on the running loop (no-op if already running)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A queue belongs to one event loop; events left on a previous loop can't be delivered
+            self._loop = loop
+            self._event_queue = asyncio.PriorityQueue()
+            self._dispatcher = None
+            self._journal_flusher = None
+        if not self.is_running:
+            self._dispatcher = loop.create_task(self._dispatch_loop())
+            logger.info("Event bus dispatcher started")
+        if self.journal is not None and (self._journal_flusher is None or self._journal_flusher.done()):
+            self._journal_flusher = loop.create_task(self._flush_journal_loop())
+        await self.transport.start(self)
+
+    async def _flush_journal_loop(self):
+        # Appends only flush once the interval has passed, so a burst followed by silence
+        # would otherwise leave its tail unsynced
+        while True:
+            await asyncio.sleep(self.journal.fsync_interval)
+            try:
+                self.journal.flush()
+            except Exception as e:
+                logger.error(f"Error flushing the event journal: {e}")
+
+    async def stop(self, timeout: float = 5.0):
+        """Delivers what is already queued (up to `timeout` seconds), then stops the dispatcher and subscriber workers."""
+        if self.is_running:
+            try:
+                await asyncio.wait_for(self.drain(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Event bus stopped with {self._event_queue.qsize()} undelivered events")
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+            logger.info("Event bus dispatcher stopped")
+        for inboxes in self._subscribers.values():
+            for inbox in inboxes:
+                inbox.close()
+        await self.transport.stop()
+        if self._journal_flusher is not None:
+            self._journal_flusher.cancel()
+            await asyncio.gather(self._journal_flusher, return_exceptions=True)
+            self._journal_flusher = None
+        if self.journal is not None:
+            self.journal.flush()
+
+    async def drain(self):
+        """Waits until every published event has been handled by all subscribers. Useful for testing."""
+        if self._loop is not asyncio.get_running_loop():
+            return
+        while True:
+            await self._event_queue.join()
+            for inboxes in list(self._subscribers.values()):
+                for inbox in list(inboxes):
+                    await inbox.join()
+            # Handlers may have published follow-up events
+            if self._event_queue.empty():
+                return
+
     async def publish(self, event_type: EventType, data: Dict[str, Any], priority: EventPriority = None):
         """
         Publish an event to the event bus with optional priority override.
         Events are queued and processed in priority order.
         """
         event = Event(event_type, data, priority)
-        
+        self.metrics.published.inc(event_type.value)
+        if self.journal is not None:
+            try:
+                self.journal.append(event_type.value, int(event.priority), event.wall_ns, data)
+            except Exception as e:
+                logger.error(f"Error journaling {event_type.value}: {e}")
+        await self._enqueue(event)
+        await self.transport.send(event)
+
+    async def replay(self, event_types: List[EventType], since_seq: int = 0, since: Optional[datetime] = None,
+                     allow_unsafe: bool = False) -> int:
+        """
+        Re-dispatches journaled events of the given types to the current subscribers (they are
+        not journaled or sent to other processes again). Returns the number of events replayed.
+        """
+        if self.journal is None:
+            return 0
+        unsafe = UNSAFE_TO_REPLAY.intersection(event_types)
+        if unsafe and not allow_unsafe:
+            raise ValueError(f"Refusing to replay {', '.join(sorted(t.value for t in unsafe))} without allow_unsafe=True")
+        since_ns = int(since.timestamp() * 1e9) if since is not None else None
+        count = 0
+        for record in self.journal.replay(since_seq, [t.value for t in event_types], since_ns):
+            event = Event(EventType(record.event_type), record.data, EventPriority(record.priority))
+            self.metrics.replayed.inc(record.event_type)
+            await self._enqueue(event)
+            count += 1
+        if count:
+            logger.info(f"Replayed {count} journaled events")
+        return count
+
+    async def receive(self, event_type: str, data: Dict[str, Any], priority: int = None):
+        """Dispatches an event published in another process (called by the transport)"""
+        try:
+            event_type = EventType(event_type)
+        except ValueError:
+            logger.warning(f"Ignoring unknown event type {event_type!r} from another process")
+            return
+        event = Event(event_type, data, EventPriority(priority) if priority is not None else None)
+        self.metrics.received.inc(event_type.value)
+        await self._enqueue(event)
+
+    async def _enqueue(self, event: Event):
         # Store in history
         self._event_history.append(event)
         
         # Store in agent-specific history
         agent_name = event.agent_name
-        if agent_name not in self._agent_events:
-            self._agent_events[agent_name] = deque(maxlen=100)
-        self._agent_events[agent_name].append(event)
-        
-        logger.info(f"Publishing {event_type.value} with priority {event.priority.name}: {data}")
+        agent_events = self._agent_events.get(agent_name)
+        if agent_events is None:
+            agent_events = self._agent_events[agent_name] = deque(maxlen=100)
+            if len(self._agent_events) > self.max_tracked_agents:
+                self._agent_events.popitem(last=False)
+        else:
+            self._agent_events.move_to_end(agent_name)
+        agent_events.append(event)
         
-        # Add to priority queue
-        await self._event_queue.put((event.priority, event))
+        # Summary only: formatting whole payloads (dataframes, analysis sections) on every publish is expensive
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Publishing %s (priority %s) from %s, %d fields",
+                         event.event_type.value, event.priority.name, agent_name, len(event.data))
         
-        # Start processing if not already running
-        if not self._processing:
-            asyncio.create_task(self._process_queue())
+        if not self.is_running or self._loop is not asyncio.get_running_loop():
+            await self.start()
 
-    async def _process_queue(self):
-        """Process events from the priority queue"""
-        if self._processing:
-            return
-        
-        self._processing = True
-        try:
-            while not self._event_queue.empty():
-                try:
-                    _, event = await asyncio.wait_for(self._event_queue.get(), timeout=0.1)
-                    await self._dispatch_event(event)
-                except asyncio.TimeoutError:
-                    break
-        finally:
-            self._processing = False
+        # Add to priority queue; the monotonic sequence number keeps events of equal priority in publish order
+        await self._event_queue.put((event.priority, next(self._sequence), event))
+
+    async def _dispatch_loop(self):
+        """Long-lived dispatcher: highest priority first, FIFO within a priority"""
+        while True:
+            _, _, event = await self._event_queue.get()
+            self.metrics.queue_wait.observe(event.age(), event.event_type.value)
+            try:
+                await self._dispatch_event(event)
+            except Exception as e:
+                logger.error(f"Error dispatching {event.event_type.value}: {e}")
+            finally:
+                self._event_queue.task_done()
 
     async def _dispatch_event(self, event: Event):
-        """Dispatch an event to all subscribers"""
-        if event.event_type in self._subscribers:
-            for callback in self._subscribers[event.event_type]:
-                try:
-                    if asyncio.iscoroutinefunction(callback):
-                        await callback(event.data)
-                    else:
-                        callback(event.data)
-                except Exception as e:
-                    logger.error(f"Error in event handler for {event.event_type.value}: {e}")
+        """Dispatch an event to the subscribers whose topic filter matches it"""
+        if event.event_type in self._waiters or event.event_type is EventType.REPLY:
+            self._resolve_waiters(event)
+        routes = self._routes.get(event.event_type)
+        if routes is None:
+            return
+        for inbox in routes.route(event.data):
+            if self.dispatch_mode == "inbox":
+                inbox.deliver(event)
+                continue
+            started = time.monotonic()
+            failed = False
+            try:
+                await _invoke(inbox.callback, event.data)
+            except Exception as e:
+                failed = True
+                logger.error(f"Error in event handler for {event.event_type.value}: {e}")
+            self.metrics.observe_handler(event, inbox.name, started, failed)
 
     def get_agent_events(self, agent_name: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Get recent events created by a specific agent"""
@@ -155,41 +794,15 @@ class EventBus:
             return []
         
         events = list(self._agent_events[agent_name])[-limit:]
-        return [{
-            'event_type': event.event_type.value,
-            'data': self._convert_to_serializable(event.data),
-            'timestamp': event.timestamp.isoformat(),
-            'priority': event.priority.name,
-            'agent_name': event.agent_name
-        } for event in events]
+        return [event.to_dict() for event in events]
 
     def get_recent_events(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get recent events from all agents"""
         events = list(self._event_history)[-limit:]
-        return [{
-            'event_type': event.event_type.value,
-            'data': self._convert_to_serializable(event.data),
-            'timestamp': event.timestamp.isoformat(),
-            'priority': event.priority.name,
-            'agent_name': event.agent_name
-        } for event in events]
-    
-    def _convert_to_serializable(self, obj: Any) -> Any:
-        """Convert numpy and other non-serializable types to native Python types"""
-        import numpy as np
-        
-        if isinstance(obj, dict):
-            return {k: self._convert_to_serializable(v) for k, v in obj.items()}
-        elif isinstance(obj, (list, tuple)):
-            return [self._convert_to_serializable(item) for item in obj]
-        elif isinstance(obj, np.integer):
-            return int(obj)
-        elif isinstance(obj, np.floating):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        else:
-            return obj
+        return [event.to_dict() for event in events]
 
 # Global instance
-event_bus = EventBus()
+event_bus = EventBus(
+    transport=create_transport(),
+    journal=EventJournal(settings.EVENT_JOURNAL_DIR) if settings.EVENT_JOURNAL_DIR else None
+)
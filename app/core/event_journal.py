@@ -0,0 +1,208 @@
+import logging
+import mmap
+import os
+import pickle
+import struct
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+logger = logging.getLogger("EventJournal")
+
+# Record: body length, crc32 of the rest, sequence, wall-clock ns, priority, event type length,
+# then the event type (utf-8) and the pickled payload. A zero length marks the end of a segment.
+_RECORD = struct.Struct("<IIQqBH")
+_SEGMENT_SUFFIX = ".seg"
+
+
+class JournalRecord(NamedTuple):
+    seq: int
+    wall_ns: int
+    event_type: str
+    priority: int
+    data: Any
+
+
+def _scan(buf, limit: int) -> Iterator[tuple]:
+    """Yields (offset, end, seq, wall_ns, priority, event_type, body bytes) for every intact record."""
+    offset = 0
+    while offset + _RECORD.size <= limit:
+        length, crc, seq, wall_ns, priority, type_len = _RECORD.unpack_from(buf, offset)
+        end = offset + _RECORD.size + type_len + length
+        if length == 0 or end > limit:
+            return
+        with memoryview(buf) as view, view[offset + 8:end] as rest:
+            if zlib.crc32(rest) != crc:
+                return  # torn write at the tail
+        type_start = offset + _RECORD.size
+        event_type = bytes(buf[type_start:type_start + type_len]).decode()
+        yield offset, end, seq, wall_ns, priority, event_type, buf[type_start + type_len:end]
+        offset = end
+
+
+class _Segment:
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.first_seq = int(os.path.basename(path)[:-len(_SEGMENT_SUFFIX)])
+        exists = os.path.exists(path)
+        self.file = open(path, "r+b" if exists else "w+b")
+        if not exists or os.path.getsize(path) < size:
+            self.file.truncate(size)
+        self.size = os.path.getsize(path)
+        self.map = mmap.mmap(self.file.fileno(), self.size)
+        self.offset = 0
+        self.last_seq = self.first_seq - 1
+        for _, end, seq, *_ in _scan(self.map, self.size):
+            self.offset = end
+            self.last_seq = seq
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+        self.file.close()
+
+
+class EventJournal:
+    """
+    Append-only event log in fixed-size, memory-mapped segment files
+    (`<first sequence>.seg`). Appends are memory copies. Dirty pages are flushed to disk
+    by `flush`, which an append calls once `fsync_interval` seconds have passed since the
+    last flush. An EventBus owning the journal also calls it every `fsync_interval` while
+    running, so a crash loses at most that window; without one, an idle tail stays unsynced
+    until the next append or `flush`. A record torn by a crash fails its checksum and ends
+    the segment on reopen.
+    The oldest segments are deleted beyond `max_segments`.
+    """
+    def __init__(self, directory: str, segment_size: int = 64 * 1024 * 1024, fsync_interval: float = 1.0,
+                 max_segments: int = 16):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.fsync_interval = fsync_interval
+        self.max_segments = max_segments
+        self.appended = 0
+        self.skipped = 0
+        self._last_sync = time.monotonic()
+        self._dirty = False
+        os.makedirs(directory, exist_ok=True)
+        paths = self._segment_paths()
+        self._segment: Optional[_Segment] = _Segment(paths[-1], segment_size) if paths else None
+        self.next_seq = self._segment.last_seq + 1 if self._segment else 1
+
+    def _segment_paths(self) -> List[str]:
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(_SEGMENT_SUFFIX))
+        return [os.path.join(self.directory, n) for n in names]
+
+    def _roll(self, needed: int):
+        if self._segment is not None:
+            self._segment.close()
+        path = os.path.join(self.directory, f"{self.next_seq:020d}{_SEGMENT_SUFFIX}")
+        self._segment = _Segment(path, max(self.segment_size, needed + _RECORD.size))
+        for old in self._segment_paths()[:-self.max_segments]:
+            os.unlink(old)
+
+    def append(self, event_type: str, priority: int, wall_ns: int, data: Any) -> Optional[int]:
+        """Appends one event and returns its sequence number (None if the payload can't be pickled)."""
+        try:
+            body = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            self.skipped += 1
+            logger.warning(f"Not journaling {event_type} event: {e}")
+            return None
+        type_bytes = event_type.encode()
+        size = _RECORD.size + len(type_bytes) + len(body)
+        segment = self._segment
+        if segment is None or segment.offset + size > segment.size:
+            self._roll(size)
+            segment = self._segment
+
+        seq = self.next_seq
+        start = segment.offset
+        header_end = start + _RECORD.size
+        buf = segment.map
+        buf[header_end:header_end + len(type_bytes)] = type_bytes
+        buf[header_end + len(type_bytes):start + size] = body
+        fields = struct.pack("<QqBH", seq, wall_ns, priority, len(type_bytes))
+        buf[start + 8:header_end] = fields
+        # Length is written last (with the crc) so a partially copied record never looks complete
+        crc = zlib.crc32(body, zlib.crc32(type_bytes, zlib.crc32(fields)))
+        struct.pack_into("<II", buf, start, len(body), crc)
+        segment.offset = start + size
+        segment.last_seq = seq
+        self.next_seq = seq + 1
+        self.appended += 1
+        self._dirty = True
+
+        if time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.flush()
+        return seq
+
+    def flush(self):
+        if self._dirty and self._segment is not None:
+            self._segment.map.flush()
+            self._dirty = False
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+    def replay(self, since_seq: int = 0, event_types: Optional[Iterable[str]] = None,
+               since_ns: Optional[int] = None) -> Iterator[JournalRecord]:
+        """Yields the journaled events in order, optionally filtered by sequence, type and wall-clock time."""
+        types = set(event_types) if event_types is not None else None
+        paths = self._segment_paths()
+        for i, path in enumerate(paths):
+            next_first = int(os.path.basename(paths[i + 1])[:-len(_SEGMENT_SUFFIX)]) if i + 1 < len(paths) else None
+            if next_first is not None and next_first <= since_seq:
+                continue
+            # Every segment gets its own read-only mapping (the active one up to its current end),
+            # so replay can run in another thread while appends continue and segments roll over
+            active = self._segment
+            end = active.offset if active is not None and path == active.path else None
+            try:
+                with open(path, "rb") as f:
+                    owned = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (FileNotFoundError, ValueError):
+                continue  # deleted by rotation meanwhile, or still empty
+            limit = len(owned) if end is None else min(end, len(owned))
+            try:
+                for _, _, seq, wall_ns, priority, event_type, body in _scan(owned, limit):
+                    if seq < since_seq or (types is not None and event_type not in types):
+                        continue
+                    if since_ns is not None and wall_ns < since_ns:
+                        continue
+                    try:
+                        data = pickle.loads(body)
+                    except Exception as e:
+                        logger.warning(f"Skipping undecodable journal record {seq}: {e}")
+                        continue
+                    yield JournalRecord(seq, wall_ns, event_type, priority, data)
+            finally:
+                owned.close()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "segments": len(self._segment_paths()),
+            "next_seq": self.next_seq,
+            "appended": self.appended,
+            "skipped": self.skipped,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+    from datetime import datetime
+
+    parser = argparse.ArgumentParser(description="Print journaled events")
+    parser.add_argument("directory")
+    parser.add_argument("--type", action="append", dest="types", help="Event type value, e.g. market_data")
+    parser.add_argument("--since-seq", type=int, default=0)
+    args = parser.parse_args()
+
+    journal = EventJournal(args.directory)
+    for record in journal.replay(args.since_seq, args.types):
+        when = datetime.fromtimestamp(record.wall_ns / 1e9).isoformat()
+        print(f"{record.seq}\t{when}\t{record.event_type}\t{dict(record.data) if hasattr(record.data, 'keys') else record.data}")
+    journal.close()
@@ -0,0 +1,140 @@
+from collections.abc import MutableMapping
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Iterator, Optional
+
+
+class _Missing:
+    __slots__ = ()
+
+    def __repr__(self):
+        return "MISSING"
+
+    def __reduce__(self):
+        return "MISSING"
+
+
+# Default of payload fields: an unset field is absent, like a key the publisher didn't add
+MISSING = _Missing()
+
+
+class Payload(MutableMapping):
+    """
+    Base of the typed event payloads. The fields every event of a type carries live in
+    slots; any other key goes to `extra` (created on first use). Subscribers keep reading
+    them like the dict payloads: `data["symbol"]`, `data.get("price")`, `dict(data)`.
+    """
+    __slots__ = ()
+    _field_names: tuple = ()
+    _field_set: frozenset = frozenset()
+
+    def __getitem__(self, key):
+        if key in self._field_set:
+            value = getattr(self, key)
+            if value is MISSING:
+                raise KeyError(key)
+            return value
+        if self.extra is None:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def get(self, key, default=None):
+        if key in self._field_set:
+            value = getattr(self, key)
+            return default if value is MISSING else value
+        return default if self.extra is None else self.extra.get(key, default)
+
+    def __setitem__(self, key, value):
+        if key in self._field_set:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._field_set:
+            if getattr(self, key) is MISSING:
+                raise KeyError(key)
+            setattr(self, key, MISSING)
+        elif self.extra is None:
+            raise KeyError(key)
+        else:
+            del self.extra[key]
+
+    def __contains__(self, key):
+        if key in self._field_set:
+            return getattr(self, key) is not MISSING
+        return self.extra is not None and key in self.extra
+
+    def __iter__(self) -> Iterator[str]:
+        for name in self._field_names:
+            if getattr(self, name) is not MISSING:
+                yield name
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        count = sum(getattr(self, name) is not MISSING for name in self._field_names)
+        return count + (len(self.extra) if self.extra else 0)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Payload':
+        known = {key: value for key, value in data.items() if key in cls._field_set}
+        extra = {key: value for key, value in data.items() if key not in cls._field_set}
+        return cls(**known, extra=extra or None)
+
+
+def payload(cls):
+    """Class decorator: slotted dataclass keeping Payload's mapping __eq__ and __repr__, plus the field index."""
+    cls = dataclass(slots=True, eq=False, repr=False)(cls)
+    cls._field_names = tuple(f.name for f in fields(cls) if f.name != 'extra')
+    cls._field_set = frozenset(cls._field_names)
+    return cls
+
+
+@payload
+class MarketDataPayload(Payload):
+    symbol: Any = MISSING
+    timeframe: Any = MISSING
+    timestamp: Any = MISSING
+    latest_close: Any = MISSING
+    agent: Any = MISSING
+    from_cache: Any = MISSING
+    delta_fetch: Any = MISSING
+    streamed: Any = MISSING
+    candles: Any = MISSING
+    extra: Optional[Dict[str, Any]] = None
+
+
+@payload
+class StrategySignalPayload(Payload):
+    strategy_id: Any = MISSING
+    symbol: Any = MISSING
+    timeframe: Any = MISSING
+    signal: Any = MISSING
+    confidence: Any = MISSING
+    rationale: Any = MISSING
+    price: Any = MISSING
+    sl_price: Any = MISSING
+    tp_price: Any = MISSING
+    timestamp: Any = MISSING
+    agent: Any = MISSING
+    extra: Optional[Dict[str, Any]] = None
+
+
+@payload
+class OrderRequestPayload(Payload):
+    symbol: Any = MISSING
+    side: Any = MISSING
+    type: Any = MISSING
+    amount: Any = MISSING
+    price: Any = MISSING
+    sl_price: Any = MISSING
+    tp_price: Any = MISSING
+    confidence: Any = MISSING
+    rationale: Any = MISSING
+    agent: Any = MISSING
+    extra: Optional[Dict[str, Any]] = None
@@ -0,0 +1,290 @@
+import asyncio
+import json
+import logging
+import os
+import pickle
+import socket
+import stat
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger("EventTransport")
+
+# Frame: header length and body length (big-endian uint32), JSON header, body bytes.
+# The broker only reads headers and forwards bodies untouched.
+_FRAME_PREFIX = struct.Struct(">II")
+
+
+def encode_frame(header: Dict[str, Any], body: bytes = b"") -> bytes:
+    head = json.dumps(header, separators=(",", ":")).encode()
+    return _FRAME_PREFIX.pack(len(head), len(body)) + head + body
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[Dict[str, Any], bytes, bytes]:
+    """Returns (header, body, raw frame)."""
+    prefix = await reader.readexactly(_FRAME_PREFIX.size)
+    head_len, body_len = _FRAME_PREFIX.unpack(prefix)
+    head = await reader.readexactly(head_len)
+    body = await reader.readexactly(body_len) if body_len else b""
+    return json.loads(head), body, prefix + head + body
+
+
+class EventTransport:
+    """
+    How an EventBus reaches other processes. The base transport is in-process only:
+    published events are dispatched locally and nothing leaves the process.
+    """
+    async def start(self, bus):
+        pass
+
+    async def stop(self):
+        pass
+
+    def subscribed(self, event_type):
+        """Called when the bus gets its first subscriber for an event type"""
+        pass
+
+    async def send(self, event):
+        """Called for every event published in this process"""
+        pass
+
+    def get_status(self) -> Dict[str, Any]:
+        return {"transport": "local"}
+
+
+class SocketTransport(EventTransport):
+    """
+    Connects the bus to an EventBroker over a Unix socket. Events published here are sent
+    to the broker, which forwards them to the other processes subscribed to their type;
+    events from other processes are dispatched through `EventBus.receive`.
+
+    Payloads are pickled (they carry numpy values and enums), which is only acceptable
+    because the socket is local and owner-only (see EventBroker). Events published while
+    the broker is unreachable stay local; the transport keeps reconnecting.
+    """
+    def __init__(self, path: str, reconnect_delay: float = 1.0):
+        self.path = path
+        self.reconnect_delay = reconnect_delay
+        self.bus = None
+        self.connected = asyncio.Event()
+        self.sent = 0
+        self.received = 0
+        self.unsent = 0
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop = None
+
+    async def start(self, bus):
+        self.bus = bus
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self.connected = asyncio.Event()
+            self._writer = None
+            self._task = None
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._connection_loop())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._close_writer()
+
+    async def _connection_loop(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except OSError as e:
+                logger.debug(f"Event broker at {self.path} unreachable: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+            self._writer = writer
+            writer.write(encode_frame({"op": "subscribe", "event_types": self._local_event_types()}))
+            self.connected.set()
+            logger.info(f"Connected to event broker at {self.path}")
+            try:
+                await self._read_loop(reader)
+            except (asyncio.IncompleteReadError, ConnectionError) as e:
+                logger.warning(f"Lost connection to event broker: {e!r}")
+            finally:
+                self.connected.clear()
+                self._close_writer()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        while True:
+            header, body, _ = await read_frame(reader)
+            if header.get("op") != "publish":
+                continue
+            try:
+                data = pickle.loads(body)
+            except Exception as e:
+                logger.error(f"Dropping undecodable {header.get('event_type')} event from broker: {e}")
+                continue
+            self.received += 1
+            await self.bus.receive(header["event_type"], data, header.get("priority"))
+
+    def _local_event_types(self) -> List[str]:
+        # Replies are always wanted: requests made here may be answered in another process
+        event_types = {*self.bus._subscribers, *self.bus._waiters}
+        return sorted({event_type.value for event_type in event_types} | {"reply"})
+
+    def subscribed(self, event_type):
+        if self._writer is not None:
+            self._writer.write(encode_frame({"op": "subscribe", "event_types": [event_type.value]}))
+
+    async def send(self, event):
+        writer = self._writer
+        if writer is None:
+            self.unsent += 1
+            return
+        try:
+            body = pickle.dumps(event.data, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"{event.event_type.value} event from {event.agent_name} can't be sent to other processes: {e}")
+            self.unsent += 1
+            return
+        writer.write(encode_frame(
+            {"op": "publish", "event_type": event.event_type.value, "priority": int(event.priority)}, body))
+        self.sent += 1
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass  # the connection loop notices and reconnects
+
+    def _close_writer(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "transport": "socket",
+            "path": self.path,
+            "connected": self.connected.is_set(),
+            "sent": self.sent,
+            "received": self.received,
+            "unsent": self.unsent,
+        }
+
+
+class EventBroker:
+    """
+    Local stand-in for a pub/sub server (the role Redis or ZeroMQ would play): accepts
+    SocketTransport connections on a Unix socket and forwards each published event to every
+    other connection subscribed to its event type. The main process hosts it (GovernorAgent)
+    unless one is already listening; `python -m app.core.event_transport` runs it standalone.
+    """
+    def __init__(self, path: str, max_buffer: int = 16 * 1024 * 1024):
+        self.path = path
+        self.max_buffer = max_buffer  # per connection; a consumer this far behind loses events
+        self.forwarded = 0
+        self.dropped = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._clients: Dict[asyncio.StreamWriter, set] = {}
+
+    @property
+    def is_running(self) -> bool:
+        return self._server is not None
+
+    async def start(self) -> bool:
+        """Starts listening; returns False when another broker already serves the path."""
+        if os.path.exists(self.path):
+            try:
+                _, writer = await asyncio.open_unix_connection(self.path)
+                writer.close()
+                logger.info(f"Event broker already running at {self.path}")
+                return False
+            except OSError:
+                os.unlink(self.path)  # stale socket file
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        info = os.stat(directory)
+        if info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o022:
+            raise PermissionError(f"{directory} must be owned by the current user and not writable by others")
+        # Bound under a restrictive umask so the socket is owner-only from the moment it exists
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)
+        try:
+            sock.bind(self.path)
+        except OSError:
+            sock.close()
+            raise
+        finally:
+            os.umask(umask)
+        self._server = await asyncio.start_unix_server(self._handle_client, sock=sock)
+        logger.info(f"Event broker listening on {self.path}")
+        return True
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._clients):
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+        self._clients.clear()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        logger.info("Event broker stopped")
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        event_types = set()
+        self._clients[writer] = event_types
+        try:
+            while True:
+                header, _, raw = await read_frame(reader)
+                op = header.get("op")
+                if op == "subscribe":
+                    event_types.update(header.get("event_types", []))
+                elif op == "publish":
+                    self._forward(writer, header["event_type"], raw)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._clients.pop(writer, None)
+            writer.close()
+
+    def _forward(self, sender: asyncio.StreamWriter, event_type: str, raw: bytes):
+        for writer, event_types in self._clients.items():
+            if writer is sender or event_type not in event_types:
+                continue
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                self.dropped += 1
+                continue
+            writer.write(raw)
+            self.forwarded += 1
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "running": self.is_running,
+            "clients": len(self._clients),
+            "forwarded": self.forwarded,
+            "dropped": self.dropped,
+        }
+
+
+def create_transport() -> EventTransport:
+    """Transport of the global event bus, from EVENT_BUS_TRANSPORT ("local" or "socket")."""
+    if settings.EVENT_BUS_TRANSPORT == "socket":
+        return SocketTransport(settings.EVENT_BUS_SOCKET)
+    return EventTransport()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    async def _serve():
+        broker = EventBroker(settings.EVENT_BUS_SOCKET)
+        if await broker.start():
+            try:
+                await asyncio.Event().wait()
+            finally:
+                await broker.stop()
+
+    asyncio.run(_serve())
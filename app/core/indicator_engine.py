@@ -0,0 +1,404 @@
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+import logging
+from typing import Callable, Dict, List, Optional, Any
+from app.core.candle_buffer import CandleBuffer
+from app.core.relative_candles import relative_candle_states, candle_event, next_state, next_phase
+from app.core.sr_levels import ClosestLevelsTracker
+
+logger = logging.getLogger("IndicatorEngine")
+
+OHLCV_COLUMNS = ['timestamp', 'Open', 'High', 'Low', 'Close', 'Volume']
+EMA_LENGTHS = [9, 21, 55, 144, 252]
+FRACTAL_LENGTHS = [5, 7, 9]
+
+# Column layout produced by MarketDataAgent.calculate_indicators (order matters for consumers
+# that serialize the frame as-is).
+INDICATOR_COLUMNS = OHLCV_COLUMNS + [
+    'Heikin Ashi Open', 'Heikin Ashi High', 'Heikin Ashi Low', 'Heikin Ashi Close',
+    'Relative Candles Open', 'Relative Candles Close', 'Relative Candles Mode', 'Relative Candles Phase',
+    'Average Directional Index', 'Positive Directional Indicator', 'Negative Directional Indicator',
+    'Average True Range', 'On Balance Volume', 'Linear Regression Slope',
+    'Weis Waves Volume', 'Weis Waves Direction', 'Heikin Ashi Weis Waves Volume', 'Relative Weis Waves Volume',
+] + [f'Exponential Moving Average {length}' for length in EMA_LENGTHS] + [
+    'Pivot Points',
+] + [f'Williams Fractals {n}' for n in FRACTAL_LENGTHS] + [
+    'Closest Support', 'Closest Resistance',
+]
+
+ADX_LENGTH = 14
+ATR_LENGTH = 14
+LINREG_LENGTH = 14
+SR_FRACTAL = 9
+DAY_MS = 86_400_000
+
+# Minimum history before every indicator has left its warm-up period (longest EMA + 1).
+# Below this the engine simply recomputes the whole batch.
+WARMUP_BARS = max(EMA_LENGTHS) + 1
+
+
+class IndicatorEngine:
+    """
+    Stateful, per-(symbol, timeframe) indicator calculator.
+
+    The first call (and any call that cannot be applied incrementally, e.g. after a gap)
+    runs the full batch calculation and derives the running state of every indicator from it.
+    Subsequent calls only append new candles or replace the still-forming one. Computing a
+    candle costs O(1) (fractals and levels look back a fixed number of rows); returning the
+    frame through `to_frame` copies the window, which is O(max_rows) per update.
+
+    Until the window slides, the frame equals the batch calculation over the same candles.
+    Once it slides, the recursive indicators (EMAs, ADX, ATR, OBV, Heikin Ashi, Weis waves)
+    carry on from the full history since the last seed, i.e. they match a batch over all of
+    those candles rather than over the window alone. Closest Support/Resistance only use
+    fractals still inside the window.
+
+    The running state is kept twice: `_committed` holds the state after the last closed candle
+    and `_forming` the state including the newest (possibly still open) candle, so the forming
+    candle can be recomputed on every poll without replaying history.
+
+    Candles and indicator columns are kept in an engine-internal CandleBuffer that is rewritten
+    in place; readers only get DataFrame copies of the window through `to_frame`.
+    """
+    def __init__(self, symbol: str, timeframe: str, batch: Callable[[pd.DataFrame], pd.DataFrame], max_rows: int = 300):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.batch = batch
+        self.buffer = CandleBuffer(symbol, timeframe, capacity=max_rows)
+        self.max_rows = max_rows
+
+        self._committed: Optional[Dict[str, Any]] = None
+        self._forming: Optional[Dict[str, Any]] = None
+        self.incremental_updates = 0
+        self.full_recalculations = 0
+
+    @property
+    def is_seeded(self) -> bool:
+        return self._forming is not None
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        ts = self.buffer.latest('timestamp')
+        return None if ts is None else int(ts)
+
+    def update(self, ohlcv: List) -> pd.DataFrame:
+        """
+        Feed raw ccxt OHLCV rows ([ts, o, h, l, c, v], ascending) and return the indicator frame.
+        Rows older than the newest stored candle are ignored, a row with the same timestamp
+        replaces the forming candle and newer rows are appended.
+        """
+        if not ohlcv:
+            return self.to_frame()
+
+        last_ts = self.last_timestamp
+        first_new = None
+        if self.is_seeded:
+            for idx, row in enumerate(ohlcv):
+                if int(row[0]) >= last_ts:
+                    first_new = idx
+                    break
+
+        # Anything we cannot stitch onto the stored history (no overlap -> possible missing candles)
+        # falls back to a full recalculation.
+        if first_new is None or int(ohlcv[first_new][0]) != last_ts:
+            if self.is_seeded and ohlcv and int(ohlcv[-1][0]) < last_ts:
+                # Stale response, nothing newer than what we already hold
+                return self.to_frame()
+            return self.seed(ohlcv)
+
+        if first_new > 0 and self._revises_previous(ohlcv[first_new - 1]):
+            # The candle before the forming one closed with other values than we stored (e.g. a
+            # stream only saw it until its last push): recompute from the corrected history
+            return self.seed(self._history(self.buffer.size - 2) + ohlcv[first_new - 1:])
+
+        for row in ohlcv[first_new:]:
+            self._apply(row, replace=int(row[0]) == self.last_timestamp)
+        self.incremental_updates += 1
+        return self.to_frame()
+
+    def seed(self, ohlcv: List) -> pd.DataFrame:
+        """Full batch calculation; primes the incremental state when enough history is available."""
+        self.full_recalculations += 1
+        df = pd.DataFrame(ohlcv, columns=OHLCV_COLUMNS)
+        frame = self.batch(df)
+
+        self._committed = None
+        self._forming = None
+        self.buffer.load(frame)
+
+        if len(frame) < WARMUP_BARS or not all(col in frame.columns for col in INDICATOR_COLUMNS):
+            return frame
+
+        try:
+            self._committed = self._derive_state(frame, len(frame) - 2)
+            # Recompute the forming candle from the committed state so both states exist
+            self.buffer.discard_last()
+            self._apply(ohlcv[-1], replace=False)
+        except Exception as e:
+            logger.warning(f"Could not derive incremental state for {self.symbol} {self.timeframe}: {e}")
+            self._committed = None
+            self._forming = None
+            self.buffer.load(frame)
+            return frame
+
+        return self.to_frame()
+
+    def to_frame(self) -> pd.DataFrame:
+        return self.buffer.to_frame()
+
+    @property
+    def previous_timestamp(self) -> Optional[int]:
+        """Open time of the candle before the newest one (the last closed candle)."""
+        if self.buffer.size - self.buffer.start < 2:
+            return None
+        return int(self.buffer.columns['timestamp'][self.buffer.size - 2])
+
+    def _revises_previous(self, row: List) -> bool:
+        if int(row[0]) != self.previous_timestamp:
+            return False
+        i = self.buffer.size - 2
+        return any(float(value) != float(self.buffer.columns[col][i]) for col, value in zip(OHLCV_COLUMNS[1:], row[1:6]))
+
+    def _history(self, end: int) -> List[list]:
+        """Stored raw OHLCV rows of the window up to (not including) buffer row `end`."""
+        cols = self.buffer.columns
+        start = self.buffer.start
+        ts = cols['timestamp'][start:end].tolist()
+        values = [cols[col][start:end].tolist() for col in OHLCV_COLUMNS[1:]]
+        return [[int(t), *row] for t, *row in zip(ts, *values)]
+
+    # ------------------------------------------------------------------ state
+
+    def _derive_state(self, frame: pd.DataFrame, j: int) -> Dict[str, Any]:
+        """Reconstructs the running state as of row j from a batch-computed frame."""
+        opens = frame['Open'].to_numpy(dtype=float)
+        highs = frame['High'].to_numpy(dtype=float)
+        lows = frame['Low'].to_numpy(dtype=float)
+        closes = frame['Close'].to_numpy(dtype=float)
+        ts = frame['timestamp'].to_numpy(dtype='int64')
+
+        def last(col):
+            value = float(frame[col].iloc[j])
+            if np.isnan(value):
+                raise ValueError(f"{col} still warming up")
+            return value
+
+        states = relative_candle_states(opens[:j+1], highs[:j+1], lows[:j+1], closes[:j+1])
+
+        # ADX uses its own ATR (prenan=True) internally
+        adx_atr = ta.atr(frame['High'], frame['Low'], frame['Close'], length=ADX_LENGTH, prenan=True)
+        adx_atr_j = float(adx_atr.iloc[j])
+        if np.isnan(adx_atr_j):
+            raise ValueError("ADX ATR still warming up")
+
+        # Heikin Ashi direction with zero bodies carried forward
+        ha_dir = np.sign(frame['Heikin Ashi Close'].to_numpy(dtype=float)[:j+1] - frame['Heikin Ashi Open'].to_numpy(dtype=float)[:j+1])
+        ha_dir = pd.Series(ha_dir).replace(0, np.nan).ffill().fillna(1)
+
+        # Confirmed fractal pools as seen by row j
+        levels = ClosestLevelsTracker()
+        body_top = np.maximum(opens, closes)
+        body_bottom = np.minimum(opens, closes)
+        offset = SR_FRACTAL // 2
+        for c in range(offset, j - offset + 1):
+            is_up, is_down = self._fractal_at(highs, lows, c, SR_FRACTAL)
+            if is_up:
+                levels.confirm(resistance=body_top[c], at=int(ts[c]))
+            if is_down:
+                levels.confirm(support=body_bottom[c], at=int(ts[c]))
+
+        day = int(ts[j]) // DAY_MS
+        same_day = ts[:j+1] // DAY_MS == day
+
+        return {
+            'ha_open': last('Heikin Ashi Open'),
+            'ha_close': last('Heikin Ashi Close'),
+            'state': int(states[j]),
+            'prev_state': int(states[j-1]),
+            'phase': last('Relative Candles Phase'),
+            'atr': last('Average True Range'),
+            'adx_atr': adx_atr_j,
+            'rma_pos': last('Positive Directional Indicator') * adx_atr_j / 100,
+            'rma_neg': last('Negative Directional Indicator') * adx_atr_j / 100,
+            'adx': last('Average Directional Index'),
+            'obv': last('On Balance Volume'),
+            'weis_dir': last('Weis Waves Direction'),
+            'weis_vol': last('Weis Waves Volume'),
+            'ha_weis_dir': float(ha_dir.iloc[-1]),
+            'ha_weis_vol': last('Heikin Ashi Weis Waves Volume'),
+            'rel_weis_vol': last('Relative Weis Waves Volume'),
+            'emas': {length: last(f'Exponential Moving Average {length}') for length in EMA_LENGTHS},
+            'day': day,
+            'day_high': float(np.max(highs[:j+1][same_day])),
+            'day_low': float(np.min(lows[:j+1][same_day])),
+            'day_close': float(closes[j]),
+            'pivot': float(frame['Pivot Points'].iloc[j]),
+            'levels': levels,
+            'pending_support': None,
+            'pending_resistance': None,
+            'pending_at': None,
+        }
+
+    @staticmethod
+    def _fractal_at(highs: np.ndarray, lows: np.ndarray, center: int, n: int):
+        offset = n // 2
+        lo, hi = center - offset, center + offset + 1
+        if lo < 0 or hi > len(highs):
+            return False, False
+        return highs[center] == np.max(highs[lo:hi]), lows[center] == np.min(lows[lo:hi])
+
+    def _apply(self, row: List, replace: bool):
+        """Computes indicators for one candle from the committed state and stores the row."""
+        if replace:
+            i = self.buffer.size - 1
+            self.buffer.touch()
+        else:
+            if self._forming is not None:
+                self._commit(self._forming)
+            i = self.buffer.append()
+
+        prev = self._committed
+        ts, o, h, l, c, v = int(row[0]), float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5])
+
+        cols = self.buffer.columns
+        cols['timestamp'][i] = ts
+        cols['Open'][i] = o
+        cols['High'][i] = h
+        cols['Low'][i] = l
+        cols['Close'][i] = c
+        cols['Volume'][i] = v
+
+        ph, pl, pc = cols['High'][i-1], cols['Low'][i-1], cols['Close'][i-1]
+        pph, ppl = cols['High'][i-2], cols['Low'][i-2]
+        state = dict(prev)
+
+        # 1. Heikin Ashi
+        ha_close = 0.25 * (o + h + l + c)
+        ha_open = 0.5 * (prev['ha_open'] + prev['ha_close'])
+        cols['Heikin Ashi Open'][i] = ha_open
+        cols['Heikin Ashi High'][i] = max(ha_open, ha_close, h)
+        cols['Heikin Ashi Low'][i] = min(ha_open, ha_close, l)
+        cols['Heikin Ashi Close'][i] = ha_close
+        state['ha_open'], state['ha_close'] = ha_open, ha_close
+
+        # 2. Relative Candles
+        hh, ll = h > ph, l < pl
+        rel_state = next_state(prev['state'], candle_event(hh, l > pl, h < ph, ll, ph < pph and pl > ppl, c > o, c < o))
+        phase = next_phase(prev['phase'], prev['prev_state'], prev['state'], rel_state)
+        state['prev_state'], state['state'], state['phase'] = prev['state'], rel_state, phase
+
+        mode = 'Standard'
+        if hh and not ll:
+            rel_o, rel_c = l, h
+        elif ll and not hh:
+            rel_o, rel_c = h, l
+        elif hh and ll:
+            rel_o, rel_c = (h, l) if o > c else (l, h)
+        else:
+            rel_o, rel_c = h, l
+            mode = 'Inside'
+        cols['Relative Candles Open'][i] = rel_o
+        cols['Relative Candles Close'][i] = rel_c
+        cols['Relative Candles Mode'][i] = mode
+        cols['Relative Candles Phase'][i] = phase
+
+        # 3. ADX / ATR (RMA recurrences, same as pandas-ta)
+        tr = max(h - l, abs(h - pc), abs(pc - l))
+        up, dn = h - ph, pl - l
+        pos = up if (up > dn and up > 0) else 0.0
+        neg = dn if (dn > up and dn > 0) else 0.0
+        a = 1.0 / ADX_LENGTH
+        state['adx_atr'] = prev['adx_atr'] + a * (tr - prev['adx_atr'])
+        state['rma_pos'] = prev['rma_pos'] + a * (pos - prev['rma_pos'])
+        state['rma_neg'] = prev['rma_neg'] + a * (neg - prev['rma_neg'])
+        dmp = 100 * state['rma_pos'] / state['adx_atr']
+        dmn = 100 * state['rma_neg'] / state['adx_atr']
+        dx = 100 * abs(dmp - dmn) / (dmp + dmn) if (dmp + dmn) else 0.0
+        state['adx'] = prev['adx'] + a * (dx - prev['adx'])
+        cols['Average Directional Index'][i] = state['adx']
+        cols['Positive Directional Indicator'][i] = dmp
+        cols['Negative Directional Indicator'][i] = dmn
+
+        state['atr'] = prev['atr'] + (tr - prev['atr']) / ATR_LENGTH
+        cols['Average True Range'][i] = state['atr']
+
+        # OBV
+        state['obv'] = prev['obv'] + np.sign(c - pc) * v
+        cols['On Balance Volume'][i] = state['obv']
+
+        # 4. Linear Regression Slope
+        window = cols['Close'][i - LINREG_LENGTH + 1:i + 1]
+        n = LINREG_LENGTH
+        x = np.arange(1, n + 1)
+        x_sum = 0.5 * n * (n + 1)
+        x2_sum = x_sum * (2 * n + 1) / 3
+        divisor = n * x2_sum - x_sum * x_sum
+        cols['Linear Regression Slope'][i] = (n * float(np.dot(x, window)) - x_sum * float(window.sum())) / divisor
+
+        # Weis Waves (same direction keeps accumulating, zero keeps the previous direction)
+        def wave(direction, prev_dir, prev_vol):
+            direction = prev_dir if direction == 0 else direction
+            return direction, (prev_vol + v if direction == prev_dir else v)
+
+        state['weis_dir'], state['weis_vol'] = wave(np.sign(c - o), prev['weis_dir'], prev['weis_vol'])
+        state['ha_weis_dir'], state['ha_weis_vol'] = wave(np.sign(ha_close - ha_open), prev['ha_weis_dir'], prev['ha_weis_vol'])
+        _, state['rel_weis_vol'] = wave(phase, prev['phase'], prev['rel_weis_vol'])
+        cols['Weis Waves Volume'][i] = state['weis_vol']
+        cols['Weis Waves Direction'][i] = state['weis_dir']
+        cols['Heikin Ashi Weis Waves Volume'][i] = state['ha_weis_vol']
+        cols['Relative Weis Waves Volume'][i] = state['rel_weis_vol']
+
+        # 5. EMAs
+        emas = {}
+        for length, prev_ema in prev['emas'].items():
+            emas[length] = prev_ema + 2.0 / (length + 1) * (c - prev_ema)
+            cols[f'Exponential Moving Average {length}'][i] = emas[length]
+        state['emas'] = emas
+
+        # 6. Pivot Points (traditional, daily anchor: typical price of the previous day)
+        day = ts // DAY_MS
+        if day != prev['day']:
+            state['pivot'] = (prev['day_high'] + prev['day_low'] + prev['day_close']) / 3
+            state['day'], state['day_high'], state['day_low'] = day, h, l
+        else:
+            state['day_high'], state['day_low'] = max(prev['day_high'], h), min(prev['day_low'], l)
+        state['day_close'] = c
+        cols['Pivot Points'][i] = state['pivot']
+
+        # 7. Williams Fractals confirmed by this candle
+        highs, lows = cols['High'][:i+1], cols['Low'][:i+1]
+        for n_val in FRACTAL_LENGTHS:
+            center = i - n_val // 2
+            is_up, is_down = self._fractal_at(highs, lows, center, n_val)
+            cols[f'Williams Fractals {n_val}'][center] = highs[center] if is_up else (lows[center] if is_down else np.nan)
+            if i > center:
+                cols[f'Williams Fractals {n_val}'][i] = np.nan
+            if n_val == SR_FRACTAL:
+                body_o, body_c = cols['Open'][center], cols['Close'][center]
+                state['pending_resistance'] = max(body_o, body_c) if is_up else None
+                state['pending_support'] = min(body_o, body_c) if is_down else None
+                state['pending_at'] = int(cols['timestamp'][center])
+
+        # 9. Closest Support/Resistance, from the fractals the batch calculation would see in
+        # the current window (their whole n-candle range inside it)
+        first = self.buffer.start + SR_FRACTAL // 2
+        prev['levels'].expire(int(cols['timestamp'][min(first, i)]))
+        support, resistance = prev['levels'].closest(c)
+        pending_support, pending_resistance = state['pending_support'], state['pending_resistance']
+        # Levels confirmed by the forming candle are not committed to the pool yet
+        if pending_support is not None and pending_support < c and (support is None or pending_support > support):
+            support = pending_support
+        if pending_resistance is not None and pending_resistance > c and (resistance is None or pending_resistance < resistance):
+            resistance = pending_resistance
+        cols['Closest Support'][i] = np.nan if support is None else support
+        cols['Closest Resistance'][i] = np.nan if resistance is None else resistance
+
+        self._forming = state
+
+    def _commit(self, state: Dict[str, Any]):
+        # The level pools are shared with the committed state; the forming state only ever reads them.
+        state['levels'].confirm(state['pending_support'], state['pending_resistance'], at=state['pending_at'])
+        state['pending_support'] = None
+        state['pending_resistance'] = None
+        self._committed = state
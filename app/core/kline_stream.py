@@ -0,0 +1,73 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+import ccxt.pro as ccxtpro
+from app.core.config import settings
+
+logger = logging.getLogger("KlineStream")
+
+
+class ReplayKlineExchange:
+    """
+    Offline stand-in for a ccxt.pro exchange: replays kline pushes from a JSON-lines file
+    through the same `watch_ohlcv` interface.
+
+    Each line is one push: {"symbol": "BTC-USDT", "timeframe": "5m", "ohlcv": [ts, o, h, l, c, v]}
+    with an optional "delay" (seconds to wait before the push, default `interval`).
+    """
+    def __init__(self, path: str, interval: float = 0.0):
+        self.path = path
+        self.interval = interval
+        self.finished = asyncio.Event()
+        self.pushes = 0
+        self._queues: Dict[tuple, asyncio.Queue] = defaultdict(asyncio.Queue)
+        self._task: Optional[asyncio.Task] = None
+
+    async def _replay(self):
+        with open(self.path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                push = json.loads(line)
+                await asyncio.sleep(push.get("delay", self.interval))
+                self._queues[(push["symbol"], push["timeframe"])].put_nowait(push["ohlcv"])
+                self.pushes += 1
+        self.finished.set()
+        logger.info(f"Replay of {self.path} finished ({self.pushes} pushes)")
+
+    async def watch_ohlcv(self, symbol: str, timeframe: str = '1m', since: Optional[int] = None,
+                          limit: Optional[int] = None, params: Dict[str, Any] = {}) -> List[List]:
+        """Waits for the next push and returns every candle updated since the last call, like ccxt.pro."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._replay())
+        queue = self._queues[(symbol, timeframe)]
+        updates = [await queue.get()]
+        while not queue.empty():
+            updates.append(queue.get_nowait())
+
+        # Several pushes for the same candle collapse into its latest values
+        candles = {}
+        for candle in updates:
+            candles[int(candle[0])] = candle
+        return [candles[ts] for ts in sorted(candles)]
+
+    async def close(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+
+def create_stream_exchange():
+    """Streaming exchange for MarketDataAgent: the replay file when configured, BingX websockets otherwise."""
+    if settings.MARKET_DATA_STREAM_REPLAY:
+        return ReplayKlineExchange(settings.MARKET_DATA_STREAM_REPLAY)
+    return ccxtpro.bingx({
+        'apiKey': settings.BINGX_API_KEY,
+        'secret': settings.BINGX_SECRET_KEY,
+        'options': {
+            'defaultType': 'swap',
+            'sandbox': settings.BINGX_IS_SANDBOX,
+        }
+    })
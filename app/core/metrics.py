@@ -0,0 +1,149 @@
+import bisect
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Seconds; covers a fast in-memory handler up to an LLM call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonic counter per label set"""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def get(self, *labels) -> float:
+        return self.values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Metric):
+    """Value sampled at render time from a callback returning {label tuple: value}"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (),
+                 collect: Optional[Callable[[], Dict[Tuple, float]]] = None):
+        super().__init__(name, help, labelnames)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        values = self.collect() if self.collect else {}
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(values.items())
+        ]
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram per label set (Prometheus semantics)"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[Tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *labels):
+        series = self.series.get(labels)
+        if series is None:
+            series = [0] * len(self.buckets) + [0.0, 0]
+            self.series[labels] = series
+        idx = bisect.bisect_left(self.buckets, value)
+        if idx < len(self.buckets):
+            series[idx] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def count(self, *labels) -> int:
+        series = self.series.get(labels)
+        return series[-1] if series else 0
+
+    def sum(self, *labels) -> float:
+        series = self.series.get(labels)
+        return series[-2] if series else 0.0
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, series in sorted(self.series.items()):
+            cumulative = 0
+            bounds = list(zip(self.buckets, series)) + [(math.inf, 0)]
+            for bound, count in bounds:
+                cumulative += count
+                le = 'le="%s"' % _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative if bound != math.inf else series[-1]}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{label_str} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in the Prometheus text exposition format"""
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = (), collect=None) -> Gauge:
+        return self.register(Gauge(name, help, labelnames, collect))
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
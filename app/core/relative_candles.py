@@ -0,0 +1,172 @@
+import numpy as np
+from typing import Tuple
+
+# Relative Candles state machine (logic from TODO.md) encoded as integers.
+STATE_NAMES = ['X', 'U', 'D', 'RU', 'RU2', 'RD', 'RD2', 'I', 'I2']
+X, U, D, RU, RU2, RD, RD2, I, I2 = range(len(STATE_NAMES))
+NUM_STATES = len(STATE_NAMES)
+
+# Per-candle events. HH/LH and HL/LL are mutually exclusive so at most one rule applies.
+EV_NONE = 0            # equal highs or lows -> no rule matches
+EV_UP = 1              # HH & HL
+EV_DOWN = 2            # LH & LL
+EV_INSIDE_AGAIN = 3    # LH & HL, previous candle also inside
+EV_INSIDE = 4          # LH & HL
+EV_OUTSIDE_GREEN = 5   # HH & LL, close > open
+EV_OUTSIDE_RED = 6     # HH & LL, close < open
+EV_OUTSIDE_DOJI = 7    # HH & LL, close == open
+NUM_EVENTS = 8
+
+# TRANSITIONS[prev_state, event] -> next state. Unmatched combinations fall back to X.
+TRANSITIONS = np.full((NUM_STATES, NUM_EVENTS), X, dtype=np.int8)
+for _prev in range(NUM_STATES):
+    if _prev == X:
+        row = {EV_UP: U, EV_DOWN: D, EV_INSIDE_AGAIN: I2, EV_INSIDE: I,
+               EV_OUTSIDE_GREEN: RU2, EV_OUTSIDE_RED: RD2}
+    elif _prev == U:
+        row = {EV_UP: U, EV_DOWN: RD, EV_INSIDE_AGAIN: I2, EV_INSIDE: I,
+               EV_OUTSIDE_GREEN: RU, EV_OUTSIDE_RED: RU, EV_OUTSIDE_DOJI: RU}
+    elif _prev == D:
+        row = {EV_UP: RU, EV_DOWN: D, EV_INSIDE_AGAIN: I2, EV_INSIDE: I,
+               EV_OUTSIDE_GREEN: RU, EV_OUTSIDE_RED: RU, EV_OUTSIDE_DOJI: RU}
+    elif _prev in (RU, RU2):
+        row = {EV_UP: U, EV_DOWN: RD, EV_INSIDE_AGAIN: I2, EV_INSIDE: I,
+               EV_OUTSIDE_GREEN: RU2, EV_OUTSIDE_RED: RD2}
+    elif _prev in (RD, RD2):
+        row = {EV_UP: RU, EV_DOWN: D, EV_INSIDE_AGAIN: I, EV_INSIDE: I,
+               EV_OUTSIDE_GREEN: RU2, EV_OUTSIDE_RED: RD2}
+    else:  # I, I2
+        row = {EV_UP: RU, EV_DOWN: RD, EV_INSIDE_AGAIN: I2, EV_INSIDE: I2,
+               EV_OUTSIDE_GREEN: RU2, EV_OUTSIDE_RED: RD2}
+    for _event, _next in row.items():
+        TRANSITIONS[_prev, _event] = _next
+
+# Phase flips for the last three states (s2, s1, s0), encoded as s2 * 81 + s1 * 9 + s0.
+# +1 starts an up phase, -1 a down phase, 0 keeps the previous phase.
+_UP_FROM = (D, RD, RD2)
+_DOWN_FROM = (U, RU, RU2)
+PHASE_FLIPS = np.zeros(NUM_STATES ** 3, dtype=np.int8)
+for _s2 in range(NUM_STATES):
+    for _s1 in range(NUM_STATES):
+        for _s0 in range(NUM_STATES):
+            _code = (_s2 * NUM_STATES + _s1) * NUM_STATES + _s0
+            if _s0 in (RU, RU2) and (_s1 in _UP_FROM or (_s1 == I and _s2 in _UP_FROM) or (_s2 == I and _s1 == I2)):
+                PHASE_FLIPS[_code] = 1
+            elif _s0 in (RD, RD2) and (_s1 in _DOWN_FROM or (_s1 == I and _s2 in _DOWN_FROM) or (_s2 == I and _s1 == I2)):
+                PHASE_FLIPS[_code] = -1
+
+
+def candle_event(hh: bool, hl: bool, lh: bool, ll: bool, prev_inside: bool, green: bool, red: bool) -> int:
+    """Event code for a single candle (used by the incremental engine)."""
+    if hh and hl: return EV_UP
+    if lh and ll: return EV_DOWN
+    if lh and hl: return EV_INSIDE_AGAIN if prev_inside else EV_INSIDE
+    if hh and ll: return EV_OUTSIDE_GREEN if green else (EV_OUTSIDE_RED if red else EV_OUTSIDE_DOJI)
+    return EV_NONE
+
+
+def next_state(prev_state: int, event: int) -> int:
+    return int(TRANSITIONS[int(prev_state), event])
+
+
+def next_phase(prev_phase: float, s2: int, s1: int, s0: int) -> float:
+    flip = PHASE_FLIPS[(int(s2) * NUM_STATES + int(s1)) * NUM_STATES + int(s0)]
+    return float(flip) if flip else prev_phase
+
+
+def candle_events(opens: np.ndarray, highs: np.ndarray, lows: np.ndarray, closes: np.ndarray) -> np.ndarray:
+    """Event codes for every candle; the first two candles have no event (state stays X)."""
+    n = len(highs)
+    events = np.zeros(n, dtype=np.int8)
+    if n < 3:
+        return events
+
+    hh = np.zeros(n, dtype=bool); hh[1:] = highs[1:] > highs[:-1]
+    lh = np.zeros(n, dtype=bool); lh[1:] = highs[1:] < highs[:-1]
+    hl = np.zeros(n, dtype=bool); hl[1:] = lows[1:] > lows[:-1]
+    ll = np.zeros(n, dtype=bool); ll[1:] = lows[1:] < lows[:-1]
+    green = closes > opens
+    red = closes < opens
+    inside = lh & hl
+    prev_inside = np.zeros(n, dtype=bool); prev_inside[1:] = inside[:-1]
+
+    events[:] = np.select(
+        [hh & hl, lh & ll, inside & prev_inside, inside, hh & ll & green, hh & ll & red, hh & ll],
+        [EV_UP, EV_DOWN, EV_INSIDE_AGAIN, EV_INSIDE, EV_OUTSIDE_GREEN, EV_OUTSIDE_RED, EV_OUTSIDE_DOJI],
+        default=EV_NONE
+    )
+    events[:2] = EV_NONE
+    return events
+
+
+def relative_candle_states(opens: np.ndarray, highs: np.ndarray, lows: np.ndarray, closes: np.ndarray) -> np.ndarray:
+    """
+    Integer-coded Relative Candles states for a full history.
+
+    Each candle's event selects a column of the transition table, i.e. a map state -> state.
+    The state at i is the composition of all maps up to i applied to X, computed with a
+    log-step prefix scan over the (n, NUM_STATES) map array instead of a per-row loop.
+    """
+    n = len(highs)
+    states = np.full(n, X, dtype=np.int8)
+    if n < 3:
+        return states
+
+    events = candle_events(opens, highs, lows, closes)
+    maps = TRANSITIONS[:, events[2:]].T.astype(np.intp)  # (n - 2, NUM_STATES)
+
+    step = 1
+    while step < len(maps):
+        # maps[i] <- maps[i] o maps[i - step]
+        composed = np.take_along_axis(maps[step:], maps[:-step], axis=1)
+        maps = np.concatenate([maps[:step], composed])
+        step *= 2
+
+    states[2:] = maps[:, X]
+    return states
+
+
+def relative_candle_phases(states: np.ndarray, first_green: bool) -> np.ndarray:
+    """Phase (+1 / -1) per candle from the 3-gram phase lookup, carried forward between flips."""
+    n = len(states)
+    initial = 1.0 if first_green else -1.0
+    phases = np.full(n, initial)
+    if n < 4:
+        return phases
+
+    s = states.astype(np.intp)
+    codes = (s[1:-2] * NUM_STATES + s[2:-1]) * NUM_STATES + s[3:]
+    flips = np.zeros(n, dtype=np.int8)
+    flips[3:] = PHASE_FLIPS[codes]
+
+    # Index of the latest flip at or before each candle (0 when none yet -> initial phase)
+    flip_idx = np.where(flips != 0, np.arange(n), 0)
+    np.maximum.accumulate(flip_idx, out=flip_idx)
+    has_flip = flip_idx > 0
+    phases[has_flip] = flips[flip_idx[has_flip]]
+    return phases
+
+
+def relative_candle_bodies(opens: np.ndarray, highs: np.ndarray, lows: np.ndarray, closes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Relative Candles Open/Close/Mode (drawing logic):
+    HH & !LL -> Bullish (O=L, C=H); LL & !HH -> Bearish (O=H, C=L);
+    HH & LL -> Outside, follows original candle color; else Inside (O=H, C=L).
+    The first candle keeps its original open/close.
+    """
+    n = len(highs)
+    rel_opens = np.array(opens, dtype=float, copy=True)
+    rel_closes = np.array(closes, dtype=float, copy=True)
+    rel_modes = np.full(n, 'Standard', dtype=object)
+    if n < 2:
+        return rel_opens, rel_closes, rel_modes
+
+    h, l, o, c = highs[1:], lows[1:], opens[1:], closes[1:]
+    hh = h > highs[:-1]
+    ll = l < lows[:-1]
+    bullish = (hh & ~ll) | (hh & ll & (o <= c))
+
+    rel_opens[1:] = np.where(bullish, l, h)
+    rel_closes[1:] = np.where(bullish, h, l)
+    rel_modes[1:][~hh & ~ll] = 'Inside'
+    return rel_opens, rel_closes, rel_modes
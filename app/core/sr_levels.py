@@ -0,0 +1,77 @@
+import bisect
+from collections import deque
+from typing import Iterable, Optional, Tuple
+
+
+class LevelPool:
+    """
+    Sorted pool of confirmed price levels (e.g. Williams Fractal bodies).
+    Closest-level lookups are binary searches instead of scanning every level.
+    """
+    def __init__(self, levels: Optional[Iterable[float]] = None):
+        self._levels = sorted(levels) if levels else []
+
+    def add(self, level: float):
+        bisect.insort(self._levels, level)
+
+    def remove(self, level: float):
+        idx = bisect.bisect_left(self._levels, level)
+        if idx < len(self._levels) and self._levels[idx] == level:
+            del self._levels[idx]
+
+    def below(self, price: float) -> Optional[float]:
+        """Highest level strictly below price."""
+        idx = bisect.bisect_left(self._levels, price)
+        return self._levels[idx - 1] if idx > 0 else None
+
+    def above(self, price: float) -> Optional[float]:
+        """Lowest level strictly above price."""
+        idx = bisect.bisect_right(self._levels, price)
+        return self._levels[idx] if idx < len(self._levels) else None
+
+    def __len__(self):
+        return len(self._levels)
+
+    def __iter__(self):
+        return iter(self._levels)
+
+
+class ClosestLevelsTracker:
+    """
+    Streaming Closest Support/Resistance.
+
+    Support levels come from confirmed down fractals, resistance levels from confirmed up
+    fractals. Once a level is confirmed it stays in the pool, so when price breaks a support
+    the next one down becomes the closest support automatically. Levels confirmed with the
+    time of their fractal (`at`) can be dropped again with `expire` once that time leaves
+    the analysed window.
+    """
+    def __init__(self):
+        self.supports = LevelPool()
+        self.resistances = LevelPool()
+        self._confirmed = deque()  # (at, pool, level) in confirmation order
+
+    def confirm(self, support: Optional[float] = None, resistance: Optional[float] = None, at: Optional[int] = None):
+        if support is not None:
+            self.supports.add(support)
+            if at is not None:
+                self._confirmed.append((at, self.supports, support))
+        if resistance is not None:
+            self.resistances.add(resistance)
+            if at is not None:
+                self._confirmed.append((at, self.resistances, resistance))
+
+    def expire(self, before: int):
+        """Drops the levels confirmed with a time older than `before`."""
+        confirmed = self._confirmed
+        while confirmed and confirmed[0][0] < before:
+            _, pool, level = confirmed.popleft()
+            pool.remove(level)
+
+    def closest(self, price: float) -> Tuple[Optional[float], Optional[float]]:
+        return self.supports.below(price), self.resistances.above(price)
+
+    def update(self, price: float, support: Optional[float] = None, resistance: Optional[float] = None) -> Tuple[Optional[float], Optional[float]]:
+        """Confirms the levels (if any) that became known with a new bar and returns the closest levels for it."""
+        self.confirm(support, resistance)
+        return self.closest(price)
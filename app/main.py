@@ -1,4 +1,5 @@
 from fastapi import FastAPI, BackgroundTasks, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from app.core.logger import logger
 from fastapi.staticfiles import StaticFiles
 from app.agents.governor_agent import governor
@@ -12,6 +13,7 @@ import numpy as np
 import asyncio
 import uvicorn
 import time
+from collections.abc import Mapping
 
 from contextlib import asynccontextmanager
 
@@ -110,6 +112,23 @@ async def get_agent_events(name: str, limit: int = 50):
             raise HTTPException(status_code=404, detail=f"Agent {name} not found")
     return {"agent_name": name, "events": events, "count": len(events)}
 
+@app.get("/event-bus/subscribers")
+async def get_event_bus_subscribers():
+    """Per-subscriber inbox depth, lag and handler counters"""
+    subscribers = event_bus.get_subscriber_stats()
+    return {
+        "dispatch_mode": event_bus.dispatch_mode,
+        "transport": event_bus.transport.get_status(),
+        "subscribers": subscribers,
+        "count": len(subscribers),
+        "analysis_watchers": AnalysisManager.get_watcher_stats()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Event bus metrics in the Prometheus text exposition format"""
+    return PlainTextResponse(event_bus.metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/agents/{name}/activate")
 async def activate_agent(name: str):
     """Activate a specific agent (Task 2)"""
@@ -256,6 +275,11 @@ async def get_analysis_symbols():
     """Get list of symbols with analysis objects (Task 2)"""
     return await AnalysisManager.get_all_symbols()
 
+@app.get("/analysis/memory")
+async def get_analysis_memory():
+    """Estimated memory per symbol and section of the analysis objects, and what is spilled to disk"""
+    return AnalysisManager.memory_report()
+
 @app.get("/analysis/{symbol:path}")
 async def get_analysis_data(symbol: str):
     """Get full analysis object for a symbol (Task 2)"""
@@ -282,13 +306,34 @@ async def get_prompt_content(path: str):
     agent, task = parts
     return PromptLoader.get_raw(agent, task)
 
+def _frame_column(col: pd.Series) -> list:
+    values = col.to_numpy()
+    if values.dtype.kind == 'f':
+        if values.dtype == np.float32:
+            # Round to float32 precision so 68000.1 isn't reported as 68000.1015625
+            values = values.astype(np.float64)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                scale = 10.0 ** (7 - np.ceil(np.log10(np.abs(values))))
+                rounded = np.round(values * scale) / scale
+            values = np.where(np.isfinite(rounded), rounded, values)
+        missing = np.flatnonzero(np.isnan(values)).tolist()
+        values = values.tolist()
+        for i in missing:
+            values[i] = None
+        return values
+    if values.dtype.kind in 'iub':
+        return values.tolist()
+    return col.astype(object).where(col.notna(), None).tolist()
+
 def serialize_analysis_data(obj):
     if isinstance(obj, pd.DataFrame):
         # Only take last 100 rows to keep response size manageable
-        return obj.tail(100).replace({np.nan: None}).to_dict(orient='records')
-    elif isinstance(obj, dict):
+        tail = obj.tail(100)
+        names = list(tail.columns)
+        return [dict(zip(names, row)) for row in zip(*(_frame_column(col) for _, col in tail.items()))]
+    elif isinstance(obj, Mapping):
         return {k: serialize_analysis_data(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
+    elif isinstance(obj, (list, tuple)):
         return [serialize_analysis_data(v) for v in obj]
     elif hasattr(obj, 'item'): # numpy types
         return obj.item()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from app.core.database import Base
@@ -15,6 +15,11 @@ class CandleModel(Base):
     close = Column(Float)
     volume = Column(Float)
 
+    __table_args__ = (
+        # One row per candle; also the conflict target for bulk upserts
+        Index("uq_candles_symbol_timeframe_timestamp", "symbol", "timeframe", "timestamp", unique=True),
+    )
+
 class SignalModel(Base):
     __tablename__ = "signals"
     id = Column(Integer, primary_key=True, index=True)
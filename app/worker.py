@@ -0,0 +1,80 @@
+"""
+Runs some agents in a separate process, connected to the main process through the event
+broker (EVENT_BUS_TRANSPORT=socket). List the same agents in WORKER_AGENTS so the
+GovernorAgent doesn't also run them:
+
+    EVENT_BUS_TRANSPORT=socket WORKER_AGENTS=ExecutionAgent,AuditLogAgent python -m app.worker ExecutionAgent AuditLogAgent
+
+Only events cross processes. AnalysisManager objects stay per process, so agents that read
+or write analysis sections (PROCESS_LOCAL_AGENTS) are refused here and always run in the
+main process.
+"""
+import argparse
+import asyncio
+import importlib
+from typing import List
+from app.core.logger import logger
+from app.core.config import settings
+from app.core.event_bus import event_bus
+
+AGENT_MODULES = {
+    "MarketDataAgent": "app.agents.market_data_agent",
+    "ValueAreasAgent": "app.agents.value_areas_agent",
+    "MarketStructureAgent": "app.agents.market_structure_agent",
+    "RegimeDetectionAgent": "app.agents.regime_detection_agent",
+    "EMAStrategyAgent": "app.agents.ema_strategy_agent",
+    "CyclesStrategyAgent": "app.agents.cycles_strategy_agent",
+    "BounceStrategyAgent": "app.agents.bounce_strategy_agent",
+    "SupportResistanceAgent": "app.agents.support_resistance_agent",
+    "FibonacciAgent": "app.agents.fibonacci_agent",
+    "AnchoredVWAPAgent": "app.agents.anchored_vwap_agent",
+    "SFPStrategyAgent": "app.agents.sfp_strategy_agent",
+    "AnalystAgent": "app.agents.analyst_agent",
+    "TraderAgent": "app.agents.trader_agent",
+    "AggregatorAgent": "app.agents.aggregator_agent",
+    "RiskAgent": "app.agents.risk_agent",
+    "ExecutionAgent": "app.agents.execution_agent",
+    "AuditLogAgent": "app.agents.audit_log_agent",
+    "AnomalyDetectionAgent": "app.agents.anomaly_detection_agent",
+}
+
+# Agents that read or write AnalysisManager sections, which don't cross processes
+PROCESS_LOCAL_AGENTS = {
+    "MarketDataAgent", "ValueAreasAgent", "MarketStructureAgent", "RegimeDetectionAgent",
+    "EMAStrategyAgent", "CyclesStrategyAgent", "BounceStrategyAgent", "SupportResistanceAgent",
+    "FibonacciAgent", "AnchoredVWAPAgent", "SFPStrategyAgent", "AnalystAgent", "TraderAgent",
+    "RiskAgent", "AnomalyDetectionAgent",
+}
+
+
+def create_agent(name: str):
+    if name not in AGENT_MODULES:
+        raise ValueError(f"Unknown agent {name!r}, expected one of: {', '.join(AGENT_MODULES)}")
+    if name in PROCESS_LOCAL_AGENTS:
+        raise ValueError(f"{name} uses AnalysisManager sections and must run in the main process")
+    return getattr(importlib.import_module(AGENT_MODULES[name]), name)()
+
+
+async def run_worker(agent_names: List[str]):
+    if settings.EVENT_BUS_TRANSPORT != "socket":
+        raise SystemExit("app.worker needs EVENT_BUS_TRANSPORT=socket")
+    agents = [create_agent(name) for name in agent_names]
+    missing = [name for name in agent_names if name not in settings.WORKER_AGENTS]
+    if missing:
+        logger.warning(f"Worker: {', '.join(missing)} not in WORKER_AGENTS, the main process runs them too")
+
+    await event_bus.start()
+    logger.info(f"Worker: running {', '.join(agent_names)} via event broker {settings.EVENT_BUS_SOCKET}")
+    try:
+        await asyncio.gather(*(agent.start() for agent in agents))
+    finally:
+        for agent in agents:
+            await agent.stop()
+        await event_bus.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run agents in a worker process")
+    parser.add_argument("agents", nargs="+", help="Agent class names, e.g. ExecutionAgent AuditLogAgent")
+    args = parser.parse_args()
+    asyncio.run(run_worker(args.agents))
@@ -0,0 +1,267 @@
+import asyncio
+import gc
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from collections import OrderedDict
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from app.core.analysis import AnalysisManager, AnalysisObject, SpilledSection, compact_frame
+from app.core.event_bus import event_bus
+from app.main import serialize_analysis_data
+
+
+class TestAnalysisSnapshots(unittest.IsolatedAsyncioTestCase):
+    async def test_snapshot_is_unaffected_by_later_updates(self):
+        analysis = AnalysisObject("BTC")
+        await analysis.update_section("market_structure", {"highs": "HH"}, "1h")
+        before = await analysis.get_data()
+        version = analysis.version
+
+        await analysis.update_section("market_structure", {"highs": "LH"}, "1h")
+        await analysis.update_section("market_regime", {"overall": "BULL"})
+        after = await analysis.get_data()
+
+        self.assertEqual(before["market_structure"]["1h"]["highs"], "HH")
+        self.assertEqual(before["market_regime"]["overall"], "UNDEFINED")
+        self.assertEqual(after["market_structure"]["1h"]["highs"], "LH")
+        self.assertEqual(after["market_regime"]["overall"], "BULL")
+        self.assertEqual(analysis.version, version + 2)
+        # Untouched sections are shared between versions
+        self.assertIs(before._data["value_areas"], after._data["value_areas"])
+
+    async def test_snapshot_is_read_only(self):
+        analysis = AnalysisObject("BTC")
+        data = await analysis.get_data()
+        with self.assertRaises(TypeError):
+            data["market_regime"]["1h"] = "BULL"
+        self.assertIsInstance(data["market_structure"]["1h"]["analysis"], tuple)
+        self.assertEqual(repr(data["value_areas"]["1h"]), repr(analysis.data["value_areas"]["1h"]))
+        self.assertIs(await analysis.get_data(), data)  # cached until the next update
+
+    async def test_reader_frame_changes_stay_private(self):
+        analysis = AnalysisObject("BTC")
+        df = pd.DataFrame({"Close": np.arange(50, dtype=float)})
+        await analysis.update_section("market_data", df, "1h")
+
+        mine = (await analysis.get_data())["market_data"]["1h"]
+        mine["RSI_14"] = 1.0
+        mine.loc[mine.index[-1], "Close"] = -1.0
+
+        theirs = (await analysis.get_data())["market_data"]["1h"]
+        self.assertNotIn("RSI_14", theirs.columns)
+        self.assertEqual(theirs["Close"].iloc[-1], 49.0)
+        self.assertEqual(list(df.columns), ["Close"])
+
+
+class TestAnalysisWatchers(unittest.IsolatedAsyncioTestCase):
+    def watch(self, *args, **kwargs):
+        watcher = AnalysisManager.watch(*args, **kwargs)
+        self.addCleanup(AnalysisManager.unwatch, watcher)
+        return watcher
+
+    async def test_watchers_get_matching_changes_with_value(self):
+        changes = {"structure_1h": [], "structure": [], "regime": []}
+        self.watch("market_structure", changes["structure_1h"].append, timeframe="1h")
+        self.watch("market_structure", changes["structure"].append, symbol=["BTC", "ETH"])
+        self.watch("market_regime", changes["regime"].append)
+
+        btc, sol = AnalysisObject("BTC"), AnalysisObject("SOL")
+        await btc.update_section("market_structure", {"highs": "HH"}, "1h")
+        await btc.update_section("market_structure", {"highs": "LL"}, "4h")
+        await sol.update_section("market_structure", {"highs": "HH"}, "1h")
+        await btc.update_section("market_regime", {"overall": "BULL"})
+        await asyncio.sleep(0.05)
+
+        self.assertEqual([(c["symbol"], c["timeframe"]) for c in changes["structure_1h"]], [("BTC", "1h"), ("SOL", "1h")])
+        self.assertEqual([c["timeframe"] for c in changes["structure"]], ["1h", "4h"])
+        first = changes["structure"][0]
+        self.assertEqual((first["section"], first["version"], first["value"]["highs"]), ("market_structure", 1, "HH"))
+        self.assertEqual(changes["regime"][0]["value"]["overall"], "BULL")
+        self.assertIsNone(changes["regime"][0]["timeframe"])
+
+    async def test_pending_changes_coalesce_and_versions_are_per_timeframe(self):
+        release = asyncio.Event()
+        seen = []
+
+        async def slow(change):
+            await release.wait()
+            seen.append((change["timeframe"], change["version"]))
+
+        watcher = self.watch("market_structure", slow)
+        analysis = AnalysisObject("BTC")
+        for highs in ["HH", "LH", "LL"]:
+            await analysis.update_section("market_structure", {"highs": highs}, "1h")
+            await asyncio.sleep(0)
+        await analysis.update_section("market_structure", {"highs": "HH"}, "4h")
+        release.set()
+        await watcher.join()
+
+        self.assertEqual(seen, [("1h", 1), ("1h", 3), ("4h", 1)])
+        self.assertEqual(watcher.coalesced, 1)
+        self.assertEqual(analysis.get_version("market_structure", "1h"), 3)
+        self.assertEqual(analysis.get_version("market_regime"), 0)
+        self.assertEqual(analysis.get_section("market_structure", "1h")["highs"], "LL")
+
+    async def test_deliveries_are_counted_in_bus_metrics(self):
+        watcher = self.watch("value_areas", lambda change: None)
+        counter = event_bus.metrics.analysis_updates
+        before = counter.get("value_areas", watcher.name)
+        analysis = AnalysisObject("BTC")
+        await analysis.update_section("value_areas", {"poc": 1.0}, "1h")
+        await analysis.update_section("value_areas", {"poc": 2.0}, "4h")
+        self.assertEqual(counter.get("value_areas", watcher.name), before + 2)
+        self.assertIn("eventbus_analysis_updates_total", event_bus.metrics.render())
+
+    async def test_unwatch_stops_notifications(self):
+        seen = []
+        watcher = AnalysisManager.watch("vpvr", seen.append)
+        AnalysisManager.unwatch(watcher)
+        await AnalysisObject("BTC").update_section("vpvr", {"data": [1]}, "1h")
+        await asyncio.sleep(0.01)
+        self.assertEqual(seen, [])
+        self.assertNotIn(watcher, AnalysisManager._watchers)
+
+
+class TestAnalysisMemory(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        instances = patch.object(AnalysisManager, '_instances', OrderedDict())
+        instances.start()
+        self.addCleanup(instances.stop)
+        self.spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spill_dir, True)
+
+    def frame(self, rows=5000):
+        return pd.DataFrame({"Close": np.random.rand(rows), "Volume": np.random.rand(rows)})
+
+    async def test_memory_usage_per_section(self):
+        analysis = await AnalysisManager.get_analysis("BTC")
+        await analysis.update_section("market_data", self.frame(), "1h")
+        usage = analysis.memory_usage()
+        self.assertGreater(usage["market_data"], 2 * 5000 * 8)
+        self.assertLess(usage["value_areas"], usage["market_data"])
+
+        report = AnalysisManager.memory_report()
+        self.assertEqual(report["symbols"]["BTC"]["sections"], usage)
+        self.assertEqual(report["total_bytes"], sum(usage.values()))
+
+    async def test_spilled_section_reads_from_disk_until_updated(self):
+        analysis = await AnalysisManager.get_analysis("BTC/USDT")
+        df = self.frame()
+        await analysis.update_section("market_data", df, "1h")
+        analysis.section_updated["market_data"] -= 100
+
+        released = await analysis.spill(self.spill_dir, idle_seconds=60)
+        self.assertEqual(released, analysis.spilled_usage()["market_data"])
+        self.assertIsInstance(analysis.data["market_data"], SpilledSection)
+        self.assertLess(analysis.memory_usage()["market_data"], 1024)
+        self.assertEqual(len(os.listdir(self.spill_dir)), 1)
+        self.assertTrue((analysis.get_section("market_data", "1h")["Close"] == df["Close"]).all())
+
+        await analysis.update_section("market_data", self.frame(10), "5m")
+        self.assertEqual(sorted(k for k, v in analysis.data["market_data"].items() if v is not None), ["1h", "5m"])
+        self.assertEqual(analysis.spilled_usage(), {})
+        gc.collect()
+        self.assertEqual(os.listdir(self.spill_dir), [])  # no version refers to the file anymore
+
+    async def test_reading_a_spilled_section_keeps_it_loaded(self):
+        analysis = await AnalysisManager.get_analysis("ETH/USDT")
+        df = self.frame()
+        await analysis.update_section("market_data", df, "1h")
+        analysis.section_updated["market_data"] -= 100
+        await analysis.spill(self.spill_dir, idle_seconds=60)
+
+        with patch("app.core.analysis.asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+            data = await analysis.get_data()
+            self.assertTrue((data["market_data"]["1h"]["Close"] == df["Close"]).all())
+            await analysis.get_data()
+        self.assertEqual(to_thread.call_count, 1)
+        self.assertEqual(analysis.spilled_usage(), {})
+        self.assertIsInstance(analysis.data["market_data"], dict)
+
+    async def test_enforce_budget_evicts_idle_then_least_recently_used(self):
+        for symbol in ["A", "B", "C", "D"]:
+            analysis = await AnalysisManager.get_analysis(symbol)
+            await analysis.update_section("market_data", self.frame(), "1h")
+        AnalysisManager._instances["A"].last_access = time.monotonic() - 1000
+        await AnalysisManager.get_analysis("B")  # B is now the most recently used
+
+        per_symbol = sum(AnalysisManager._instances["C"].memory_usage().values())
+        result = await AnalysisManager.enforce_budget(budget_bytes=int(per_symbol * 1.5), idle_seconds=500,
+                                                      spill_dir="", active=["B", "D"])
+        self.assertEqual(result["idle_evicted"], 1)
+        self.assertEqual(result["lru_evicted"], 1)  # C; the active symbols stay even though still above budget
+        self.assertEqual(list(AnalysisManager._instances), ["D", "B"])
+
+    async def test_enforce_budget_never_evicts_active_symbols(self):
+        for symbol in ["A", "B"]:
+            analysis = await AnalysisManager.get_analysis(symbol)
+            await analysis.update_section("market_data", self.frame(), "1h")
+        with self.assertLogs("Analysis", "WARNING"):
+            result = await AnalysisManager.enforce_budget(budget_bytes=1024, idle_seconds=500, spill_dir="")
+        self.assertEqual(result["lru_evicted"], 0)
+        self.assertEqual(list(AnalysisManager._instances), ["A", "B"])
+
+
+class TestCompactMarketData(unittest.IsolatedAsyncioTestCase):
+    def frame(self, rows=300):
+        df = pd.DataFrame({
+            "timestamp": np.arange(rows, dtype=np.int64) * 60000,
+            "Close": 68000 + np.random.rand(rows),
+            "Williams Fractals Up": np.where(np.arange(rows) % 5 == 0, 68000.15, np.nan),
+            "Heikin Ashi Close": 68000 + np.random.rand(rows),
+            "Exponential Moving Average 9": 68000 + np.random.rand(rows),
+            "RSI_14": np.random.rand(rows) * 100,
+            "Relative Candles Mode": np.where(np.arange(rows) % 2 == 0, "expansion", "contraction"),
+            "Relative Candles Phase": np.where(np.arange(rows) % 7 < 4, 1.0, -1.0),
+            "Closest Support": [None] * rows,
+        })
+        df.loc[:10, "RSI_14"] = np.nan
+        return df
+
+    async def test_stored_frame_is_compact(self):
+        df = self.frame()
+        analysis = AnalysisObject("BTC")
+        await analysis.update_section("market_data", df, "1h")
+        stored = analysis.get_section("market_data", "1h")
+
+        self.assertEqual(list(stored.columns), list(df.columns))
+        self.assertEqual(stored["Close"].dtype, np.float64)
+        self.assertEqual(stored["Williams Fractals Up"].dtype, np.float64)
+        self.assertEqual(stored["Heikin Ashi Close"].dtype, np.float64)
+        self.assertEqual(stored["Exponential Moving Average 9"].dtype, np.float64)
+        self.assertEqual(stored["RSI_14"].dtype, np.float32)
+        self.assertEqual(stored["Relative Candles Mode"].dtype, "category")
+        self.assertEqual(stored["Relative Candles Phase"].dtype, np.int8)
+        self.assertEqual(stored["Closest Support"].dtype, object)
+        self.assertTrue((stored["Relative Candles Phase"] == df["Relative Candles Phase"]).all())
+        self.assertTrue((stored["Close"] == df["Close"]).all())
+        np.testing.assert_allclose(stored["RSI_14"], df["RSI_14"], rtol=1e-6)
+        self.assertLess(stored.memory_usage(deep=True).sum(), df.memory_usage(deep=True).sum() / 1.5)
+
+    def test_phases_with_gaps_stay_floats(self):
+        df = pd.DataFrame({"Relative Candles Phase": [np.nan, 1.0, -1.0]})
+        self.assertEqual(compact_frame(df)["Relative Candles Phase"].dtype, np.float32)
+
+    def test_nothing_to_compact_returns_frame(self):
+        df = pd.DataFrame({"Close": [1.0, 2.0], "timestamp": [1, 2]})
+        self.assertIs(compact_frame(df), df)
+
+    def test_serialized_frame_matches_original_values(self):
+        df = self.frame(150)
+        records = serialize_analysis_data(compact_frame(df))
+        expected = serialize_analysis_data(df)
+        self.assertEqual(len(records), 100)
+        self.assertEqual([r["Close"] for r in records], [r["Close"] for r in expected])
+        self.assertEqual(records[0]["Relative Candles Mode"], "expansion")
+        self.assertIsNone(serialize_analysis_data(compact_frame(self.frame(20)))[0]["RSI_14"])
+        # float32 values come out rounded to their precision, not as 68000.4765625-style expansions
+        for record, original in zip(records, expected):
+            self.assertEqual(record["RSI_14"], float(f"{np.float32(original['RSI_14']):.7g}"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import numpy as np
+import pandas as pd
+from app.agents.market_data_agent import MarketDataAgent
+from app.core.candle_buffer import CandleBuffer
+from tests.test_indicator_engine import make_ohlcv
+
+
+def frame(n: int, start: int = 0) -> pd.DataFrame:
+    ts = np.arange(start, start + n, dtype='int64')
+    return pd.DataFrame({'timestamp': ts, 'Close': ts.astype(float), 'Mode': ['Standard'] * n})
+
+
+def append_row(buf: CandleBuffer, ts: int):
+    i = buf.append()
+    buf.columns['timestamp'][i] = ts
+    buf.columns['Close'][i] = float(ts)
+    buf.columns['Mode'][i] = 'Inside'
+
+
+class TestCandleBuffer(unittest.TestCase):
+    def test_load_keeps_newest_capacity_rows(self):
+        buf = CandleBuffer("BTC-USDT", "5m", capacity=10)
+        buf.load(frame(25))
+        self.assertEqual(len(buf), 10)
+        np.testing.assert_array_equal(buf.view('timestamp'), np.arange(15, 25))
+
+    def test_append_compacts_and_window_stays_bounded(self):
+        buf = CandleBuffer("BTC-USDT", "5m", capacity=10)
+        buf.load(frame(10))
+        for ts in range(10, 100):
+            append_row(buf, ts)
+            self.assertEqual(len(buf), 10)
+            self.assertEqual(buf.latest('timestamp'), ts)
+        np.testing.assert_array_equal(buf.view('Close'), np.arange(90, 100, dtype=float))
+        self.assertEqual(len(buf.columns['timestamp']), 20)
+        self.assertEqual(list(buf.view('Mode')), ['Inside'] * 10)
+
+    def test_views_are_read_only_and_alias_the_buffer(self):
+        buf = CandleBuffer("BTC-USDT", "5m", capacity=10)
+        buf.load(frame(10))
+        view = buf.view('Close', n=3)
+        self.assertTrue(np.shares_memory(view, buf.columns['Close']))
+        with self.assertRaises(ValueError):
+            view[0] = 1.0
+
+        # In-place rewrites (forming candle, fractal centers) show through existing views
+        buf.columns['Close'][buf.size - 1] = 42.0
+        buf.touch()
+        self.assertEqual(view[-1], 42.0)
+
+    def test_views_survive_compaction(self):
+        buf = CandleBuffer("BTC-USDT", "5m", capacity=10)
+        buf.load(frame(10))
+        for ts in range(10, 20):
+            append_row(buf, ts)
+        old = buf.view('timestamp')
+        version = buf.version
+        append_row(buf, 20)  # backing arrays full -> compaction
+        self.assertGreater(buf.version, version)
+        np.testing.assert_array_equal(old, np.arange(10, 20))
+        np.testing.assert_array_equal(buf.view('timestamp'), np.arange(11, 21))
+
+
+class TestEngineBuffer(unittest.TestCase):
+    def test_market_data_agent_keeps_one_buffer_per_engine(self):
+        agent = MarketDataAgent()
+        rows = make_ohlcv(320, seed=3)
+        agent.update_indicators("STORE-USDT", "5m", rows[:300])
+        for k in range(300, len(rows)):
+            df = agent.update_indicators("STORE-USDT", "5m", rows[k - 1:k + 1])
+
+        buf = agent.indicator_engines[("STORE-USDT", "5m")].buffer
+        np.testing.assert_array_equal(buf.view('Close'), df['Close'].to_numpy())
+        np.testing.assert_array_equal(buf.view('Closest Support'), df['Closest Support'].to_numpy())
+        self.assertEqual(agent.get_status()["config"]["candle_buffer_bytes"], buf.nbytes)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+from unittest.mock import patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.agents.market_data_agent import MarketDataAgent, UPSERT_CHUNK_ROWS
+from app.models.models import Base, CandleModel
+
+
+def make_candles(n: int, start: int = 1_700_000_000_000, tf_ms: int = 60_000, close: float = 100.0):
+    return [[start + i * tf_ms, close, close + 1, close - 1, close, 10.0] for i in range(n)]
+
+
+class TestCandlePersistence(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        patcher = patch('app.agents.market_data_agent.SessionLocal', self.Session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.agent = MarketDataAgent()
+
+        self.statements = []
+        self.params = []
+        event.listen(self.engine, "before_cursor_execute", self.record_statement)
+
+    def record_statement(self, conn, cursor, statement, params, context, executemany):
+        self.statements.append(statement)
+        self.params.append(params)
+
+    def stored(self):
+        with self.Session() as db:
+            return db.query(CandleModel).order_by(CandleModel.timestamp).all()
+
+    def test_bulk_upsert_single_statement(self):
+        self.agent.persist_candles("BTC-USDT", "1m", make_candles(300))
+        inserts = [s for s in self.statements if s.lstrip().upper().startswith("INSERT")]
+        self.assertEqual(len(inserts), 1)
+        self.assertIn("ON CONFLICT", inserts[0].upper())
+        self.assertEqual(len(self.stored()), 300)
+
+    def test_large_backfill_is_chunked(self):
+        self.agent.persist_candles("BTC-USDT", "1m", make_candles(UPSERT_CHUNK_ROWS * 2 + 100))
+        inserts = [p for s, p in zip(self.statements, self.params) if s.lstrip().upper().startswith("INSERT")]
+        self.assertEqual([len(p) for p in inserts], [UPSERT_CHUNK_ROWS * 8, UPSERT_CHUNK_ROWS * 8, 100 * 8])
+        self.assertEqual(len(self.stored()), UPSERT_CHUNK_ROWS * 2 + 100)
+
+    def test_only_newer_candles_are_sent_and_forming_candle_is_refreshed(self):
+        candles = make_candles(300)
+        self.agent.persist_candles("BTC-USDT", "1m", candles)
+
+        # Next poll: same window shifted by one, the previously last candle closed at a new price
+        nxt = make_candles(301)[1:]
+        nxt[-2][4] = 105.0
+        self.statements.clear()
+        with patch.object(self.agent, "_upsert_candles", wraps=self.agent._upsert_candles) as upsert:
+            self.agent.persist_candles("BTC-USDT", "1m", nxt)
+            rows = upsert.call_args[0][2]
+        self.assertEqual(len(rows), 2)
+
+        stored = self.stored()
+        self.assertEqual(len(stored), 301)
+        self.assertEqual(stored[-2].close, 105.0)
+
+    def test_duplicates_are_ignored_across_agents(self):
+        candles = make_candles(50)
+        self.agent.persist_candles("BTC-USDT", "1m", candles)
+        # A fresh agent has no in-memory watermark yet and resends an overlapping window
+        other = MarketDataAgent()
+        other.persist_candles("BTC-USDT", "1m", make_candles(60))
+        other.persist_candles("BTC-USDT", "5m", candles)
+        with self.Session() as db:
+            self.assertEqual(db.query(CandleModel).filter(CandleModel.timeframe == "1m").count(), 60)
+            self.assertEqual(db.query(CandleModel).filter(CandleModel.timeframe == "5m").count(), 50)
+
+    def test_cached_data_returns_latest_window(self):
+        self.agent.persist_candles("BTC-USDT", "1m", make_candles(500))
+        self.agent.persist_candles("ETH-USDT", "1m", make_candles(600, close=50.0))
+
+        cached = self.agent.get_cached_data("BTC-USDT", "1m")
+        expected = make_candles(500)[-300:]
+        self.assertEqual(len(cached), 300)
+        self.assertEqual([c[0] for c in cached], [c[0] for c in expected])
+        self.assertEqual(cached[-1][1:], expected[-1][1:])
+        self.assertIsNone(self.agent.get_cached_data("BTC-USDT", "5m"))
+
+    def test_cached_data_query_uses_composite_index(self):
+        self.agent.persist_candles("BTC-USDT", "1m", make_candles(10))
+        self.statements.clear()
+        self.params.clear()
+        self.agent.get_cached_data("BTC-USDT", "1m")
+        select, params = next((s, p) for s, p in zip(self.statements, self.params) if s.lstrip().upper().startswith("SELECT"))
+        with self.engine.connect() as conn:
+            plan = " ".join(str(r[-1]) for r in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + select, params))
+        self.assertIn("uq_candles_symbol_timeframe_timestamp", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,420 @@
+import asyncio
+import logging
+from datetime import datetime
+import unittest
+from unittest.mock import patch
+import numpy as np
+from app.core import event_bus as event_bus_module
+from app.core.event_bus import BackpressurePolicy, Event, EventBus, EventType, InboxPolicy, RequestError
+from app.core.event_payloads import MarketDataPayload
+
+
+class TestEventBusInboxes(unittest.IsolatedAsyncioTestCase):
+    async def test_slow_subscriber_does_not_block_fast_one(self):
+        bus = EventBus()
+        release = asyncio.Event()
+        fast_seen, slow_seen = [], []
+
+        async def slow(data):
+            await release.wait()
+            slow_seen.append(data["n"])
+
+        async def fast(data):
+            fast_seen.append(data["n"])
+
+        bus.subscribe(EventType.SIGNAL, slow)
+        bus.subscribe(EventType.SIGNAL, fast)
+        for n in range(5):
+            await bus.publish(EventType.SIGNAL, {"n": n})
+
+        for _ in range(100):
+            if len(fast_seen) == 5:
+                break
+            await asyncio.sleep(0.001)
+        self.assertEqual(fast_seen, [0, 1, 2, 3, 4])
+        self.assertEqual(slow_seen, [])
+
+        stats = {s["subscriber"].split(".")[-1]: s for s in bus.get_subscriber_stats()}
+        self.assertEqual(stats["slow"]["queue_depth"], 4)
+        self.assertGreater(stats["slow"]["busy_ms"], 0)
+        self.assertEqual(stats["fast"]["processed"], 5)
+
+        release.set()
+        await bus.drain()
+        self.assertEqual(slow_seen, [0, 1, 2, 3, 4])
+        stats = {s["subscriber"].split(".")[-1]: s for s in bus.get_subscriber_stats()}
+        self.assertEqual(stats["slow"]["queue_depth"], 0)
+        self.assertGreater(stats["slow"]["max_lag_ms"], 0)
+
+    async def test_errors_are_counted_and_isolated(self):
+        bus = EventBus()
+        seen = []
+
+        def broken(data):
+            raise RuntimeError("boom")
+
+        bus.subscribe(EventType.AGENT_LOG, broken)
+        bus.subscribe(EventType.AGENT_LOG, lambda data: seen.append(data))
+        await bus.publish(EventType.AGENT_LOG, {"agent": "X"})
+        await bus.drain()
+        self.assertEqual(len(seen), 1)
+        self.assertEqual([s["errors"] for s in bus.get_subscriber_stats()], [1, 0])
+
+    async def test_market_data_coalesces_per_symbol_timeframe(self):
+        bus = EventBus()
+        release = asyncio.Event()
+        seen = []
+
+        async def slow(data):
+            await release.wait()
+            seen.append((data["symbol"], data["timeframe"], data["n"]))
+
+        bus.subscribe(EventType.MARKET_DATA, slow)
+        await bus.publish(EventType.MARKET_DATA, {"symbol": "BTC", "timeframe": "5m", "n": 0})
+        await asyncio.sleep(0.01)  # n=0 is being handled
+        for n in range(1, 6):
+            for symbol in ("BTC", "ETH"):
+                await bus.publish(EventType.MARKET_DATA, {"symbol": symbol, "timeframe": "5m", "n": n})
+        await bus.publish(EventType.MARKET_DATA, {"symbol": "BTC", "timeframe": "1h", "n": 6})
+        await asyncio.sleep(0.01)
+        self.assertEqual(bus.get_subscriber_stats()[0]["queue_depth"], 3)
+
+        release.set()
+        await bus.drain()
+        self.assertEqual(seen, [("BTC", "5m", 0), ("BTC", "5m", 5), ("ETH", "5m", 5), ("BTC", "1h", 6)])
+        self.assertEqual(bus.get_subscriber_stats()[0]["coalesced"], 8)
+
+    async def test_agent_log_drops_oldest(self):
+        bus = EventBus(policies={EventType.AGENT_LOG: InboxPolicy(BackpressurePolicy.DROP_OLDEST, 3)})
+        release = asyncio.Event()
+        seen = []
+
+        async def slow(data):
+            await release.wait()
+            seen.append(data["n"])
+
+        bus.subscribe(EventType.AGENT_LOG, slow)
+        for n in range(10):
+            await bus.publish(EventType.AGENT_LOG, {"n": n})
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        release.set()
+        await bus.drain()
+        self.assertEqual(seen, [0, 7, 8, 9])
+        self.assertEqual(bus.get_subscriber_stats()[0]["dropped"], 6)
+
+    async def test_critical_events_are_never_dropped_or_blocked(self):
+        bus = EventBus(inbox_size=2)
+        bus.set_policy(EventType.MARKET_DATA, InboxPolicy(BackpressurePolicy.DROP_OLDEST, 1))
+        stuck = asyncio.Event()
+        orders, exits = [], []
+
+        async def stuck_market_data(data):
+            await stuck.wait()
+
+        async def slow_orders(data):
+            await asyncio.sleep(0.001)
+            orders.append(data["n"])
+
+        bus.subscribe(EventType.MARKET_DATA, stuck_market_data)
+        bus.subscribe(EventType.ORDER_REQUEST, slow_orders)
+        bus.subscribe(EventType.EMERGENCY_EXIT, lambda data: exits.append(data))
+
+        for n in range(20):
+            await bus.publish(EventType.MARKET_DATA, {"symbol": "BTC", "timeframe": "5m", "n": n})
+            await bus.publish(EventType.ORDER_REQUEST, {"n": n})
+        await bus.publish(EventType.EMERGENCY_EXIT, {"reason": "test"})
+
+        for _ in range(200):
+            if exits and len(orders) == 20:
+                break
+            await asyncio.sleep(0.005)
+        self.assertEqual(len(exits), 1)
+        self.assertEqual(orders, list(range(20)))
+        stats = {s["event_type"]: s for s in bus.get_subscriber_stats()}
+        self.assertEqual(stats["order_request"]["dropped"], 0)
+        self.assertLessEqual(stats["market_data"]["queue_depth"], 1)
+        stuck.set()
+        await bus.drain()
+
+    async def test_unsubscribe_and_sequential_mode(self):
+        bus = EventBus(dispatch_mode="sequential")
+        seen = []
+
+        async def handler(data):
+            seen.append(data["n"])
+
+        bus.subscribe(EventType.SIGNAL, handler)
+        await bus.publish(EventType.SIGNAL, {"n": 1})
+        await bus.drain()
+        bus.unsubscribe(EventType.SIGNAL, handler)
+        await bus.publish(EventType.SIGNAL, {"n": 2})
+        await bus.drain()
+        self.assertEqual(seen, [1])
+        self.assertEqual(bus.get_subscriber_stats(), [])
+
+
+class TestEventBusDispatcher(unittest.IsolatedAsyncioTestCase):
+    async def test_priority_then_fifo_order(self):
+        bus = EventBus(dispatch_mode="sequential")
+        seen = []
+        for event_type in (EventType.AGENT_LOG, EventType.MARKET_DATA, EventType.EMERGENCY_EXIT):
+            bus.subscribe(event_type, lambda data: seen.append(data["id"]))
+
+        # Queue everything before the dispatcher gets a chance to run
+        await bus.start()
+        block = asyncio.Event()
+
+        async def blocker(data):
+            await block.wait()
+
+        bus.subscribe(EventType.ORDER_FILLED, blocker)
+        await bus.publish(EventType.ORDER_FILLED, {"id": "block"})
+        await asyncio.sleep(0.01)
+
+        for n in range(3):
+            await bus.publish(EventType.AGENT_LOG, {"id": f"log{n}"})
+            await bus.publish(EventType.MARKET_DATA, {"id": f"md{n}"})
+        await bus.publish(EventType.EMERGENCY_EXIT, {"id": "exit"})
+        block.set()
+        await bus.drain()
+        self.assertEqual(seen, ["exit", "md0", "md1", "md2", "log0", "log1", "log2"])
+
+    async def test_single_dispatcher_and_lifecycle(self):
+        bus = EventBus()
+        seen = []
+        bus.subscribe(EventType.SIGNAL, lambda data: seen.append(data["n"]))
+        self.assertFalse(bus.is_running)
+
+        await bus.start()
+        dispatcher = bus._dispatcher
+        for n in range(50):
+            await bus.publish(EventType.SIGNAL, {"n": n})
+            if n % 10 == 0:
+                await asyncio.sleep(0)
+        await bus.drain()
+        self.assertIs(bus._dispatcher, dispatcher)
+        self.assertEqual(seen, list(range(50)))
+
+        await bus.publish(EventType.SIGNAL, {"n": 50})
+        await bus.stop()
+        self.assertFalse(bus.is_running)
+        self.assertEqual(seen[-1], 50)
+
+        # Publishing after stop starts it again
+        await bus.publish(EventType.SIGNAL, {"n": 51})
+        await bus.drain()
+        self.assertTrue(bus.is_running)
+        self.assertEqual(seen[-1], 51)
+        await bus.stop()
+
+
+class TestTopicFilters(unittest.IsolatedAsyncioTestCase):
+    async def test_callbacks_only_receive_matching_events(self):
+        bus = EventBus()
+        calls = {"structure": [], "btc_htf": [], "predicate": [], "all": []}
+
+        bus.subscribe(EventType.ANALYSIS_UPDATE, lambda d: calls["structure"].append(d["n"]), section="market_structure")
+        bus.subscribe(EventType.ANALYSIS_UPDATE, lambda d: calls["btc_htf"].append(d["n"]), symbol="BTC", timeframe=["1h", "4h"])
+        bus.subscribe(EventType.ANALYSIS_UPDATE, lambda d: calls["predicate"].append(d["n"]),
+                      predicate=lambda d: d.get("timeframe") == "overall")
+        bus.subscribe(EventType.ANALYSIS_UPDATE, lambda d: calls["all"].append(d["n"]))
+
+        events = [
+            {"symbol": "BTC", "timeframe": "1h", "section": "market_structure"},
+            {"symbol": "BTC", "timeframe": "5m", "section": "market_structure"},
+            {"symbol": "ETH", "timeframe": "4h", "section": "market_regime"},
+            {"symbol": "BTC", "timeframe": "4h", "section": "market_regime"},
+            {"symbol": "BTC", "timeframe": "overall", "section": "market_regime"},
+            {"symbol": "BTC", "timeframe": "1h", "section": ["unhashable"]},
+        ]
+        for n, data in enumerate(events):
+            await bus.publish(EventType.ANALYSIS_UPDATE, {**data, "n": n})
+        await bus.drain()
+
+        self.assertEqual(calls["structure"], [0, 1])
+        self.assertEqual(calls["btc_htf"], [0, 3, 5])
+        self.assertEqual(calls["predicate"], [4])
+        self.assertEqual(calls["all"], [0, 1, 2, 3, 4, 5])
+        topics = [s["topic"] for s in bus.get_subscriber_stats()]
+        self.assertEqual(topics[:2], ["section=market_structure", "symbol=BTC, timeframe=1h|4h"])
+        self.assertIsNone(topics[3])
+        await bus.stop()
+
+    async def test_failing_predicate_is_isolated_and_unsubscribe_reroutes(self):
+        bus = EventBus(dispatch_mode="sequential")
+        order = []
+
+        def broken(data):
+            raise ValueError("boom")
+
+        first = lambda d: order.append("first")
+        bus.subscribe(EventType.SIGNAL, first, symbol="BTC")
+        bus.subscribe(EventType.SIGNAL, lambda d: order.append("broken"), predicate=broken)
+        bus.subscribe(EventType.SIGNAL, lambda d: order.append("last"))
+
+        await bus.publish(EventType.SIGNAL, {"symbol": "BTC"})
+        await bus.drain()
+        self.assertEqual(order, ["first", "last"])
+
+        bus.unsubscribe(EventType.SIGNAL, first)
+        await bus.publish(EventType.SIGNAL, {"symbol": "BTC"})
+        await bus.drain()
+        self.assertEqual(order, ["first", "last", "last"])
+        await bus.stop()
+
+
+class TestEventSerialization(unittest.IsolatedAsyncioTestCase):
+    async def test_serialized_once_and_cached(self):
+        bus = EventBus()
+        await bus.publish(EventType.SIGNAL, {"agent": "A", "price": np.float64(1.5), "levels": np.array([1, 2])})
+        first = bus.get_recent_events()
+        with patch.object(event_bus_module, "_to_serializable") as convert:
+            again = bus.get_recent_events()
+            by_agent = bus.get_agent_events("A")
+        convert.assert_not_called()
+        self.assertIs(first[0], again[0])
+        self.assertIs(first[0], by_agent[0])
+        self.assertEqual(first[0]["data"], {"agent": "A", "price": 1.5, "levels": [1, 2]})
+        self.assertIsInstance(first[0]["data"]["price"], float)
+        self.assertEqual(first[0]["priority"], "HIGH")
+        await bus.stop()
+
+    async def test_publish_logs_summary_without_payload(self):
+        bus = EventBus()
+
+        class Loud:
+            def __repr__(self):
+                raise AssertionError("payload was formatted")
+
+        logger = logging.getLogger("EventBus")
+        with self.assertLogs(logger, level="DEBUG") as logs:
+            await bus.publish(EventType.SIGNAL, {"agent": "A", "frame": Loud()})
+        self.assertTrue(any("signal" in line and "2 fields" in line for line in logs.output))
+
+        previous = logger.level
+        logger.setLevel(logging.INFO)
+        try:
+            with patch.object(logger, "debug") as debug:
+                await bus.publish(EventType.SIGNAL, {"agent": "A", "frame": Loud()})
+            debug.assert_not_called()
+        finally:
+            logger.setLevel(previous)
+        await bus.stop()
+
+
+class TestEventRecords(unittest.IsolatedAsyncioTestCase):
+    async def test_event_is_slotted_and_monotonic(self):
+        before = datetime.now()
+        first = Event(EventType.SIGNAL, {"agent": "A"})
+        second = Event(EventType.SIGNAL, {})
+        self.assertFalse(hasattr(first, "__dict__"))
+        self.assertLessEqual(first.created_ns, second.created_ns)
+        self.assertEqual(second.agent_name, "Unknown")
+        self.assertLess(abs((first.timestamp - before).total_seconds()), 1.0)
+        self.assertGreaterEqual(first.age(), 0.0)
+
+    async def test_typed_payload_is_delivered_and_serialized(self):
+        bus = EventBus()
+        seen = []
+        bus.subscribe(EventType.MARKET_DATA, lambda d: seen.append(d.get("latest_close")), symbol="BTC")
+        await bus.publish(EventType.MARKET_DATA, MarketDataPayload(
+            symbol="BTC", timeframe="5m", latest_close=np.float64(2.5), agent="MarketDataAgent"))
+        await bus.drain()
+        self.assertEqual(seen, [2.5])
+        event = bus.get_agent_events("MarketDataAgent")[0]
+        self.assertEqual(event["data"], {"symbol": "BTC", "timeframe": "5m", "latest_close": 2.5, "agent": "MarketDataAgent"})
+        await bus.stop()
+
+    async def test_agent_history_is_bounded(self):
+        bus = EventBus()
+        bus.max_tracked_agents = 3
+        for name in ["A", "B", "C", "A", "D"]:
+            await bus.publish(EventType.AGENT_LOG, {"agent": name})
+        self.assertEqual(list(bus._agent_events), ["C", "A", "D"])
+        self.assertEqual(bus.get_agent_events("B"), [])
+        self.assertEqual(len(bus.get_agent_events("A")), 2)
+        await bus.stop()
+
+
+class TestRequestReply(unittest.IsolatedAsyncioTestCase):
+    async def test_request_resolves_with_correlated_reply(self):
+        bus = EventBus()
+
+        async def responder(data):
+            if data["n"] < 0:
+                await bus.reply(data, error=ValueError("negative"))
+            else:
+                await bus.reply(data, result=data["n"] * 2)
+
+        bus.subscribe(EventType.MARKET_DATA_REQUEST, responder)
+        results = await asyncio.gather(*(bus.request(EventType.MARKET_DATA_REQUEST, {"n": n}, timeout=1) for n in range(5)))
+        self.assertEqual(results, [0, 2, 4, 6, 8])
+        with self.assertRaisesRegex(RequestError, "negative"):
+            await bus.request(EventType.MARKET_DATA_REQUEST, {"n": -1}, timeout=1)
+        self.assertEqual(bus._pending, {})
+        self.assertEqual(bus.metrics.requests.get("market_data_request", "ok"), 5)
+        self.assertEqual(bus.metrics.requests.get("market_data_request", "error"), 1)
+        self.assertFalse(await bus.reply({"n": 1}, result=1))  # plain publish, nobody waits
+        await bus.stop()
+
+    async def test_request_timeout_and_cancellation_clean_up(self):
+        bus = EventBus()
+        bus.subscribe(EventType.MARKET_DATA_REQUEST, lambda data: None)
+        with self.assertRaises(asyncio.TimeoutError):
+            await bus.request(EventType.MARKET_DATA_REQUEST, {}, timeout=0.05)
+        task = asyncio.create_task(bus.request(EventType.MARKET_DATA_REQUEST, {}, timeout=5))
+        await asyncio.sleep(0.01)
+        self.assertEqual(len(bus._pending), 1)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(bus._pending, {})
+        self.assertEqual(bus.metrics.requests.get("market_data_request", "timeout"), 1)
+        self.assertEqual(bus.metrics.requests.get("market_data_request", "cancelled"), 1)
+        await bus.stop()
+
+    async def test_wait_for_matching_event(self):
+        bus = EventBus()
+        completed = bus.expect(EventType.ANALYSIS_COMPLETED, symbol="ETH")
+        await bus.publish(EventType.ANALYSIS_COMPLETED, {"symbol": "BTC"})
+        await bus.publish(EventType.ANALYSIS_COMPLETED, {"symbol": "ETH", "n": 1})
+        self.assertEqual((await asyncio.wait_for(completed, 1))["n"], 1)
+        with self.assertRaises(asyncio.TimeoutError):
+            await bus.wait_for(EventType.ANALYSIS_COMPLETED, 0.05, symbol="SOL")
+        await asyncio.sleep(0)
+        self.assertEqual(bus._waiters, {})
+        await bus.stop()
+
+    async def test_market_data_requests_share_one_fetch(self):
+        from app.agents.market_data_agent import MarketDataAgent
+        bus = EventBus()
+        agent = MarketDataAgent()
+        release = asyncio.Event()
+        fetches = []
+
+        async def fetch_and_publish(symbol, timeframe):
+            fetches.append((symbol, timeframe))
+            await release.wait()
+            return {"symbol": symbol, "timeframe": timeframe}
+
+        with patch('app.agents.market_data_agent.event_bus', bus), \
+                patch.object(agent, 'fetch_and_publish', side_effect=fetch_and_publish):
+            bus.subscribe(EventType.MARKET_DATA_REQUEST, agent.handle_data_request)
+            requests = [asyncio.create_task(bus.request(EventType.MARKET_DATA_REQUEST,
+                                                        {"symbol": "BTC", "timeframe": "1h"}, timeout=1))
+                        for _ in range(3)]
+            await asyncio.sleep(0.05)
+            release.set()
+            results = await asyncio.gather(*requests)
+            self.assertEqual(fetches, [("BTC", "1h")])
+            self.assertEqual(results, [{"symbol": "BTC", "timeframe": "1h"}] * 3)
+            self.assertEqual(agent.inflight_requests, {})
+            with self.assertRaisesRegex(RequestError, "symbol"):
+                await bus.request(EventType.MARKET_DATA_REQUEST, {}, timeout=1)
+        await bus.stop()
+        await agent.exchange.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
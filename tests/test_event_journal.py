@@ -0,0 +1,128 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import AsyncMock, patch
+from app.core.event_bus import EventBus, EventType, event_bus
+from app.core.event_journal import EventJournal
+from app.core.event_payloads import MarketDataPayload
+
+
+class TestEventJournal(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="journal")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_append_roll_and_reopen(self):
+        journal = EventJournal(self.dir, segment_size=2048, max_segments=100)
+        for i in range(100):
+            journal.append("market_data" if i % 2 else "signal", 2, time.time_ns(), {"i": i})
+        self.assertGreater(journal.get_status()["segments"], 1)
+        journal.close()
+
+        reopened = EventJournal(self.dir, segment_size=2048, max_segments=100)
+        self.assertEqual(reopened.next_seq, 101)
+        records = list(reopened.replay())
+        self.assertEqual([r.seq for r in records], list(range(1, 101)))
+        self.assertEqual([r.data["i"] for r in records[:3]], [0, 1, 2])
+        self.assertEqual([r.seq for r in reopened.replay(since_seq=95, event_types=["signal"])], [95, 97, 99])
+        reopened.close()
+
+    def test_retention_and_unpicklable_payloads(self):
+        journal = EventJournal(self.dir, segment_size=1024, max_segments=2)
+        for i in range(200):
+            journal.append("signal", 1, 0, {"i": i, "pad": "x" * 40})
+        self.assertEqual(journal.get_status()["segments"], 2)
+        self.assertEqual(list(journal.replay())[-1].data["i"], 199)
+        self.assertIsNone(journal.append("signal", 1, 0, {"callback": lambda: None}))
+        self.assertEqual(journal.skipped, 1)
+        journal.close()
+
+    def test_torn_tail_is_ignored_on_reopen(self):
+        journal = EventJournal(self.dir, segment_size=4096)
+        journal.append("signal", 1, 0, {"n": 1})
+        journal.append("signal", 1, 0, {"n": 2})
+        end = journal._segment.offset
+        path = journal._segment.path
+        journal.close()
+        with open(path, "r+b") as f:
+            f.seek(end - 2)
+            f.write(b"\xff\xff")
+
+        reopened = EventJournal(self.dir, segment_size=4096)
+        self.assertEqual([r.data["n"] for r in reopened.replay()], [1])
+        self.assertEqual(reopened.append("signal", 1, 0, {"n": 3}), 2)
+        self.assertEqual([r.data["n"] for r in reopened.replay()], [1, 3])
+        reopened.close()
+
+
+class TestBusJournal(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.dir = tempfile.mkdtemp(prefix="journal")
+
+    async def asyncTearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    async def test_published_events_replay_after_restart(self):
+        bus = EventBus(journal=EventJournal(self.dir))
+        await bus.publish(EventType.SYMBOL_APPROVED, {"symbol": "BTC-USDT", "agent": "SanityAgent"})
+        await bus.publish(EventType.MARKET_DATA, MarketDataPayload(symbol="BTC-USDT", timeframe="5m", latest_close=1.0))
+        await bus.publish(EventType.ORDER_REQUEST, {"symbol": "BTC-USDT", "side": "buy"})
+        await bus.stop()
+        bus.journal.close()
+
+        restarted = EventBus(journal=EventJournal(self.dir))
+        approved, market_data = [], []
+        restarted.subscribe(EventType.SYMBOL_APPROVED, lambda d: approved.append(d["symbol"]))
+        restarted.subscribe(EventType.MARKET_DATA, lambda d: market_data.append(d))
+        count = await restarted.replay([EventType.SYMBOL_APPROVED, EventType.MARKET_DATA])
+        await restarted.drain()
+
+        self.assertEqual(count, 2)
+        self.assertEqual(approved, ["BTC-USDT"])
+        self.assertIsInstance(market_data[0], MarketDataPayload)
+        self.assertEqual(restarted.journal.next_seq, 4)  # replayed events aren't journaled again
+        self.assertEqual(restarted.metrics.replayed.get("symbol_approved"), 1)
+        with self.assertRaises(ValueError):
+            await restarted.replay([EventType.ORDER_REQUEST])
+        await restarted.stop()
+        restarted.journal.close()
+
+    async def test_running_bus_flushes_an_idle_tail(self):
+        bus = EventBus(journal=EventJournal(self.dir, fsync_interval=0.05))
+        await bus.start()
+        await bus.publish(EventType.SIGNAL, {"symbol": "BTC-USDT"})
+        self.assertTrue(bus.journal._dirty)
+        await asyncio.sleep(0.15)
+        self.assertFalse(bus.journal._dirty)
+        await bus.stop()
+        self.assertIsNone(bus._journal_flusher)
+        bus.journal.close()
+
+    async def test_governor_restores_only_the_latest_approval_cycle(self):
+        from app.agents.governor_agent import GovernorAgent
+        journal = EventJournal(self.dir)
+        for cycle, symbols in [("a", ["BTC-USDT", "ETH-USDT"]), ("b", ["ETH-USDT", "SOL-USDT"])]:
+            for symbol in symbols:
+                journal.append("symbol_approved", 2, 0, {"symbol": symbol, "cycle": cycle})
+        journal.append("market_data", 2, 0, {"symbol": "XRP-USDT"})
+        self.assertEqual(GovernorAgent._latest_approvals(journal), ["ETH-USDT", "SOL-USDT"])
+
+        governor = GovernorAgent()
+        published = []
+        with patch.object(event_bus, "journal", journal), \
+                patch.object(event_bus, "publish", AsyncMock(side_effect=lambda t, d: published.append(d))), \
+                patch.object(GovernorAgent, "log_event", AsyncMock()):
+            restored = await governor.restore_approved_symbols("c")
+        self.assertEqual(restored, {"ETH-USDT", "SOL-USDT"})
+        # Re-published under the new cycle, so the next restart finds them again
+        self.assertEqual([(d["symbol"], d["cycle"]) for d in published], [("ETH-USDT", "c"), ("SOL-USDT", "c")])
+        journal.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
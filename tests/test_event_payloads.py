@@ -0,0 +1,45 @@
+import pickle
+import unittest
+import numpy as np
+from app.core.event_payloads import MISSING, MarketDataPayload, OrderRequestPayload, StrategySignalPayload
+
+
+class TestEventPayloads(unittest.TestCase):
+    def test_reads_like_the_dict_payload(self):
+        payload = MarketDataPayload(symbol="BTC-USDT", timeframe="5m", latest_close=1.5, agent="MarketDataAgent")
+        as_dict = {"symbol": "BTC-USDT", "timeframe": "5m", "latest_close": 1.5, "agent": "MarketDataAgent"}
+
+        self.assertEqual(payload, as_dict)
+        self.assertEqual(dict(payload), as_dict)
+        self.assertEqual(len(payload), 4)
+        self.assertEqual(payload["symbol"], "BTC-USDT")
+        self.assertIsNone(payload.get("timestamp"))
+        self.assertEqual(payload.get("candles", 0), 0)
+        self.assertNotIn("timestamp", payload)
+        with self.assertRaises(KeyError):
+            payload["timestamp"]
+        self.assertFalse(hasattr(payload, "__dict__"))
+
+    def test_unknown_keys_and_updates(self):
+        payload = OrderRequestPayload(symbol="BTC-USDT", side="buy")
+        self.assertIsNone(payload.extra)
+        payload["client_id"] = "abc"
+        payload["amount"] = 0.1
+        del payload["side"]
+        self.assertEqual(dict(payload), {"symbol": "BTC-USDT", "amount": 0.1, "client_id": "abc"})
+        self.assertIs(payload.side, MISSING)
+        self.assertEqual(payload.extra, {"client_id": "abc"})
+
+        signal = StrategySignalPayload.from_dict({"symbol": "ETH", "signal": "BUY", "setup": "breakout"})
+        self.assertEqual(signal.signal, "BUY")
+        self.assertEqual(signal["setup"], "breakout")
+
+    def test_pickles_with_missing_fields(self):
+        payload = MarketDataPayload(symbol="BTC", timestamp=np.int64(5), extra={"note": 1})
+        restored = pickle.loads(pickle.dumps(payload))
+        self.assertEqual(restored, payload)
+        self.assertIs(restored.latest_close, MISSING)
+
+
+if __name__ == '__main__':
+    unittest.main()
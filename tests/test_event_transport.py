@@ -0,0 +1,143 @@
+import asyncio
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import textwrap
+import unittest
+import numpy as np
+from app.core.event_bus import EventBus, EventType
+from app.core.event_transport import EventBroker, SocketTransport
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def wait_until(condition, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+class TestSocketTransport(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="evb")
+        self.path = os.path.join(self.tmpdir, "bus.sock")
+        self.broker = EventBroker(self.path)
+
+    async def asyncTearDown(self):
+        await self.broker.stop()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def subscriptions(self):
+        return [types for types in self.broker._clients.values()]
+
+    async def test_socket_is_owner_only(self):
+        os.chmod(self.tmpdir, 0o755)
+        self.broker.path = os.path.join(self.tmpdir, "run", "bus.sock")
+        self.assertTrue(await self.broker.start())
+        self.assertEqual(stat.S_IMODE(os.stat(self.broker.path).st_mode), 0o600)
+        self.assertEqual(stat.S_IMODE(os.stat(os.path.dirname(self.broker.path)).st_mode), 0o700)
+
+    async def test_refuses_shared_directory(self):
+        os.chmod(self.tmpdir, 0o777)
+        with self.assertRaises(PermissionError):
+            await self.broker.start()
+        self.assertFalse(os.path.exists(self.path))
+
+    async def test_events_cross_buses_without_echo(self):
+        self.assertTrue(await self.broker.start())
+        bus_a = EventBus(transport=SocketTransport(self.path, reconnect_delay=0.05))
+        bus_b = EventBus(transport=SocketTransport(self.path, reconnect_delay=0.05))
+        got_a, got_b = [], []
+        bus_a.subscribe(EventType.SIGNAL, lambda d: got_a.append(d))
+        await bus_a.start()
+        await bus_b.start()
+        bus_b.subscribe(EventType.SIGNAL, lambda d: got_b.append(d))
+        await wait_until(lambda: sum("signal" in types for types in self.subscriptions()) == 2)
+
+        await bus_a.publish(EventType.SIGNAL, {"symbol": "BTC", "price": np.float64(1.5), "agent": "A"})
+        await bus_a.publish(EventType.AGENT_LOG, {"message": "nobody else listens"})
+        await wait_until(lambda: got_b)
+        await bus_a.drain()
+        await bus_b.drain()
+
+        self.assertEqual(len(got_a), 1)  # local delivery only, the broker doesn't echo
+        self.assertEqual(got_b, [{"symbol": "BTC", "price": 1.5, "agent": "A"}])
+        self.assertEqual(self.broker.forwarded, 1)
+        self.assertEqual(bus_b.metrics.received.get("signal"), 1)
+        self.assertEqual(bus_b.get_recent_events()[0]["agent_name"], "A")
+        await bus_a.stop()
+        await bus_b.stop()
+
+    async def test_reconnects_when_broker_starts_later(self):
+        transport = SocketTransport(self.path, reconnect_delay=0.05)
+        bus = EventBus(transport=transport)
+        got = []
+        bus.subscribe(EventType.SIGNAL, lambda d: got.append(d))
+        await bus.publish(EventType.SIGNAL, {"n": 1})
+        await bus.drain()
+        self.assertEqual(got, [{"n": 1}])
+        self.assertEqual(transport.unsent, 1)
+
+        await self.broker.start()
+        await asyncio.wait_for(transport.connected.wait(), 5)
+        await wait_until(lambda: ["reply", "signal"] in [sorted(t) for t in self.subscriptions()])
+        self.assertTrue(transport.get_status()["connected"])
+        await bus.stop()
+
+    async def test_worker_process_round_trip(self):
+        await self.broker.start()
+        bus = EventBus(transport=SocketTransport(self.path, reconnect_delay=0.05))
+        replies = []
+        bus.subscribe(EventType.ORDER_REQUEST, lambda d: replies.append(d))
+        await bus.start()
+
+        script = textwrap.dedent(f"""
+            import asyncio
+            from app.core.event_bus import EventBus, EventType
+            from app.core.event_transport import SocketTransport
+
+            async def main():
+                bus = EventBus(transport=SocketTransport({self.path!r}, reconnect_delay=0.05))
+                done = asyncio.Event()
+
+                async def on_signal(data):
+                    await bus.publish(EventType.ORDER_REQUEST, {{"symbol": data["symbol"], "pid_reply": True}})
+                    done.set()
+
+                bus.subscribe(EventType.SIGNAL, on_signal)
+                await bus.start()
+                await asyncio.wait_for(done.wait(), 10)
+                await bus.stop()
+
+            asyncio.run(main())
+        """)
+        proc = await asyncio.create_subprocess_exec(sys.executable, "-c", script, cwd=ROOT)
+        try:
+            await wait_until(lambda: any("signal" in types for types in self.subscriptions()), timeout=20)
+            await bus.publish(EventType.SIGNAL, {"symbol": "ETH"})
+            await wait_until(lambda: replies, timeout=10)
+            self.assertEqual(replies, [{"symbol": "ETH", "pid_reply": True}])
+            self.assertEqual(await asyncio.wait_for(proc.wait(), 10), 0)
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            await bus.stop()
+
+
+
+class TestWorkerAgents(unittest.TestCase):
+    def test_analysis_agents_are_refused(self):
+        from app.worker import AGENT_MODULES, PROCESS_LOCAL_AGENTS, create_agent
+        self.assertTrue(PROCESS_LOCAL_AGENTS <= set(AGENT_MODULES))
+        with self.assertRaisesRegex(ValueError, "main process"):
+            create_agent("RiskAgent")
+        self.assertEqual(type(create_agent("AuditLogAgent")).__name__, "AuditLogAgent")
+
+
+if __name__ == '__main__':
+    unittest.main()
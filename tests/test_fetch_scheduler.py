@@ -0,0 +1,202 @@
+import asyncio
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, patch
+from app.agents.market_data_agent import MarketDataAgent
+from tests.test_indicator_engine import make_ohlcv
+
+
+class TestFetchScheduler(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.agent = MarketDataAgent()
+        self.agent.is_running = True
+        self.agent.cache_enabled = False
+        self.agent.fetch_concurrency = 3
+        self.agent.fetch_semaphore = asyncio.Semaphore(3)
+        self.agent.symbols = [f"SYM{i}-USDT" for i in range(6)]
+        self.agent.timeframes = ["5m", "1d", "1h"]
+
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = []
+
+        async def fetch_ohlcv(symbol, timeframe, limit=300):
+            self.calls.append((symbol, timeframe))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            return make_ohlcv(60)
+
+        self.agent.exchange.fetch_ohlcv = AsyncMock(side_effect=fetch_ohlcv)
+        patcher = patch.object(MarketDataAgent, 'persist_candles')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_cycle_is_concurrent_and_bounded(self):
+        await self.agent.fetch_cycle()
+        self.assertEqual(len(self.calls), 18)
+        self.assertEqual(self.max_in_flight, 3)
+
+    async def test_higher_timeframes_first(self):
+        await self.agent.fetch_cycle()
+        order = [tf for _, tf in self.calls]
+        self.assertEqual(order, ["1d"] * 6 + ["1h"] * 6 + ["5m"] * 6)
+
+    async def test_failure_does_not_abort_cycle(self):
+        self.agent.max_retries = 0
+        original = self.agent.exchange.fetch_ohlcv.side_effect
+
+        async def flaky(symbol, timeframe, limit=300):
+            if symbol == "SYM0-USDT":
+                raise RuntimeError("boom")
+            return await original(symbol, timeframe, limit)
+
+        self.agent.exchange.fetch_ohlcv.side_effect = flaky
+        await self.agent.fetch_cycle()
+        self.assertEqual(len(self.calls), 15)
+        self.assertEqual(self.agent.processed_count, 15)
+
+
+class FakeExchange:
+    """Serves a fixed candle history honouring since/limit like ccxt."""
+    def __init__(self, rows):
+        self.rows = rows
+        self.visible = 0
+        self.requests = []
+
+    async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.requests.append(since)
+        rows = self.rows[:self.visible]
+        if since is not None:
+            return [r for r in rows if r[0] >= since][:limit]
+        return rows[-limit:]
+
+    async def close(self):
+        pass
+
+
+class TestDeltaFetch(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.agent = MarketDataAgent()
+        self.agent.is_running = True
+        self.agent.cache_enabled = False
+        self.rows = make_ohlcv(1000, seed=7)
+        self.exchange = FakeExchange(self.rows)
+        self.agent.exchange = self.exchange
+        patcher = patch.object(MarketDataAgent, 'persist_candles')
+        self.persist = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_only_new_candles_are_requested(self):
+        self.exchange.visible = 300
+        await self.agent.fetch_and_publish("BTC-USDT", "5m")
+        self.assertEqual(self.exchange.requests, [None])
+
+        for visible in range(301, 311):
+            self.exchange.visible = visible
+            await self.agent.fetch_and_publish("BTC-USDT", "5m")
+            since = self.exchange.requests[-1]
+            self.assertEqual(since, self.rows[visible - 2][0])
+            self.assertEqual(len(self.persist.call_args[0][2]), 2)
+
+        engine = self.agent.indicator_engines[("BTC-USDT", "5m")]
+        self.assertEqual(engine.full_recalculations, 1)
+        frame = engine.to_frame()
+        self.assertEqual(len(frame), 300)
+        self.assertEqual(frame['timestamp'].iloc[-1], self.rows[309][0])
+
+    async def test_large_gap_falls_back_to_full_window(self):
+        self.exchange.visible = 300
+        await self.agent.fetch_and_publish("BTC-USDT", "5m")
+        self.exchange.visible = 900
+        await self.agent.fetch_and_publish("BTC-USDT", "5m")
+        self.assertEqual(self.exchange.requests, [None, self.rows[299][0], None])
+        frame = self.agent.indicator_engines[("BTC-USDT", "5m")].to_frame()
+        self.assertEqual(frame['timestamp'].iloc[0], self.rows[600][0])
+
+
+def ms(*args) -> int:
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+class TestCandleCloseSchedule(unittest.TestCase):
+    def setUp(self):
+        self.agent = MarketDataAgent()
+        self.agent.symbols = ["BTC-USDT", "ETH-USDT"]
+        self.agent.timeframes = ["1M", "1w", "1d", "1h", "5m"]
+        self.agent.intrabar_timeframes = ["5m"]
+
+    def test_next_candle_close(self):
+        now = ms(2024, 12, 18, 13, 47, 12)  # Wednesday
+        close = self.agent.next_candle_close
+        self.assertEqual(close("5m", now), ms(2024, 12, 18, 13, 50))
+        self.assertEqual(close("15m", now), ms(2024, 12, 18, 14, 0))
+        self.assertEqual(close("4h", now), ms(2024, 12, 18, 16, 0))
+        self.assertEqual(close("1d", now), ms(2024, 12, 19))
+        self.assertEqual(close("1w", now), ms(2024, 12, 23))  # Monday
+        self.assertEqual(close("1M", now), ms(2025, 1, 1))
+        # Exactly on a boundary the next candle is the one forming
+        self.assertEqual(close("1h", ms(2024, 12, 18, 14)), ms(2024, 12, 18, 15))
+
+    def test_due_fetches_follow_candle_closes(self):
+        agent = self.agent
+        now = ms(2024, 12, 18, 13, 47, 12)
+        self.assertEqual(len(agent.due_fetches(now)), 10)  # first run: everything
+
+        # Nothing closed yet, intrabar refresh not due
+        self.assertEqual(agent.due_fetches(now + 5_000), [])
+
+        # Intrabar refresh of the lowest timeframe bypasses the cache
+        jobs = agent.due_fetches(now + 10_000)
+        self.assertEqual(jobs, [("BTC-USDT", "5m", False), ("ETH-USDT", "5m", False)])
+
+        # 5m closes at 13:50 -> fetched from the exchange after the grace period
+        jobs = agent.due_fetches(ms(2024, 12, 18, 13, 50, 1))
+        self.assertEqual({tf for _, tf, _ in jobs}, {"5m"})  # only the intrabar refresh
+        agent.next_intrabar["5m"] = ms(2024, 12, 18, 14, 0)
+        jobs = agent.due_fetches(ms(2024, 12, 18, 13, 50, 2))
+        self.assertEqual({tf for _, tf, _ in jobs}, {"5m"})
+        self.assertFalse(any(use_cache for _, _, use_cache in jobs))
+
+        # 14:00 closes both 5m and 1h
+        jobs = agent.due_fetches(ms(2024, 12, 18, 14, 0, 3))
+        self.assertEqual({tf for _, tf, _ in jobs}, {"5m", "1h"})
+
+    def test_month_close_skips_the_cache(self):
+        agent = self.agent
+        agent.timeframes, agent.intrabar_timeframes = ["1M"], []
+        self.assertTrue(all(use_cache for _, _, use_cache in agent.due_fetches(ms(2024, 2, 20))))
+        jobs = agent.due_fetches(ms(2024, 3, 1, 0, 0, 3))
+        self.assertEqual(jobs, [("BTC-USDT", "1M", False), ("ETH-USDT", "1M", False)])
+        self.assertEqual(agent.next_close["1M"], ms(2024, 4, 1))
+
+        # February (29 days) is no longer the current candle on March 1, even though < 30 days passed
+        february = [[ms(2024, 2, 1), 1.0, 1.0, 1.0, 1.0, 1.0]]
+        with patch.object(MarketDataAgent, '_now_ms', return_value=ms(2024, 2, 29, 23)):
+            self.assertTrue(agent.is_cache_valid(february, "1M"))
+        with patch.object(MarketDataAgent, '_now_ms', return_value=ms(2024, 3, 1, 0, 0, 3)):
+            self.assertFalse(agent.is_cache_valid(february, "1M"))
+
+    def test_new_symbol_fetched_on_every_timeframe(self):
+        agent = self.agent
+        now = ms(2024, 12, 18, 13, 47, 12)
+        agent.due_fetches(now)
+        agent.symbols.append("SOL-USDT")
+        jobs = agent.due_fetches(now + 1_000)
+        self.assertEqual(sorted(tf for _, tf, _ in jobs), sorted(agent.timeframes))
+        self.assertTrue(all(symbol == "SOL-USDT" for symbol, _, _ in jobs))
+
+    def test_sleep_until_next_close(self):
+        agent = self.agent
+        now = ms(2024, 12, 18, 13, 49, 12)
+        agent.intrabar_timeframes = []
+        agent.due_fetches(now)
+        with patch.object(MarketDataAgent, '_now_ms', return_value=now):
+            self.assertAlmostEqual(agent.seconds_until_next_fetch(), 48 + 2)
+            agent.timeframes = ["1M"]
+            self.assertEqual(agent.seconds_until_next_fetch(), agent.max_sleep_seconds)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import numpy as np
+import pandas as pd
+from app.agents.market_data_agent import MarketDataAgent
+from app.core.indicator_engine import IndicatorEngine, WARMUP_BARS
+
+
+def make_ohlcv(n: int, seed: int = 0, tf_ms: int = 300_000):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, 1, n))
+    opens = np.r_[closes[0], closes[:-1]] + rng.normal(0, 0.2, n)
+    highs = np.maximum(opens, closes) + rng.random(n)
+    lows = np.minimum(opens, closes) - rng.random(n)
+    volumes = rng.random(n) * 1000
+    start = 1_700_000_000_000
+    return [[start + i * tf_ms, float(opens[i]), float(highs[i]), float(lows[i]), float(closes[i]), float(volumes[i])]
+            for i in range(n)]
+
+
+class TestIndicatorEngine(unittest.TestCase):
+    def setUp(self):
+        self.agent = MarketDataAgent()
+
+    def assertFramesMatch(self, expected: pd.DataFrame, actual: pd.DataFrame):
+        self.assertEqual(list(expected.columns), list(actual.columns))
+        for col in expected.columns:
+            exp, act = expected[col].to_numpy(), actual[col].to_numpy()
+            if exp.dtype.kind in 'fi':
+                np.testing.assert_allclose(act.astype(float), exp.astype(float), rtol=1e-7, atol=1e-7, err_msg=col)
+            else:
+                self.assertTrue((exp == act).all(), col)
+
+    def test_incremental_matches_batch(self):
+        # The window never slides here, so the whole frame equals the batch calculation
+        rows = make_ohlcv(450)
+        engine = IndicatorEngine("BTC-USDT", "5m", batch=self.agent.calculate_indicators, max_rows=1000)
+        engine.update(rows[:350])
+        self.assertTrue(engine.is_seeded)
+
+        for k in range(350, len(rows)):
+            ts, o, h, l, c, v = rows[k]
+            # Forming candle first, then its final values together with the closed previous candle
+            engine.update([rows[k - 1], [ts, o, max(o, (o + h) / 2), min(o, (o + l) / 2), o, v / 2]])
+            frame = engine.update([rows[k - 1], rows[k]])
+
+        self.assertEqual(engine.full_recalculations, 1)
+        expected = self.agent.calculate_indicators(pd.DataFrame(rows))
+        self.assertFramesMatch(expected, frame)
+
+    def test_short_history_uses_batch(self):
+        rows = make_ohlcv(WARMUP_BARS - 10)
+        engine = IndicatorEngine("BTC-USDT", "5m", batch=self.agent.calculate_indicators)
+        engine.update(rows)
+        engine.update(rows)
+        self.assertFalse(engine.is_seeded)
+        self.assertEqual(engine.full_recalculations, 2)
+
+    def test_gap_triggers_reseed(self):
+        rows = make_ohlcv(400)
+        engine = IndicatorEngine("BTC-USDT", "5m", batch=self.agent.calculate_indicators)
+        engine.update(rows[:300])
+        frame = engine.update(rows[310:])
+        self.assertEqual(engine.full_recalculations, 2)
+        self.assertEqual(frame['timestamp'].iloc[-1], rows[-1][0])
+
+    def test_window_is_bounded(self):
+        rows = make_ohlcv(700)
+        engine = IndicatorEngine("BTC-USDT", "5m", batch=self.agent.calculate_indicators, max_rows=300)
+        engine.update(rows[:300])
+        for k in range(300, len(rows)):
+            frame = engine.update(rows[k - 1:k + 1])
+        self.assertEqual(len(frame), 300)
+        self.assertEqual(frame['timestamp'].iloc[-1], rows[-1][0])
+        self.assertEqual(engine.full_recalculations, 1)
+
+    def test_sliding_window_continues_the_full_history(self):
+        rows = make_ohlcv(700)
+        engine = IndicatorEngine("BTC-USDT", "5m", batch=self.agent.calculate_indicators, max_rows=300)
+        engine.update(rows[:300])
+        for k in range(300, len(rows)):
+            frame = engine.update(rows[k - 1:k + 1])
+
+        # Recursive indicators match a batch over every candle seen, not one over the window
+        columns = [c for c in frame.columns if c not in ('Closest Support', 'Closest Resistance')]
+        expected = self.agent.calculate_indicators(pd.DataFrame(rows)).iloc[-300:]
+        self.assertFramesMatch(expected[columns].reset_index(drop=True), frame[columns].reset_index(drop=True))
+        window_only = self.agent.calculate_indicators(pd.DataFrame(rows[-300:]))
+        self.assertFalse(np.allclose(window_only['On Balance Volume'], frame['On Balance Volume']))
+
+    def test_closest_levels_follow_the_window(self):
+        rows = make_ohlcv(500, seed=4)
+        engine = IndicatorEngine("BTC-USDT", "5m", batch=self.agent.calculate_indicators, max_rows=100)
+        engine.update(rows[:300])
+        columns = ['Closest Support', 'Closest Resistance']
+        for k in range(300, len(rows)):
+            frame = engine.update(rows[k - 1:k + 1])
+            # Batch calculation over exactly the rows the engine still holds
+            expected = self.agent.calculate_indicators(pd.DataFrame(rows[k - 99:k + 1]))
+            np.testing.assert_allclose(frame[columns].iloc[-1].to_numpy(float), expected[columns].iloc[-1].to_numpy(float),
+                                       err_msg=f"row {k}")
+        self.assertEqual(engine.full_recalculations, 1)
+        levels = engine._committed['levels']
+        self.assertLessEqual(len(levels.supports) + len(levels.resistances), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from unittest.mock import AsyncMock, patch
+from app.agents.market_data_agent import MarketDataAgent
+from app.core.kline_stream import ReplayKlineExchange
+from tests.test_indicator_engine import make_ohlcv
+
+TF_MS = 300_000
+
+
+class TestKlineStream(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.agent = MarketDataAgent()
+        self.agent.is_running = True
+        self.agent.symbols = ["BTC-USDT"]
+        # Exchange candles open on timeframe boundaries
+        rows = make_ohlcv(320, seed=11, tf_ms=TF_MS)
+        offset = rows[0][0] % TF_MS
+        self.rows = [[row[0] - offset] + row[1:] for row in rows]
+        self.agent.update_indicators("BTC-USDT", "5m", self.rows[:300])
+
+        publish = patch('app.agents.market_data_agent.event_bus.publish', new_callable=AsyncMock)
+        self.publish = publish.start()
+        self.addCleanup(publish.stop)
+        persist = patch.object(MarketDataAgent, 'persist_candles')
+        self.persist = persist.start()
+        self.addCleanup(persist.stop)
+
+        fd, self.path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+    def write_pushes(self, candles):
+        with open(self.path, "w") as f:
+            for candle in candles:
+                f.write(json.dumps({"symbol": "BTC-USDT", "timeframe": "5m", "ohlcv": candle, "delay": 0.02}) + "\n")
+
+    async def replay(self):
+        self.agent.stream_exchange = ReplayKlineExchange(self.path)
+        task = asyncio.create_task(self.agent.stream_candles("BTC-USDT", "5m"))
+        await self.agent.stream_exchange.finished.wait()
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await self.agent.stream_exchange.close()
+
+    async def test_forming_candle_updates_in_place(self):
+        ts, o, h, l, c, v = self.rows[299]
+        forming = [ts, o, h, l, c, v]
+        pushes = [
+            [ts, o, h, l, (o + c) / 2, v / 2],
+            [ts, o, h, l, (o + c) / 2, v / 2],  # unchanged -> no publish
+            forming,                            # final values of candle 299
+            self.rows[300],                     # next candle opens
+            self.rows[301],
+        ]
+        self.write_pushes(pushes)
+        await self.replay()
+
+        market_data = [call for call in self.publish.call_args_list if call.args[1].get("streamed")]
+        self.assertEqual(len(market_data), 4)
+        engine = self.agent.indicator_engines[("BTC-USDT", "5m")]
+        self.assertEqual(engine.full_recalculations, 1)
+
+        expected = self.agent.calculate_indicators(pd.DataFrame(self.rows[:302]))
+        frame = engine.to_frame()
+        for col in ['Close', 'Exponential Moving Average 21', 'Average True Range', 'Closest Support']:
+            np.testing.assert_allclose(frame[col].to_numpy()[-5:], expected[col].to_numpy()[-5:], rtol=1e-7, err_msg=col)
+
+    async def test_closed_candle_is_persisted_and_refetched(self):
+        ts, o, h, l, c, v = self.rows[299]
+        # The last push of candle 299 was before its final trade
+        self.write_pushes([[ts, o, h, l, (o + c) / 2, v / 2], self.rows[300]])
+        await self.replay()
+        self.persist.assert_called_once()
+        self.assertEqual(self.persist.call_args[0][2][0][4], (o + c) / 2)
+
+        exchange = AsyncMock()
+        exchange.fetch_ohlcv.return_value = [self.rows[299], self.rows[300]]
+        self.agent.exchange = exchange
+        self.agent.cache_enabled = False
+        await self.agent.fetch_and_publish("BTC-USDT", "5m")
+        self.assertEqual(exchange.fetch_ohlcv.call_args.kwargs["since"], self.rows[299][0])
+
+        engine = self.agent.indicator_engines[("BTC-USDT", "5m")]
+        self.assertEqual(engine.full_recalculations, 2)  # candle 299 changed after the stream closed it
+        self.assertEqual(self.persist.call_args[0][2][0], self.rows[299])
+        frame = engine.to_frame()
+        self.assertEqual(frame['Close'].iloc[-2], self.rows[299][4])
+        self.assertEqual(frame['timestamp'].iloc[-1], self.rows[300][0])
+        self.assertNotIn(("BTC-USDT", "5m"), self.agent.stream_opened)
+
+    async def test_missed_candles_fall_back_to_rest(self):
+        self.write_pushes([self.rows[305]])
+        with patch.object(MarketDataAgent, 'fetch_and_publish', new_callable=AsyncMock) as fetch:
+            await self.replay()
+        fetch.assert_awaited_with("BTC-USDT", "5m", use_cache=False)
+        self.assertEqual(self.agent.indicator_engines[("BTC-USDT", "5m")].last_timestamp, self.rows[299][0])
+
+    async def test_replay_collapses_pending_updates(self):
+        self.write_pushes([self.rows[0], self.rows[0], self.rows[1]])
+        exchange = ReplayKlineExchange(self.path)
+        await asyncio.wait_for(exchange.watch_ohlcv("BTC-USDT", "5m"), 1)
+        await exchange.finished.wait()
+        self.assertEqual(await exchange.watch_ohlcv("BTC-USDT", "5m"), [self.rows[0], self.rows[1]])
+
+
+if __name__ == "__main__":
+    unittest.main()
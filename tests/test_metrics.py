@@ -0,0 +1,66 @@
+import asyncio
+import unittest
+from app.core.event_bus import EventBus, EventType
+from app.core.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_prometheus_text_format(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("jobs_total", "Jobs run", ("queue",))
+        histogram = registry.histogram("job_seconds", "Job time", ("queue",), buckets=(0.1, 1.0))
+        registry.gauge("depth", "Queue depth", collect=lambda: {(): 3})
+
+        counter.inc("a")
+        counter.inc("a", amount=2)
+        counter.inc('b"q')
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value, "a")
+
+        lines = registry.render().splitlines()
+        self.assertIn("# TYPE jobs_total counter", lines)
+        self.assertIn('jobs_total{queue="a"} 3', lines)
+        self.assertIn('jobs_total{queue="b\\"q"} 1', lines)
+        self.assertIn("# TYPE job_seconds histogram", lines)
+        self.assertIn('job_seconds_bucket{queue="a",le="0.1"} 1', lines)
+        self.assertIn('job_seconds_bucket{queue="a",le="1"} 2', lines)
+        self.assertIn('job_seconds_bucket{queue="a",le="+Inf"} 3', lines)
+        self.assertIn('job_seconds_sum{queue="a"} 5.55', lines)
+        self.assertIn('job_seconds_count{queue="a"} 3', lines)
+        self.assertIn("depth 3", lines)
+
+
+class TestEventBusMetrics(unittest.IsolatedAsyncioTestCase):
+    async def test_bus_records_throughput_latency_and_errors(self):
+        bus = EventBus()
+
+        async def slow_handler(data):
+            await asyncio.sleep(0.02)
+
+        def failing_handler(data):
+            raise RuntimeError("boom")
+
+        bus.subscribe(EventType.SIGNAL, slow_handler)
+        bus.subscribe(EventType.SIGNAL, failing_handler)
+        for _ in range(3):
+            await bus.publish(EventType.SIGNAL, {"agent": "Test"})
+        await bus.drain()
+
+        m = bus.metrics
+        self.assertEqual(m.published.get("signal"), 3)
+        self.assertEqual(m.queue_wait.count("signal"), 3)
+        slow = slow_handler.__qualname__
+        self.assertEqual(m.handler_duration.count("signal", slow), 3)
+        self.assertGreaterEqual(m.handler_duration.sum("signal", slow), 0.06)
+        self.assertEqual(m.handler_errors.get("signal", failing_handler.__qualname__), 3)
+        self.assertEqual(m.handler_errors.get("signal", slow), 0)
+
+        text = m.render()
+        self.assertIn('eventbus_events_published_total{event_type="signal"} 3', text)
+        self.assertIn("eventbus_queue_depth 0", text)
+        self.assertIn("eventbus_handler_duration_seconds_bucket{", text)
+        await bus.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,242 @@
+import unittest
+import numpy as np
+from app.core.relative_candles import (
+    STATE_NAMES, relative_candle_states, relative_candle_phases, relative_candle_bodies,
+    candle_event, next_state, next_phase
+)
+
+
+def reference_relative_candles(opens, highs, lows, closes):
+    """Original per-row implementation from MarketDataAgent.calculate_indicators (parity reference)."""
+    n = len(highs)
+
+    # Helper lambdas (using numpy array indexing)
+    # Note: i is index
+    def is_HH(i): return i > 0 and highs[i] > highs[i-1]
+    def is_HL(i): return i > 0 and lows[i] > lows[i-1]
+    def is_LH(i): return i > 0 and highs[i] < highs[i-1]
+    def is_LL(i): return i > 0 and lows[i] < lows[i-1]
+    def is_green(i): return closes[i] > opens[i]
+    def is_red(i): return closes[i] < opens[i]
+
+    states = ['X'] * n
+
+    for i in range(2, n):
+        prev_state = states[i-1]
+
+        # Logic from TODO.md
+        if prev_state == 'X':
+            if is_HH(i) and is_HL(i): states[i] = 'U'
+            elif is_LH(i) and is_LL(i): states[i] = 'D'
+            elif is_LH(i) and is_HL(i):
+                if is_LH(i-1) and is_HL(i-1): states[i] = 'I2'
+                else: states[i] = 'I'
+            elif is_HH(i) and is_LL(i):
+                if is_green(i): states[i] = 'RU2'
+                elif is_red(i): states[i] = 'RD2'
+
+        elif prev_state == 'U':
+            if is_HH(i) and is_HL(i): states[i] = 'U'
+            elif is_LH(i) and is_LL(i): states[i] = 'RD'
+            elif is_LH(i) and is_HL(i):
+                if is_LH(i-1) and is_HL(i-1): states[i] = 'I2'
+                else: states[i] = 'I'
+            elif is_HH(i) and is_LL(i): states[i] = 'RU'
+
+        elif prev_state == 'D':
+            if is_HH(i) and is_HL(i): states[i] = 'RU'
+            elif is_LH(i) and is_LL(i): states[i] = 'D'
+            elif is_LH(i) and is_HL(i):
+                if is_LH(i-1) and is_HL(i-1): states[i] = 'I2'
+                else: states[i] = 'I'
+            elif is_HH(i) and is_LL(i): states[i] = 'RU' # Code says RU for both? line 107
+
+        elif prev_state in ['RU', 'RU2']:
+            if is_HH(i) and is_HL(i): states[i] = 'U'
+            elif is_LH(i) and is_LL(i): states[i] = 'RD'
+            elif is_LH(i) and is_HL(i):
+                if is_LH(i-1) and is_HL(i-1): states[i] = 'I2'
+                else: states[i] = 'I'
+            elif is_HH(i) and is_LL(i):
+                if is_green(i): states[i] = 'RU2'
+                elif is_red(i): states[i] = 'RD2'
+
+        elif prev_state in ['RD', 'RD2']:
+            if is_HH(i) and is_HL(i): states[i] = 'RU'
+            elif is_LH(i) and is_LL(i): states[i] = 'D'
+            elif is_LH(i) and is_HL(i): states[i] = 'I'
+            elif is_HH(i) and is_LL(i):
+                if is_green(i): states[i] = 'RU2'
+                elif is_red(i): states[i] = 'RD2'
+
+        elif prev_state == 'I':
+            if is_HH(i) and is_HL(i): states[i] = 'RU'
+            elif is_LH(i) and is_LL(i): states[i] = 'RD'
+            elif is_LH(i) and is_HL(i): states[i] = 'I2'
+            elif is_HH(i) and is_LL(i):
+                if is_green(i): states[i] = 'RU2'
+                elif is_red(i): states[i] = 'RD2'
+
+        elif prev_state == 'I2':
+            if is_HH(i) and is_HL(i): states[i] = 'RU'
+            elif is_LH(i) and is_LL(i): states[i] = 'RD'
+            elif is_LH(i) and is_HL(i): states[i] = 'I2'
+            elif is_HH(i) and is_LL(i):
+                if is_green(i): states[i] = 'RU2'
+                elif is_red(i): states[i] = 'RD2'
+        else:
+            states[i] = 'X'
+
+    # Calculate Phases
+    phases = np.zeros(n)
+    # Initialize first phase (0)
+    phases[0] = 1 if is_green(0) else -1
+    for i in range(1, 3):
+        phases[i] = phases[i-1]
+
+    for i in range(3, n):
+        s2, s1, s0 = states[i-2], states[i-1], states[i]
+
+        up_seq = (
+            (s1 == 'D' and s0 == 'RU') or
+            (s2 == 'D' and s1 == 'I' and s0 == 'RU') or
+            (s1 == 'D' and s0 == 'RU2') or
+            (s2 == 'D' and s1 == 'I' and s0 == 'RU2') or
+            (s1 == 'RD' and s0 == 'RU') or
+            (s2 == 'RD' and s1 == 'I' and s0 == 'RU') or
+            (s1 == 'RD' and s0 == 'RU2') or
+            (s2 == 'RD' and s1 == 'I' and s0 == 'RU2') or
+            (s1 == 'RD2' and s0 == 'RU') or
+            (s2 == 'RD2' and s1 == 'I' and s0 == 'RU') or
+            (s1 == 'RD2' and s0 == 'RU2') or
+            (s2 == 'RD2' and s1 == 'I' and s0 == 'RU2') or
+            (s2 == 'I' and s1 == 'I2' and s0 == 'RU') or
+            (s2 == 'I' and s1 == 'I2' and s0 == 'RU2')
+        )
+
+        down_seq = (
+            (s1 == 'U' and s0 == 'RD') or
+            (s2 == 'U' and s1 == 'I' and s0 == 'RD') or
+            (s1 == 'U' and s0 == 'RD2') or
+            (s2 == 'U' and s1 == 'I' and s0 == 'RD2') or
+            (s1 == 'RU' and s0 == 'RD') or
+            (s2 == 'RU' and s1 == 'I' and s0 == 'RD') or
+            (s1 == 'RU' and s0 == 'RD2') or
+            (s2 == 'RU' and s1 == 'I' and s0 == 'RD2') or
+            (s1 == 'RU2' and s0 == 'RD') or
+            (s2 == 'RU2' and s1 == 'I' and s0 == 'RD') or
+            (s1 == 'RU2' and s0 == 'RD2') or
+            (s2 == 'RU2' and s1 == 'I' and s0 == 'RD2') or
+            (s2 == 'I' and s1 == 'I2' and s0 == 'RD') or
+            (s2 == 'I' and s1 == 'I2' and s0 == 'RD2')
+        )
+
+        if up_seq:
+            phases[i] = 1
+        elif down_seq:
+            phases[i] = -1
+        else:
+            phases[i] = phases[i-1]
+
+    # Calculate Relative Candles Open/Close (Drawing Logic)
+    # Logic provided by user:
+    # HH & !LL -> Bullish (O=L, C=H)
+    # LL & !HH -> Bearish (O=H, C=L)
+    # HH & LL -> Outside (Follows original candle color: Red->Full Red, Green->Full Green)
+    # Else (Inside/Equal) -> Bearish Full (O=H, C=L)
+
+    rel_opens = np.copy(opens)
+    rel_closes = np.copy(closes)
+    rel_modes = np.array(['Standard'] * n, dtype=object)
+
+    # Vectorize or Loop? Loop is strictly safer for exact logic match, n is small (100-1000)
+    for i in range(1, n):
+        prev_h = highs[i-1]
+        prev_l = lows[i-1]
+        curr_h = highs[i]
+        curr_l = lows[i]
+        curr_o = opens[i]
+        curr_c = closes[i]
+
+        hh = curr_h > prev_h
+        ll = curr_l < prev_l
+
+        if hh and not ll:
+            rel_opens[i] = curr_l
+            rel_closes[i] = curr_h
+        elif ll and not hh:
+            rel_opens[i] = curr_h
+            rel_closes[i] = curr_l
+        elif hh and ll:
+            if curr_o > curr_c: # Original Red
+                rel_opens[i] = curr_h
+                rel_closes[i] = curr_l
+            else: # Original Green/Doji
+                rel_opens[i] = curr_l
+                rel_closes[i] = curr_h
+        else:
+            # Inside or exact -> O=High, C=Low (Red in basic logic, but marked Inside for Gray)
+            rel_opens[i] = curr_h
+            rel_closes[i] = curr_l
+            rel_modes[i] = 'Inside'
+
+    return states, phases, rel_opens, rel_closes, rel_modes
+
+
+def make_candles(n: int, seed: int, tick: float = None):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, 1, n))
+    opens = np.r_[closes[0], closes[:-1]] + rng.normal(0, 0.3, n)
+    highs = np.maximum(opens, closes) + rng.random(n)
+    lows = np.minimum(opens, closes) - rng.random(n)
+    if tick:
+        # Coarse ticks produce equal highs/lows and dojis (the "no rule" and doji branches)
+        opens, highs, lows, closes = (np.round(x / tick) * tick for x in (opens, highs, lows, closes))
+    return opens, highs, lows, closes
+
+
+class TestRelativeCandles(unittest.TestCase):
+    def assertParity(self, opens, highs, lows, closes):
+        ref_states, ref_phases, ref_opens, ref_closes, ref_modes = reference_relative_candles(opens, highs, lows, closes)
+
+        states = relative_candle_states(opens, highs, lows, closes)
+        phases = relative_candle_phases(states, first_green=bool(closes[0] > opens[0]))
+        rel_opens, rel_closes, rel_modes = relative_candle_bodies(opens, highs, lows, closes)
+
+        self.assertEqual([STATE_NAMES[s] for s in states], ref_states)
+        np.testing.assert_array_equal(phases, ref_phases)
+        np.testing.assert_array_equal(rel_opens, ref_opens)
+        np.testing.assert_array_equal(rel_closes, ref_closes)
+        self.assertEqual(list(rel_modes), list(ref_modes))
+        return states, phases
+
+    def test_parity_with_reference(self):
+        for seed in range(5):
+            self.assertParity(*make_candles(500, seed))
+
+    def test_parity_with_ties_and_dojis(self):
+        for seed in range(5):
+            self.assertParity(*make_candles(500, seed, tick=1.0))
+
+    def test_single_step_matches_batch(self):
+        opens, highs, lows, closes = make_candles(300, 7, tick=0.5)
+        states, phases = self.assertParity(opens, highs, lows, closes)
+
+        for i in range(3, len(highs)):
+            event = candle_event(
+                highs[i] > highs[i-1], lows[i] > lows[i-1], highs[i] < highs[i-1], lows[i] < lows[i-1],
+                highs[i-1] < highs[i-2] and lows[i-1] > lows[i-2], closes[i] > opens[i], closes[i] < opens[i]
+            )
+            self.assertEqual(next_state(states[i-1], event), states[i])
+            self.assertEqual(next_phase(phases[i-1], states[i-2], states[i-1], states[i]), phases[i])
+
+    def test_short_histories(self):
+        for n in range(0, 5):
+            opens, highs, lows, closes = make_candles(n, 3) if n else (np.array([]),) * 4
+            states = relative_candle_states(opens, highs, lows, closes)
+            self.assertEqual(len(states), n)
+            self.assertEqual(len(relative_candle_phases(states, first_green=True)), n)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+import numpy as np
+from app.core.sr_levels import LevelPool, ClosestLevelsTracker
+
+
+class TestSupportResistanceLevels(unittest.TestCase):
+    def test_level_pool_matches_linear_scan(self):
+        rng = np.random.default_rng(0)
+        levels = list(np.round(rng.uniform(90, 110, 200), 1))
+        pool = LevelPool(levels)
+        for price in list(np.round(rng.uniform(85, 115, 500), 1)) + levels[:20]:
+            below = [l for l in levels if l < price]
+            above = [l for l in levels if l > price]
+            self.assertEqual(pool.below(price), max(below) if below else None)
+            self.assertEqual(pool.above(price), min(above) if above else None)
+
+    def test_tracker_streaming(self):
+        tracker = ClosestLevelsTracker()
+        self.assertEqual(tracker.update(100.0), (None, None))
+        self.assertEqual(tracker.update(100.0, support=95.0, resistance=105.0), (95.0, 105.0))
+        tracker.confirm(support=98.0)
+        # Support broken -> next level down becomes the closest support
+        self.assertEqual(tracker.closest(97.0), (95.0, 105.0))
+        self.assertEqual(tracker.closest(99.0), (98.0, 105.0))
+        # Levels equal to price are neither above nor below
+        self.assertEqual(tracker.closest(105.0), (98.0, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+import pandas as pd
+from app.agents.value_areas_agent import ValueAreasAgent
+
+
+def loop_profile(df, num_bins):
+    """The per-candle, per-bin loop the vectorized profile replaced"""
+    min_p, max_p = df['Low'].min(), df['High'].max()
+    bin_size = (max_p - min_p) / num_bins
+    profile = np.zeros(num_bins)
+    for h, l, v in zip(df['High'], df['Low'], df['Volume']):
+        start_bin = max(0, min(num_bins - 1, int((l - min_p) / bin_size)))
+        end_bin = max(0, min(num_bins - 1, int((h - min_p) / bin_size)))
+        for b in range(start_bin, end_bin + 1):
+            profile[b] += v / (end_bin - start_bin + 1)
+    return profile
+
+
+class TestValueAreas(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.agent = ValueAreasAgent()
+        rng = np.random.default_rng(3)
+        close = 100 + np.cumsum(rng.normal(0, 1, 150))
+        self.df = pd.DataFrame({
+            "Close": close,
+            "High": close + rng.random(150) * 2,
+            "Low": close - rng.random(150) * 2,
+            "Volume": rng.random(150) * 10,
+        })
+
+    async def test_uniform_profile_matches_loop(self):
+        result = self.agent.calculate_value_areas(self.df, num_bins=188, lookback=150)
+        profile = result["volume_profile"]
+        self.assertEqual(profile["price"].shape, (188,))
+        np.testing.assert_allclose(profile["volume"], loop_profile(self.df, 188), atol=1e-12)
+        self.assertEqual(result["poc"], float(profile["price"][np.argmax(profile["volume"])]))
+        self.assertLess(result["val"], result["poc"])
+        self.assertGreater(result["vah"], result["poc"])
+
+    async def test_tick_profile_is_proportional_to_range(self):
+        df = pd.DataFrame({"Close": [1.0, 3.5], "High": [2.0, 4.0], "Low": [0.0, 3.0], "Volume": [10.0, 6.0]})
+        profile = self.agent.calculate_value_areas(df, num_bins=4, distribution="tick")["volume_profile"]["volume"]
+        # Candle 1 spans bins 0-1 evenly; candle 2 covers bin 3, ending exactly on the top of the range
+        np.testing.assert_allclose(profile, [5.0, 5.0, 0.0, 6.0])
+
+        result = self.agent.calculate_value_areas(self.df, num_bins=50, lookback=150, distribution="tick")
+        self.assertAlmostEqual(result["volume_profile"]["volume"].sum(), self.df["Volume"].sum())
+        self.assertTrue((result["volume_profile"]["volume"] >= 0).all())
+
+    async def test_flat_or_missing_prices_have_no_profile(self):
+        flat = pd.DataFrame({"Close": [1.0] * 3, "High": [1.0] * 3, "Low": [1.0] * 3, "Volume": [1.0] * 3})
+        self.assertIsNone(self.agent.calculate_value_areas(flat))
+        self.df.loc[5, "Low"] = np.nan
+        self.assertIsNone(self.agent.calculate_value_areas(self.df, lookback=150))
+
+
+if __name__ == "__main__":
+    unittest.main()